@@ -0,0 +1,96 @@
+from google.cloud.discoveryengine_v1beta.services.search_service.transports import SearchServiceGrpcTransport
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from src.search.client import SearchClientRegistry
+from src.search.client import COMPRESSION_ALGORITHMS
+from src.search.client import build_channel_options
+from src.benchmark.standin import StandInSearchServer
+from src.benchmark.utils import summarize_latencies
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Dict
+from typing import List
+import time
+import grpc
+
+
+NUM_QUERIES = 500
+LOCATION = "global"
+
+
+def build_request(client: discoveryengine.SearchServiceClient) -> discoveryengine.SearchRequest:
+    serving_config = client.serving_config_path(
+        project=config.PROJECT_ID,
+        location=LOCATION,
+        data_store="quarterly-reports",
+        serving_config="default_config",
+    )
+    return discoveryengine.SearchRequest(serving_config=serving_config, query="Google Cloud revenue Q1 2021", page_size=5)
+
+
+def create_channel(address: str) -> grpc.Channel:
+    settings = config.SEARCH_CLIENT
+    return grpc.insecure_channel(
+        address,
+        options=build_channel_options(settings),
+        compression=COMPRESSION_ALGORITHMS[settings['compression'].lower()],
+    )
+
+
+def run_per_call_construction(address: str, num_queries: int) -> List[float]:
+    """
+    Mirrors the original behaviour: a new client and channel for every query.
+    """
+    latencies = []
+    for _ in range(num_queries):
+        start = time.perf_counter()
+        transport = SearchServiceGrpcTransport(host=address, channel=create_channel(address))
+        client = discoveryengine.SearchServiceClient(transport=transport)
+        client.search(build_request(client))
+        latencies.append(time.perf_counter() - start)
+        transport.close()
+    return latencies
+
+
+def run_pooled(address: str, num_queries: int) -> List[float]:
+    """
+    Uses a pre-warmed client from the registry for every query.
+    """
+    registry = SearchClientRegistry(config.SEARCH_CLIENT, channel_factory=lambda endpoint: create_channel(address))
+    registry.warm_up([LOCATION])
+    latencies = []
+    try:
+        for _ in range(num_queries):
+            start = time.perf_counter()
+            client = registry.get_client(LOCATION)
+            client.search(build_request(client))
+            latencies.append(time.perf_counter() - start)
+    finally:
+        registry.close()
+    return latencies
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    """
+    Compares p50/p95 search latency of per-call client construction against the pooled registry,
+    using a local stand-in server.
+
+    The stand-in speaks plaintext gRPC, so the per-call numbers exclude the TLS handshake and
+    credential fetch paid against the real endpoint; the real gap is larger than reported here.
+    """
+    server = StandInSearchServer()
+    address = server.start()
+    try:
+        results = {
+            "per_call": summarize_latencies(run_per_call_construction(address, NUM_QUERIES)),
+            "pooled": summarize_latencies(run_pooled(address, NUM_QUERIES)),
+        }
+    finally:
+        server.stop()
+
+    for name, stats in results.items():
+        logger.info(f"{name}: {stats}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,60 @@
+from src.generate.entity_rules import RuleBasedEntityExtractor
+from src.config.logging import logger
+from src.eval.utils import load_data
+from typing import Tuple
+from typing import Dict
+from typing import Any
+import statistics
+import time
+
+
+GROUND_TRUTH_PATH = './data/eval/ground_truth.csv'
+
+
+def expected_entities(document: str) -> Tuple[str, str]:
+    """
+    Derives the expected company and time period from a ground truth document name, e.g. "alphabet-q1-2021".
+    """
+    company, quarter, year = document.split('-')
+    return company.capitalize(), f"{quarter.upper()} {year}"
+
+
+def run(ground_truth_path: str = GROUND_TRUTH_PATH) -> Dict[str, Any]:
+    """
+    Reports the coverage and accuracy of the rule-based extractor on the ground truth questions,
+    i.e. the share of entities resolved without the LLM and the share of those that are correct,
+    along with the extraction latency.
+    """
+    extractor = RuleBasedEntityExtractor()
+    df = load_data(ground_truth_path)
+    counts = {entity: {"resolved": 0, "correct": 0} for entity in ("company", "time_period")}
+    latencies = []
+    for _, row in df.iterrows():
+        expected = dict(zip(("company", "time_period"), expected_entities(row['document'])))
+        start = time.perf_counter()
+        entities = extractor.extract(row['question'])
+        latencies.append(time.perf_counter() - start)
+        for entity, value in entities.items():
+            if value is None:
+                logger.info(f"Unresolved {entity} (LLM fallback): {row['question']}")
+                continue
+            counts[entity]["resolved"] += 1
+            if value == expected[entity]:
+                counts[entity]["correct"] += 1
+            else:
+                logger.warning(f"Wrong {entity} '{value}', expected '{expected[entity]}': {row['question']}")
+
+    total = len(df)
+    report: Dict[str, Any] = {"questions": total}
+    for entity, count in counts.items():
+        report[f"{entity}_coverage"] = round(count["resolved"] / total, 4)
+        report[f"{entity}_precision"] = round(count["correct"] / count["resolved"], 4) if count["resolved"] else 0.0
+    report["llm_calls_saved"] = sum(count["resolved"] for count in counts.values())
+    report["llm_calls_remaining"] = 2 * total - report["llm_calls_saved"]
+    report["median_extract_microseconds"] = round(statistics.median(latencies) * 1e6, 1)
+    logger.info(report)
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,118 @@
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from src.search.utils import search_data_store_with_filters
+from src.search.utils import extract_relevant_data
+from src.benchmark.utils import summarize_latencies
+from google.protobuf import json_format
+from src.config.logging import logger
+from src.eval.utils import load_data
+from typing import Dict
+from typing import List
+from typing import Any
+import time
+import os
+
+
+RESPONSES_FILE = './data/benchmark/search_responses.jsonl'
+NUM_ITERATIONS = 2000
+
+
+def record_responses(data_store_id: str, output_file: str = RESPONSES_FILE) -> None:
+    """
+    Records raw search responses for the ground-truth questions so the benchmark can replay them offline.
+
+    Args:
+        data_store_id (str): Vertex AI Search Data Store ID.
+        output_file (str): The JSON lines file to write.
+    """
+    data = load_data('./data/eval/ground_truth.csv')
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w') as file:
+        for question in data['question']:
+            response = search_data_store_with_filters(question, "", data_store_id)
+            if response is not None:
+                first_page = next(iter(response.pages))
+                file.write(discoveryengine.SearchResponse.to_json(first_page, indent=None) + '\n')
+    logger.info(f"Recorded responses written to {output_file}")
+
+
+def build_synthetic_response() -> discoveryengine.SearchResponse:
+    """
+    Builds a response shaped like the ones the quarterly-reports data store returns
+    (5 results with 3 extractive answers and 3 extractive segments each).
+    """
+    segment = "Segment results The following table presents our revenues and operating income (loss). " * 20
+    answer = "Google Cloud operating loss was $974 million for the quarter ended March 31, 2021. " * 3
+    results = []
+    for i in range(5):
+        derived_struct_data = {
+            "title": f"alphabet-q{i % 4 + 1}-2021",
+            "link": f"gs://vais-rag-patterns/raw_docs/alphabet-q{i % 4 + 1}-2021.pdf",
+            "extractive_answers": [{"content": answer, "pageNumber": str(p)} for p in range(3)],
+            "extractive_segments": [
+                {"content": segment, "pageNumber": str(p), "id": f"seg-{p}", "relevanceScore": 0.9,
+                 "previous_segments": [{"content": segment}], "next_segments": [{"content": segment}]}
+                for p in range(3)
+            ],
+        }
+        document = discoveryengine.Document(
+            id=str(i + 1),
+            struct_data={"company": "alphabet", "time_period": f"Q{i % 4 + 1} 2021"},
+            derived_struct_data=derived_struct_data,
+        )
+        results.append(discoveryengine.SearchResponse.SearchResult(id=str(i + 1), document=document))
+    summary = discoveryengine.SearchResponse.Summary(summary_text="Google Cloud reported an operating loss of $974 million.")
+    return discoveryengine.SearchResponse(results=results, summary=summary)
+
+
+def load_responses(input_file: str = RESPONSES_FILE) -> List[discoveryengine.SearchResponse]:
+    """
+    Loads recorded responses, falling back to a synthetic response when none have been recorded.
+    """
+    if not os.path.exists(input_file):
+        logger.warning(f"{input_file} not found, benchmarking a synthetic response instead.")
+        return [build_synthetic_response()]
+    with open(input_file) as file:
+        return [discoveryengine.SearchResponse.from_json(line, ignore_unknown_fields=True) for line in file if line.strip()]
+
+
+def extract_relevant_data_with_message_to_dict(response: discoveryengine.SearchResponse) -> List[Any]:
+    """
+    The previous implementation: converts every document to a dict before reading it.
+    """
+    extracted_data = [response.summary.summary_text]
+    for result in response.results:
+        result_json = json_format.MessageToDict(result.document._pb)
+        struct_data = result_json.get('structData', {})
+        derived_struct_data = result_json.get('derivedStructData', {})
+        extracted_data.append({
+            "id": result_json['id'],
+            "title": derived_struct_data['title'],
+            "link": derived_struct_data.get("link", ""),
+            "company": struct_data['company'],
+            "time_period": struct_data['time_period'],
+            "extractive_answers": [answer["content"] for answer in derived_struct_data.get("extractive_answers", [])],
+            "extractive_segments": [segment["content"] for segment in derived_struct_data.get("extractive_segments", [])],
+        })
+    return extracted_data
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    """
+    Compares the per-response extraction time of the MessageToDict path against direct field access.
+    """
+    responses = load_responses()
+    results = {}
+    for name, extract in [("message_to_dict", extract_relevant_data_with_message_to_dict), ("direct", extract_relevant_data)]:
+        latencies = []
+        for i in range(NUM_ITERATIONS):
+            response = responses[i % len(responses)]
+            start = time.perf_counter()
+            extract(response)
+            latencies.append(time.perf_counter() - start)
+        results[name] = summarize_latencies(latencies)
+        logger.info(f"{name}: {results[name]}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
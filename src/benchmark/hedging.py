@@ -0,0 +1,91 @@
+from google.cloud.discoveryengine_v1beta.services.search_service.transports import SearchServiceGrpcTransport
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from src.benchmark.client_pool import create_channel
+from concurrent.futures import ThreadPoolExecutor
+from src.benchmark.client_pool import build_request
+from src.benchmark.standin import StandInSearchServer
+from src.benchmark.utils import summarize_latencies
+from src.search.hedging import RequestHedger
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import threading
+import time
+
+
+NUM_QUERIES = 1000
+CONCURRENCY = 8
+SLOW_FRACTION = 0.05
+SLOW_LATENCY = 0.25
+
+
+class InjectedLatency:
+    """
+    Lognormal latency around 20 ms, with a fraction of requests landing on a slow replica.
+    """
+
+    def __init__(self, slow_fraction: float, seed: int = 0) -> None:
+        self.slow_fraction = slow_fraction
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            if self._rng.random() < self.slow_fraction:
+                return SLOW_LATENCY
+            return float(self._rng.lognormal(np.log(0.02), 0.3))
+
+
+def run_queries(client: discoveryengine.SearchServiceClient, hedger: Optional[RequestHedger]) -> List[float]:
+    request = build_request(client)
+    timeout = config.SEARCH['timeout_seconds']
+
+    def one_query(_: int) -> float:
+        start = time.perf_counter()
+        attempt = lambda: client.search(request, timeout=timeout)
+        hedger.call(attempt, timeout) if hedger else attempt()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        return list(executor.map(one_query, range(NUM_QUERIES)))
+
+
+def run() -> Dict[str, Any]:
+    """
+    Compares search latency with and without hedging against a local stand-in whose requests
+    occasionally land on a slow replica, using the `search.hedging` settings.
+    """
+    settings = config.SEARCH['hedging']
+    server = StandInSearchServer(latency=InjectedLatency(SLOW_FRACTION))
+    address = server.start()
+    transport = SearchServiceGrpcTransport(host=address, channel=create_channel(address))
+    client = discoveryengine.SearchServiceClient(transport=transport)
+    try:
+        hedger = RequestHedger(
+            delay_percentile=settings['delay_percentile'],
+            min_delay_ms=settings['min_delay_ms'],
+            min_samples=settings['min_samples'],
+            max_hedge_rate=settings['max_hedge_rate'],
+            max_hedge_burst=settings['max_hedge_burst'],
+            max_workers=2 * CONCURRENCY,
+        )
+        results = {
+            "unhedged": summarize_latencies(run_queries(client, None)),
+            "hedged": summarize_latencies(run_queries(client, hedger)),
+            "hedging_stats": hedger.get_stats(),
+        }
+    finally:
+        transport.close()
+        server.stop()
+
+    for name, stats in results.items():
+        logger.info(f"{name}: {stats}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,95 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import statistics
+import subprocess
+import sys
+import re
+
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parses the output of `python -X importtime`.
+
+    Args:
+        stderr (str): The standard error of the interpreter.
+
+    Returns:
+        List[Tuple[str, int, int]]: (module, depth, cumulative microseconds) for every import, in the printed order.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            imports.append((match.group(4), depth, int(match.group(2))))
+    return imports
+
+
+def measure(module: str) -> Optional[Dict[str, Any]]:
+    """
+    Imports a module in a fresh interpreter and returns its cumulative import time, along with
+    the heaviest modules it pulled in directly.
+
+    Args:
+        module (str): The dotted module name.
+
+    Returns:
+        Optional[Dict[str, Any]]: The import time in milliseconds and the heaviest direct imports,
+        or None if the import failed.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             capture_output=True, text=True)
+    imports = parse_importtime(process.stderr)
+    if process.returncode != 0 or not imports or imports[-1][0] != module:
+        logger.error(f"Failed to import {module}: {process.stderr.strip().splitlines()[-1:]}")
+        return None
+    # Children are printed before their parent, so the direct imports are the depth-1 entries
+    direct = sorted(((name, micros) for name, depth, micros in imports if depth == 1), key=lambda item: -item[1])
+    return {
+        "milliseconds": imports[-1][2] / 1000,
+        "heaviest": [(name, round(micros / 1000, 1)) for name, micros in direct[:3]],
+    }
+
+
+def run(budget: Optional[Dict[str, float]] = None, repeats: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    Measures the import time of every module in the budget, `repeats` times each, and compares
+    the median against the budget.
+
+    Args:
+        budget (Optional[Dict[str, float]]): Milliseconds allowed per module. Defaults to `import_budget`.
+        repeats (int): Number of fresh interpreters per module.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per module, the median import time, the budget, whether it is
+        exceeded and the heaviest direct imports.
+    """
+    budget = budget or config.IMPORT_BUDGET
+    results = {}
+    for module, limit in budget.items():
+        runs = [result for result in (measure(module) for _ in range(repeats)) if result]
+        if not runs:
+            results[module] = {"milliseconds": None, "budget": limit, "over_budget": True, "heaviest": []}
+            continue
+        median = round(statistics.median(result["milliseconds"] for result in runs), 1)
+        results[module] = {"milliseconds": median, "budget": limit, "over_budget": median > limit,
+                           "heaviest": runs[0]["heaviest"]}
+        logger.info(f"{module}: {median} ms (budget {limit} ms)")
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    violations = {module: result for module, result in results.items() if result["over_budget"]}
+    for module, result in violations.items():
+        logger.error(f"{module} imports in {result['milliseconds']} ms, over its budget of {result['budget']} ms. "
+                     f"Heaviest imports: {result['heaviest']}")
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,95 @@
+from src.index.create_dense_index import build_dense_index
+from concurrent.futures import ProcessPoolExecutor
+from src.benchmark.utils import summarize_latencies
+from src.search.local_dense import LocalDenseIndex
+from src.config.logging import logger
+from typing import Dict
+from typing import List
+from typing import Any
+import multiprocessing
+import numpy as np
+import tempfile
+import psutil
+import time
+import os
+
+
+CORPUS_SIZES = [10000, 50000, 200000]
+DIMENSIONS = 768
+NUM_QUERIES = 200
+CHUNKS_PER_DOCUMENT = 50
+COMPANIES = ["alphabet", "amazon", "microsoft"]
+
+
+def build_synthetic_documents(num_chunks: int) -> List[Dict[str, Any]]:
+    """
+    Builds chunked documents shaped like `chunk_documents` output, spread over three companies and twelve quarters.
+    """
+    documents = []
+    for doc in range(num_chunks // CHUNKS_PER_DOCUMENT):
+        documents.append({
+            "id": str(doc + 1),
+            "title": f"doc-{doc}",
+            "uri": f"gs://benchmark/doc-{doc}.pdf",
+            "company": COMPANIES[doc % len(COMPANIES)],
+            "time_period": f"Q{doc % 4 + 1} {2021 + doc // 4 % 3}",
+            "chunks": [{"page_number": 1, "text": f"passage {chunk} of document {doc}"} for chunk in range(CHUNKS_PER_DOCUMENT)],
+        })
+    return documents
+
+
+def random_embeddings(texts: List[str]) -> np.ndarray:
+    return np.random.default_rng(len(texts)).standard_normal((len(texts), DIMENSIONS), dtype=np.float32)
+
+
+def measure(index_dir: str) -> Dict[str, Any]:
+    """
+    Opens an index in a fresh process and measures RSS and query latency, unfiltered and filtered.
+    """
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    index = LocalDenseIndex(index_dir)
+    rss_opened = process.memory_info().rss
+
+    queries = np.random.default_rng(1).standard_normal((NUM_QUERIES, DIMENSIONS), dtype=np.float32)
+    results = {}
+    for name, filter_str in [("unfiltered", ""), ("filtered", 'company: ANY("alphabet") AND time_period: ANY("Q1 2021")')]:
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search_vector(query, "", filter_str)
+            latencies.append(time.perf_counter() - start)
+        results[name] = summarize_latencies(latencies)
+    results["rss_open_mb"] = round((rss_opened - rss_before) / 2 ** 20, 1)
+    results["rss_after_queries_mb"] = round((process.memory_info().rss - rss_before) / 2 ** 20, 1)
+    return results
+
+
+def run(corpus_sizes: List[int] = CORPUS_SIZES) -> List[Dict[str, Any]]:
+    """
+    Benchmarks query latency and resident memory of the dense index against corpus size,
+    for int8 and float16 storage, with and without IVF partitioning.
+
+    Each configuration is measured in its own process so that RSS is not polluted by earlier runs.
+    """
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as root:
+        for num_chunks in corpus_sizes:
+            documents = build_synthetic_documents(num_chunks)
+            for dtype in ["int8", "float16"]:
+                for ivf in [False, True]:
+                    index_dir = os.path.join(root, f"{num_chunks}-{dtype}-{'ivf' if ivf else 'flat'}")
+                    build_dense_index(documents, index_dir, dtype=dtype, ivf_min_vectors=0 if ivf else num_chunks + 1,
+                                      embed=random_embeddings)
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        result = executor.submit(measure, index_dir).result()
+                    size_mb = sum(os.path.getsize(os.path.join(index_dir, f)) for f in os.listdir(index_dir)) / 2 ** 20
+                    row = {"num_chunks": num_chunks, "dtype": dtype, "ivf": ivf, "index_mb": round(size_mb, 1), **result}
+                    logger.info(row)
+                    rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
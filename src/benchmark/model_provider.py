@@ -0,0 +1,56 @@
+from concurrent.futures import ProcessPoolExecutor
+from src.config.logging import logger
+from typing import Dict
+from typing import List
+from typing import Any
+import multiprocessing
+import importlib
+import time
+
+
+MODULES = [
+    "src.generate.qa",
+    "src.generate.ner",
+    "src.eval.factual_correctness",
+    "src.eval.semantic_similarity",
+]
+
+
+def measure() -> Dict[str, Any]:
+    """
+    Measures, in a fresh interpreter, the import time of the model-using modules and the latency
+    of the first and second use of the chat and embedding models.
+    """
+    start = time.perf_counter()
+    for module in MODULES:
+        importlib.import_module(module)
+    results: Dict[str, Any] = {"import_seconds": round(time.perf_counter() - start, 4)}
+
+    from src.generate.provider import model_provider
+    from src.generate.llm import LLM
+    for name, use in (("chat", lambda: LLM().model), ("embedding", model_provider.get_embedding_model)):
+        for attempt in ("first", "second"):
+            start = time.perf_counter()
+            available = use() is not None
+            results[f"{name}_{attempt}_use_seconds"] = round(time.perf_counter() - start, 4)
+        results[f"{name}_available"] = available
+    results["provider"] = model_provider.get_stats()
+    return results
+
+
+def run(repeats: int = 3) -> List[Dict[str, Any]]:
+    """
+    Runs `measure` in `repeats` freshly spawned processes, so every run pays the import and model construction costs.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(measure).result()
+        logger.info(result)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,45 @@
+from src.search.utils import search_data_store_with_filters
+from src.benchmark.utils import summarize_latencies
+from src.search.client import client_registry
+from src.search.profiles import PROFILES
+from src.config.logging import logger
+from src.eval.utils import load_data
+from src.search.utils import LOCATION
+from typing import Dict
+import time
+
+
+def run(data_store_id: str = "quarterly-reports", num_questions: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Measures end-to-end search latency per search profile against the data store.
+
+    The search cache is bypassed so every call reaches the API; the profiles are interleaved
+    per question so that they see the same backend conditions.
+
+    Args:
+        data_store_id (str): Vertex AI Search Data Store ID.
+        num_questions (int): Number of ground-truth questions to send per profile.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Latency percentiles per profile.
+    """
+    questions = load_data('./data/eval/ground_truth.csv')['question'].tolist()[:num_questions]
+    client_registry.warm_up([LOCATION])
+    latencies = {name: [] for name in PROFILES}
+    for question in questions:
+        for name in PROFILES:
+            start = time.perf_counter()
+            response = search_data_store_with_filters(question, "", data_store_id, name)
+            if response is not None:
+                latencies[name].append(time.perf_counter() - start)
+
+    results = {}
+    for name, profile_latencies in latencies.items():
+        if profile_latencies:
+            results[name] = summarize_latencies(profile_latencies)
+            logger.info(f"{name}: {results[name]}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
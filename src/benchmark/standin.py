@@ -0,0 +1,73 @@
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from concurrent.futures import ThreadPoolExecutor
+from src.config.logging import logger
+from typing import Callable
+from typing import Optional
+import time
+import grpc
+
+
+SERVICE_NAME = "google.cloud.discoveryengine.v1beta.SearchService"
+
+
+class StandInSearchServer:
+    """
+    A local, insecure gRPC server that answers Discovery Engine `Search` calls with a canned response.
+
+    It is used by the benchmarks to measure client-side costs (channel setup, serialization,
+    scheduling) without depending on the real API.
+
+    Attributes:
+        response (discoveryengine.SearchResponse): The response returned for every request.
+        latency (Optional[Callable[[], float]]): Returns the delay in seconds to inject before answering.
+        request_count (int): Number of requests served.
+    """
+
+    def __init__(self, response: Optional[discoveryengine.SearchResponse] = None,
+                 latency: Optional[Callable[[], float]] = None, max_workers: int = 64) -> None:
+        """
+        Initializes the stand-in server.
+
+        Args:
+            response (Optional[discoveryengine.SearchResponse]): The canned response. Defaults to an empty response.
+            latency (Optional[Callable[[], float]]): Injected server-side latency in seconds.
+            max_workers (int): Number of server worker threads.
+        """
+        self.response = response or discoveryengine.SearchResponse()
+        self.latency = latency
+        self.request_count = 0
+        self._server = grpc.server(ThreadPoolExecutor(max_workers=max_workers))
+        handler = grpc.method_handlers_generic_handler(SERVICE_NAME, {
+            "Search": grpc.unary_unary_rpc_method_handler(
+                self._search,
+                request_deserializer=discoveryengine.SearchRequest.deserialize,
+                response_serializer=discoveryengine.SearchResponse.serialize,
+            )
+        })
+        self._server.add_generic_rpc_handlers((handler,))
+        self.address = ""
+
+    def _search(self, request: discoveryengine.SearchRequest, context: grpc.ServicerContext) -> discoveryengine.SearchResponse:
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency())
+        return self.response
+
+    def start(self) -> str:
+        """
+        Starts the server on a free local port.
+
+        Returns:
+            str: The address of the server.
+        """
+        port = self._server.add_insecure_port("localhost:0")
+        self._server.start()
+        self.address = f"localhost:{port}"
+        logger.info(f"Stand-in search server listening on {self.address}")
+        return self.address
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        self._server.stop(grace=None)
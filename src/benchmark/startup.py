@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+from src.config.logging import logger
+from typing import Dict
+from typing import List
+from typing import Any
+import multiprocessing
+import time
+
+
+def measure() -> Dict[str, Any]:
+    """
+    Measures, in a fresh interpreter, the cost of loading the configuration and of the first and
+    second access token requests. Before tokens became lazy, the first request was paid inside
+    `Config()` at import by every process.
+    """
+    start = time.perf_counter()
+    from src.config.setup import config
+    results: Dict[str, Any] = {"config_import_seconds": round(time.perf_counter() - start, 4)}
+
+    for attempt in ("first", "second"):
+        start = time.perf_counter()
+        token = config.ACCESS_TOKEN
+        results[f"{attempt}_token_seconds"] = round(time.perf_counter() - start, 4)
+    results["token_available"] = token is not None
+
+    from src.config.credentials import get_token_provider
+    results["token_provider"] = get_token_provider().get_stats()
+    return results
+
+
+def run(repeats: int = 5) -> List[Dict[str, Any]]:
+    """
+    Runs `measure` in `repeats` freshly spawned processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(measure).result()
+        logger.info(result)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,22 @@
+from typing import Sequence
+from typing import Dict
+import numpy as np
+
+
+def summarize_latencies(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarizes a list of latencies measured in seconds.
+
+    Args:
+        latencies (Sequence[float]): Latencies in seconds.
+
+    Returns:
+        Dict[str, float]: The p50, p95, p99 and mean latencies in milliseconds.
+    """
+    values = np.asarray(latencies, dtype=np.float64) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
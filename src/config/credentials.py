@@ -0,0 +1,179 @@
+from google.auth.exceptions import DefaultCredentialsError
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from src.config.logging import logger
+from typing import Optional
+from typing import Dict
+from typing import Any
+import google.auth
+import subprocess
+import threading
+import datetime
+import time
+import os
+
+
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# Lifetime assumed for tokens printed by the gcloud CLI, which does not report their expiry
+GCLOUD_TOKEN_LIFETIME_SECONDS = 3000
+
+
+class TokenProvider:
+    """
+    Provides OAuth access tokens for the Google Cloud REST APIs, fetched lazily and cached until near expiry.
+
+    Credentials come from the service account key file when it exists, otherwise from
+    Application Default Credentials, and as a last resort from `gcloud auth print-access-token`.
+    Nothing is fetched until the first token is requested. After that, a daemon thread refreshes
+    the token `refresh_margin_seconds` before it expires, so callers never wait on a refresh and
+    long-running workers never hold an expired token.
+
+    Attributes:
+        credentials_path (Optional[str]): Path of the service account key file.
+        refresh_margin (float): Seconds before expiry at which the token is refreshed.
+        background_refresh (bool): Whether a daemon thread refreshes the token ahead of expiry.
+        stats (Dict[str, int]): Refresh and failure counters.
+    """
+
+    def __init__(self, credentials_path: Optional[str] = None, refresh_margin_seconds: float = 300,
+                 background_refresh: bool = True) -> None:
+        """
+        Initializes the provider without fetching anything.
+
+        Args:
+            credentials_path (Optional[str]): Path of the service account key file.
+            refresh_margin_seconds (float): Seconds before expiry at which the token is refreshed.
+            background_refresh (bool): Whether a daemon thread refreshes the token ahead of expiry.
+        """
+        self.credentials_path = credentials_path
+        self.refresh_margin = refresh_margin_seconds
+        self.background_refresh = background_refresh
+        self.stats = {"refreshes": 0, "background_refreshes": 0, "failures": 0}
+        self._credentials: Optional[Credentials] = None
+        self._use_gcloud = False
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _load_credentials(self) -> None:
+        if self.credentials_path and os.path.exists(self.credentials_path):
+            self._credentials = service_account.Credentials.from_service_account_file(self.credentials_path, scopes=SCOPES)
+            return
+        try:
+            self._credentials, _ = google.auth.default(scopes=SCOPES)
+        except DefaultCredentialsError as e:
+            logger.warning(f"No Application Default Credentials ({e}), falling back to the gcloud CLI.")
+            self._use_gcloud = True
+
+    def _refresh(self) -> None:
+        """
+        Fetches a new token. Must be called with the lock held.
+        """
+        if self._credentials is None and not self._use_gcloud:
+            self._load_credentials()
+        if self._use_gcloud:
+            self._token = subprocess.check_output(["gcloud", "auth", "print-access-token"]).decode('utf-8').strip()
+            self._expires_at = time.time() + GCLOUD_TOKEN_LIFETIME_SECONDS
+        else:
+            self._credentials.refresh(Request())
+            self._token = self._credentials.token
+            expiry = self._credentials.expiry
+            # google-auth reports expiry as a naive UTC datetime
+            self._expires_at = expiry.replace(tzinfo=datetime.timezone.utc).timestamp() if expiry else time.time() + GCLOUD_TOKEN_LIFETIME_SECONDS
+        self.stats["refreshes"] += 1
+        logger.info("Access token obtained successfully.")
+
+    def _needs_refresh(self) -> bool:
+        return self._token is None or time.time() >= self._expires_at - self.refresh_margin
+
+    def get_token(self) -> Optional[str]:
+        """
+        Returns a valid access token, fetching it on first use or when it is about to expire.
+
+        Returns:
+            Optional[str]: The access token, or None if it could not be fetched.
+        """
+        with self._lock:
+            if self._needs_refresh():
+                try:
+                    self._refresh()
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    logger.error(f"Failed to fetch access token. Error: {e}")
+                    return self._token if self._token and time.time() < self._expires_at else None
+            token = self._token
+        self._start_refresher()
+        return token
+
+    def _start_refresher(self) -> None:
+        if not self.background_refresh or self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresher", daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        retry_delay = 1.0
+        while not self._stop.is_set():
+            with self._lock:
+                wait = self._expires_at - self.refresh_margin - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                with self._lock:
+                    self._refresh()
+                    self.stats["background_refreshes"] += 1
+                retry_delay = 1.0
+            except Exception as e:
+                with self._lock:
+                    self.stats["failures"] += 1
+                logger.error(f"Background token refresh failed, retrying in {retry_delay:.0f}s. Error: {e}")
+                self._stop.wait(retry_delay)
+                retry_delay = min(60.0, retry_delay * 2)
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the remaining lifetime of the cached token.
+
+        Returns:
+            Dict[str, Any]: The token provider statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["expires_in_seconds"] = round(self._expires_at - time.time(), 1) if self._token else None
+        return stats
+
+
+_token_provider: Optional[TokenProvider] = None
+_token_provider_lock = threading.Lock()
+
+
+def get_token_provider() -> TokenProvider:
+    """
+    Returns the process-wide token provider, configured from the `auth` section of the configuration.
+
+    Returns:
+        TokenProvider: The shared token provider.
+    """
+    global _token_provider
+    with _token_provider_lock:
+        if _token_provider is None:
+            from src.config.setup import config
+            _token_provider = TokenProvider(
+                credentials_path=config.CREDENTIALS_PATH,
+                refresh_margin_seconds=config.AUTH['refresh_margin_seconds'],
+                background_refresh=config.AUTH['background_refresh'],
+            )
+        return _token_provider
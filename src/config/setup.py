@@ -1,7 +1,7 @@
 from src.config.logging import logger
+from typing import Optional
 from typing import Dict
 from typing import Any
-import subprocess
 import yaml
 import os
 
@@ -33,9 +33,24 @@ class Config:
         self.BUCKET = self.__config['bucket']
         self.CREDENTIALS_PATH = self.__config['credentials_json']
         self._set_google_credentials(self.CREDENTIALS_PATH)
-        self.ACCESS_TOKEN = self._set_access_token()
+        self.AUTH = self.__config['auth']
         self.TEXT_GEN_MODEL_NAME = self.__config['text_gen_model_name']
         self.TEXT_EMBED_MODEL_NAME = self.__config['text_embed_model_name']
+        self.LLM = self.__config['llm']
+        self.NER = self.__config['ner']
+        self.SEARCH_CLIENT = self.__config['search_client']
+        self.SEARCH = self.__config['search']
+        self.SEARCH_CACHE = self.__config['search_cache']
+        self.INGEST = self.__config['ingest']
+        self.RATE_LIMITS = self.__config['rate_limits']
+        self.CONTEXT = self.__config['context']
+        self.COMPLETION_CACHE = self.__config['completion_cache']
+        self.SEMANTIC_CACHE = self.__config['semantic_cache']
+        self.LOCAL_SEARCH = self.__config['local_search']
+        self.LOCAL_DENSE = self.__config['local_dense']
+        self.FACETS = self.__config['facets']
+        self.ROUTING = self.__config['routing']
+        self.IMPORT_BUDGET = self.__config['import_budget']
 
     @staticmethod
     def _load_config(config_path: str) -> Dict[str, Any]:
@@ -64,22 +79,17 @@ class Config:
         """
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
 
-    @staticmethod
-    def _set_access_token() -> str:
+    @property
+    def ACCESS_TOKEN(self) -> Optional[str]:
         """
-        Fetch an access token for authentication.
+        A valid access token for the REST APIs, fetched on first use and refreshed before it
+        expires (see `src.config.credentials`).
 
         Returns:
-        - str: The fetched access token.
+        - str: The access token, or None if it could not be fetched.
         """
-        logger.info("Fetching access token...")
-        cmd = ["gcloud", "auth", "print-access-token"]
-        try:
-            token = subprocess.check_output(cmd).decode('utf-8').strip()
-            logger.info("Access token obtained successfully.")
-            return token
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to fetch access token. Error: {e}")
+        from src.config.credentials import get_token_provider
+        return get_token_provider().get_token()
 
 
 config = Config()
\ No newline at end of file
@@ -1,9 +1,17 @@
 from src.config.logging import logger    
-from src.generate.llm import LLM  
+from src.generate.llm import llm
+from typing import Tuple
 from typing import Dict
+from typing import List
 
 
-llm = LLM()
+FACTUAL_CORRECTNESS_TASK = """Given the question, expected and generated answers as shown below, compare the answers and classify them into one of the three classes - `correct`, `partially correct`, or `incorrect`. 
+    If the answer is partially correct or incorrect, provide the rationale. 
+    The output should be two things - class and rationale as a Python dictionary. 
+    For class, it should be one word ONLY (which is the expected class), and for rationale, provide the reason succinctly, especially ONLY focusing on numbers and facts.
+    DO NOT focus on the semantics between the expected and predicted answers.
+    IMPORANT: Compare only numbers and facts.
+    If the units are different, normalize them before comparing. E.g., 1 billion = 1000 million."""
 
 
 def evaluate_factual_correctness(question: str, expected_ans: str, generated_ans: str) -> Dict[str, str]:
@@ -19,19 +27,9 @@ def evaluate_factual_correctness(question: str, expected_ans: str, generated_ans
         A dictionary containing the classification ("correct", "partially correct", or "incorrect") and the rationale.
     """
 
-    task = """Given the question, expected and generated answers as shown below, compare the answers and classify them into one of the three classes - `correct`, `partially correct`, or `incorrect`. 
-    If the answer is partially correct or incorrect, provide the rationale. 
-    The output should be two things - class and rationale as a Python dictionary. 
-    For class, it should be one word ONLY (which is the expected class), and for rationale, provide the reason succinctly, especially ONLY focusing on numbers and facts.
-    DO NOT focus on the semantics between the expected and predicted answers.
-    IMPORANT: Compare only numbers and facts.
-    If the units are different, normalize them before comparing. E.g., 1 billion = 1000 million."""
-
     try:
-        response = llm.compare(task, question, expected_ans, generated_ans)
-        if not isinstance(response, dict) or "class" not in response or "rationale" not in response:
-            raise ValueError("Invalid response format from LLM")
-
+        response = llm.compare(FACTUAL_CORRECTNESS_TASK, question, expected_ans, generated_ans)
+        response = _check_response(response)
         logger.info("Factual correctness evaluation completed successfully.")
         return response
 
@@ -40,6 +38,34 @@ def evaluate_factual_correctness(question: str, expected_ans: str, generated_ans
         return {"class": "wrong", "rationale": "Error during evaluation"}
 
 
+def _check_response(response: Dict[str, str]) -> Dict[str, str]:
+    if not isinstance(response, dict) or "class" not in response or "rationale" not in response:
+        raise ValueError("Invalid response format from LLM")
+    return response
+
+
+def evaluate_factual_correctness_batch(items: List[Tuple[str, str, str]]) -> List[Dict[str, str]]:
+    """
+    Evaluates many (question, expected answer, generated answer) triples concurrently with `LLM.compare_batch`.
+
+    Args:
+        items: The (question, expected_ans, generated_ans) triples.
+
+    Returns:
+        The evaluations, in the same order as `items`. An item that fails gets the "wrong" class.
+    """
+    responses = llm.compare_batch([(FACTUAL_CORRECTNESS_TASK, question, expected_ans, generated_ans)
+                                   for question, expected_ans, generated_ans in items])
+    results = []
+    for response in responses:
+        try:
+            results.append(_check_response(response))
+        except Exception as e:
+            logger.error(f"Error in evaluate_factual_correctness_batch: {e}")
+            results.append({"class": "wrong", "rationale": "Error during evaluation"})
+    return results
+
+
 if __name__ == '__main__':
     question = "What was the operating income or loss (in billions) for Google Cloud for Q1 of 2021 compared to the previous year?"
     expected_ans = "In Q1 of 2021, Google Cloud's operating loss was $974 million. In Q1 of 2020, Google Cloud had an operating loss of $1.73 billion."
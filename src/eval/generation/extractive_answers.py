@@ -1,21 +1,26 @@
 from src.search.doc_search_extractive_answers import get_top_extractive_answers
 from src.eval.factual_correctness import evaluate_factual_correctness
 from src.eval.semantic_similarity import calculate_cosine_similarity
-from src.utils.validate import extract_and_validate_entities
 from src.eval.utils import save_generation_eval_results
 from src.eval.semantic_similarity import embed_text
-from src.search.utils import filtered_search
+from src.search.pipeline import pipelined_filtered_search
+from src.search.pipeline import query_pipeline
+from src.search.routing import search_router
 from src.eval.utils import compute_accuracy
+from src.generate.qa import build_answer_prompt
+from src.generate.context import prompt_token_log
+from src.generate.context import count_tokens
 from src.generate.qa import generate_answer
+from src.search.client import client_registry
+from src.generate.cache import completion_cache
+from src.generate.repair import judgement_repair
 from src.config.logging import logger
+from src.search.utils import LOCATION
 from src.eval.utils import load_data
 from tqdm import tqdm
 import pandas as pd
-import time
 
 
-REQUEST_INTERVAL = 5  # 5 seconds 
-
 def evaluate_summarized_answer(data: pd.DataFrame, data_store_id: str) -> pd.DataFrame:
     """
     Evaluate answers by comparing predicted to expected using semantic similarity and factual correctness.
@@ -26,9 +31,8 @@ def evaluate_summarized_answer(data: pd.DataFrame, data_store_id: str) -> pd.Dat
         expected_answer = row['answer']
         
         try:
-            company, time_period = extract_and_validate_entities(question)
-            search_results = filtered_search(question, company, time_period, data_store_id)
-            extractive_answers = get_top_extractive_answers(search_results, 1)
+            search_results, timings = pipelined_filtered_search(question, data_store_id, profile="extractive_answers")
+            extractive_answers = get_top_extractive_answers(search_results, 1, question)
             generated_answer = generate_answer(question, extractive_answers)
             similarity = calculate_cosine_similarity(embed_text([expected_answer])[0], embed_text([generated_answer])[0])
             factual_evaluation = evaluate_factual_correctness(question, expected_answer, generated_answer)
@@ -37,12 +41,15 @@ def evaluate_summarized_answer(data: pd.DataFrame, data_store_id: str) -> pd.Dat
                 'question': question,
                 'expected_answer': expected_answer,
                 'predicted_answer': generated_answer,
+                'prompt_tokens': count_tokens(build_answer_prompt(question, extractive_answers)),
                 'semantic_similarity': similarity,
                 'class': factual_evaluation['class'],
-                'rationale': factual_evaluation['rationale']
+                'rationale': factual_evaluation['rationale'],
+                'search_outcome': timings['outcome'],
+                'latency_seconds': timings['total_seconds'],
+                'latency_savings_seconds': timings['savings_seconds']
             }
             results.append(result)
-            time.sleep(REQUEST_INTERVAL)
         except Exception as e:
             logger.error(f"Error processing question {question}: {e}")
             continue
@@ -59,6 +66,7 @@ def run():
     data_store_id = "quarterly-reports"
 
     try:
+        client_registry.warm_up([LOCATION])
         data = load_data(input_file)
         eval_results = evaluate_summarized_answer(data, data_store_id)
         save_generation_eval_results(eval_results, output_file)
@@ -68,6 +76,11 @@ def run():
             f.write(f'Accuracy: {accuracy:.2f}\n')
             for cls, perc in breakdown.items():
                 f.write(f'{cls}: {perc:.2%}\n')
+        logger.info(f"Search routing: {search_router.get_stats()}")
+        logger.info(f"Query pipeline: {query_pipeline.get_stats()}")
+        logger.info(f"Completion cache: {completion_cache.get_stats()}")
+        logger.info(f"Prompt tokens: {prompt_token_log.get_stats()}")
+        logger.info(f"Judge output repair: {judgement_repair.get_stats()}")
         logger.info("Evaluation completed successfully.")
     except Exception as e:
         logger.error(f"An error occurred in the main function: {e}")
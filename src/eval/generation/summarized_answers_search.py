@@ -5,15 +5,16 @@ from src.eval.utils import save_generation_eval_results
 from src.search.doc_search import get_summarized_answer
 from src.eval.semantic_similarity import embed_text
 from src.eval.utils import compute_accuracy
+from src.search.client import client_registry
+from src.generate.cache import completion_cache
+from src.generate.repair import judgement_repair
 from src.config.logging import logger
+from src.search.utils import LOCATION
 from src.eval.utils import load_data
 from tqdm import tqdm
 import pandas as pd
-import time
 
 
-REQUEST_INTERVAL = 3  # 3 seconds 
-
 def evaluate_summarized_answer(data: pd.DataFrame, data_store_id: str) -> pd.DataFrame:
     """
     Evaluate answers by comparing predicted to expected using semantic similarity and factual correctness.
@@ -37,7 +38,6 @@ def evaluate_summarized_answer(data: pd.DataFrame, data_store_id: str) -> pd.Dat
                 'rationale': factual_evaluation['rationale']
             }
             results.append(result)
-            time.sleep(REQUEST_INTERVAL)
         except Exception as e:
             logger.error(f"Error processing question {question}: {e}")
             continue
@@ -54,6 +54,7 @@ def run():
     data_store_id = "quarterly-reports"
 
     try:
+        client_registry.warm_up([LOCATION])
         data = load_data(input_file)
         eval_results = evaluate_summarized_answer(data, data_store_id)
         save_generation_eval_results(eval_results, output_file)
@@ -63,6 +64,8 @@ def run():
             f.write(f'Accuracy: {accuracy:.2f}\n')
             for cls, perc in breakdown.items():
                 f.write(f'{cls}: {perc:.2%}\n')
+        logger.info(f"Completion cache: {completion_cache.get_stats()}")
+        logger.info(f"Judge output repair: {judgement_repair.get_stats()}")
         logger.info("Evaluation completed successfully.")
     except Exception as e:
         logger.error(f"An error occurred in the main function: {e}")
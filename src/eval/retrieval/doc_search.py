@@ -1,12 +1,12 @@
 from src.eval.utils import save_retrieval_eval_results
+from src.search.client import client_registry
 from src.config.logging import logger
+from src.search.utils import LOCATION
 from src.eval.utils import load_data
-from src.search.utils import search
+from src.search.utils import search_many
 from typing import Tuple
 from typing import List
-from tqdm import tqdm
 import pandas as pd
-import time
 
 
 def evaluate_document_search(data: pd.DataFrame, data_store_id: str) -> List[Tuple[str, str, str, str, List[str]]]:
@@ -20,18 +20,18 @@ def evaluate_document_search(data: pd.DataFrame, data_store_id: str) -> List[Tup
     Returns:
     List[Tuple[str, str, str, str, List[str]]]: A list of tuples containing the evaluation results.
     """
+    results = search_many(data['question'].tolist(), None, data_store_id, profile="retrieval_only")
+
     eval_results = []
-    for _, row in tqdm(data.iterrows(), total=data.shape[0], desc="Evaluating document search"): 
+    for (_, row), result in zip(data.iterrows(), results):
         question = row['question']
         expected_ans = row['answer']
         expected_doc = row['document']
         try:
-            results = search(question, data_store_id)
-            summarized_ans = results['summarized_answer']
-            match_info = results['match_info']
+            summarized_ans = result['summarized_answer']
+            match_info = result['match_info']
             matched_docs = [f"{info['company']}-{info['time_period'].lower()}" for info in match_info]
             eval_results.append((question, expected_ans, summarized_ans, expected_doc, matched_docs))
-            time.sleep(3)
         except Exception as e:
             logger.error(f"Error processing question '{question}': {e}")
             eval_results.append((question, expected_ans, "Error in processing", expected_doc, []))
@@ -43,6 +43,7 @@ def run():
     file_path = './data/eval/ground_truth.csv'
     output_file = './data/eval/retrieval/doc_search_results.csv'
     
+    client_registry.warm_up([LOCATION])
     data = load_data(file_path)
     eval_results = evaluate_document_search(data, data_store_id)
     save_retrieval_eval_results(eval_results, output_file)
@@ -1,15 +1,18 @@
-from src.search.doc_search_with_filters import filtered_search
 from src.eval.utils import save_retrieval_eval_results
+from src.search.utils import build_filter_str
 from src.utils.validate import validate_time_period
 from src.utils.validate import validate_company
+from src.generate.entity_rules import entity_rules
 from src.generate.ner import extract_entities
+from src.search.client import client_registry
 from src.config.logging import logger
+from src.search.utils import LOCATION
 from src.eval.utils import load_data
+from src.search.utils import search_many
 from typing import Tuple
 from typing import List
 from tqdm import tqdm
 import pandas as pd
-import time 
 
 
 def evaluate_document_search(data: pd.DataFrame, data_store_id: str) -> List[Tuple[str, str, str, str, List[str]]]:
@@ -23,22 +26,26 @@ def evaluate_document_search(data: pd.DataFrame, data_store_id: str) -> List[Tup
     Returns:
     List[Tuple[str, str, str, str, List[str]]]: A list of tuples containing the evaluation results.
     """
-    eval_results = []
-    for _, row in tqdm(data.iterrows(), total=data.shape[0], desc="Evaluating document search"): 
-        question = row['question']
-        expected_ans = row['answer']
-        expected_doc = row['document']
-        entities = extract_entities(question)
+    filters = []
+    for _, row in tqdm(data.iterrows(), total=data.shape[0], desc="Extracting entities"): 
+        entities = extract_entities(row['question'])
         company = entities['company']
-        company = company.strip().lower()
         time_period = entities['time_period']
         company = validate_company(company)
         time_period = validate_time_period(time_period)
-        
+        filters.append(build_filter_str(company, time_period))
+    logger.info(f"Rule-based entity extraction: {entity_rules.get_stats()}")
+
+    results = search_many(data['question'].tolist(), filters, data_store_id, profile="retrieval_only")
+
+    eval_results = []
+    for (_, row), result in zip(data.iterrows(), results):
+        question = row['question']
+        expected_ans = row['answer']
+        expected_doc = row['document']
         try:
-            results = filtered_search(question, company, time_period, data_store_id)
-            summarized_ans = results['summarized_answer']
-            match_info = results['match_info']
+            summarized_ans = result['summarized_answer']
+            match_info = result['match_info']
             matched_docs = []
             for info in match_info:
                 company = info['company']
@@ -47,7 +54,6 @@ def evaluate_document_search(data: pd.DataFrame, data_store_id: str) -> List[Tup
                 matched_doc = f'{company}-{time_period}'
                 matched_docs.append(matched_doc)
             eval_results.append((question, expected_ans, summarized_ans, expected_doc, matched_docs))
-            time.sleep(3)
         except Exception as e:
             logger.error(f"Error processing question '{question}': {e}")
             eval_results.append((question, expected_ans, "Error in processing", expected_doc, []))
@@ -59,6 +65,7 @@ def run():
     file_path = './data/eval/ground_truth.csv'
     output_file = './data/eval/retrieval/doc_search_with_filters_results.csv'
     
+    client_registry.warm_up([LOCATION])
     data = load_data(file_path)
     eval_results = evaluate_document_search(data, data_store_id)
     save_retrieval_eval_results(eval_results, output_file)
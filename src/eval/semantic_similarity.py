@@ -1,14 +1,11 @@
-from vertexai.language_models import TextEmbeddingModel, TextEmbeddingInput
-from sklearn.metrics.pairwise import cosine_similarity
+from src.generate.provider import model_provider
+from src.utils.rate_limit import get_rate_limiter
 from src.config.logging import logger
 from src.config.setup import config
 from typing import List
 import numpy as np
 
 
-model = TextEmbeddingModel.from_pretrained(config.TEXT_EMBED_MODEL_NAME)
-
-
 def embed_text(texts: List[str], task: str = "SEMANTIC_SIMILARITY") -> List[np.ndarray]:
     """Embeds texts using a pre-trained foundation model.
 
@@ -20,8 +17,12 @@ def embed_text(texts: List[str], task: str = "SEMANTIC_SIMILARITY") -> List[np.n
         A list of numpy arrays, where each array represents the embedding for a text.
     """
     try:
+        from vertexai.language_models import TextEmbeddingInput
         inputs = [TextEmbeddingInput(text, task) for text in texts]
-        embeddings = model.get_embeddings(inputs)
+        model = model_provider.get_embedding_model(config.TEXT_EMBED_MODEL_NAME)
+        if model is None:
+            raise RuntimeError(f"Embedding model {config.TEXT_EMBED_MODEL_NAME} is not available.")
+        embeddings = get_rate_limiter("embedding").call(lambda: model.get_embeddings(inputs))
         return [embedding.values for embedding in embeddings]
     except Exception as e:
         logger.error(f"Error embedding text: {e}")
@@ -39,7 +40,9 @@ def calculate_cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
         The cosine similarity between the two vectors.
     """
     try:
-        return round(cosine_similarity([vec1], [vec2])[0][0], 4)  # Directly compute without extra conversion
+        vec1, vec2 = np.asarray(vec1, dtype=float), np.asarray(vec2, dtype=float)
+        norm = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+        return round(float(np.dot(vec1, vec2) / norm), 4) if norm else 0.0
     except Exception as e:
         logger.error(f"Error calculating cosine similarity: {e}")
         raise  # Ensure error propagation
@@ -0,0 +1,164 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import TYPE_CHECKING
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+
+class CompletionCache:
+    """
+    A content-addressed sqlite cache of LLM completions.
+
+    The chat model is deterministic (temperature 0, top_k 1, top_p 0), so a completion is fully
+    determined by the model name, the generation parameters and the rendered prompt; these form
+    the key. Entries do not expire. When the total size of the cached completions exceeds
+    `max_bytes`, the least recently used ones are evicted.
+
+    Attributes:
+        enabled (bool): Whether lookups and stores are performed at all.
+        max_bytes (int): Maximum total size of the cached completions.
+        stats (Dict[str, int]): Hit, miss, store and eviction counters.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int, enabled: bool = True) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            db_path (str): Path of the sqlite file.
+            max_bytes (int): Maximum total size of the cached completions.
+            enabled (bool): Whether lookups and stores are performed at all.
+        """
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if enabled else None
+        self.enabled = self._db is not None
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0] if self._db else 0
+
+    @staticmethod
+    def _open_db(db_path: str) -> Optional[sqlite3.Connection]:
+        """
+        Opens (and creates if needed) the sqlite file.
+
+        Args:
+            db_path (str): Path of the sqlite file.
+
+        Returns:
+            Optional[sqlite3.Connection]: The connection, or None if the file could not be opened.
+        """
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, model TEXT, size INTEGER, last_used REAL, value TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+            return db
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open completion cache at {db_path}, caching disabled: {e}")
+            return None
+
+    @staticmethod
+    def make_key(model_name: str, params: Dict[str, Any], messages: List["BaseMessage"]) -> str:
+        """
+        Builds the cache key for a completion.
+
+        Args:
+            model_name (str): Name of the chat model.
+            params (Dict[str, Any]): Generation parameters of the model.
+            messages (List[BaseMessage]): The rendered prompt.
+
+        Returns:
+            str: The cache key.
+        """
+        rendered = [[message.type, message.content] for message in messages]
+        raw = json.dumps([model_name, params, rendered], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a cached completion.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The completion, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, model_name: str, completion: str) -> None:
+        """
+        Stores a completion, evicting the least recently used ones beyond `max_bytes`.
+
+        Args:
+            key (str): The cache key.
+            model_name (str): Name of the chat model.
+            completion (str): The completion.
+        """
+        if not self.enabled:
+            return
+        size = len(completion.encode("utf-8"))
+        with self._lock:
+            row = self._db.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)", (key, model_name, size, time.time(), completion))
+            self._size += size - (row[0] if row else 0)
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM completions ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                if self._size <= self.max_bytes:
+                    return
+                self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._size -= size
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters along with the current size and hit rate.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["bytes"] = self._size
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0] if self._db else 0
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+completion_cache = CompletionCache(
+    enabled=config.COMPLETION_CACHE['enabled'],
+    db_path=config.COMPLETION_CACHE['db_path'],
+    max_bytes=config.COMPLETION_CACHE['max_bytes'],
+)
@@ -0,0 +1,229 @@
+from src.utils.text import tokenize
+from src.config.setup import config
+from collections import deque
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import threading
+import re
+
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximates the number of model tokens in a text, offline.
+
+    Punctuation marks count as one token each and words as one token per four characters, which
+    tracks SentencePiece tokenizers closely on English financial text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Splits a passage into sentences at terminal punctuation followed by whitespace.
+
+    Args:
+        text (str): The passage.
+
+    Returns:
+        List[str]: The sentences, without the separating whitespace.
+    """
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keeps the leading sentences of a passage that fit in a token budget.
+
+    Args:
+        text (str): The passage.
+        max_tokens (int): The token budget.
+
+    Returns:
+        str: The truncated passage; empty if not even the first sentence fits.
+    """
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept)
+
+
+def assemble_context(match_info: List[Dict[str, Any]], field: str, max_documents: int, max_tokens: int,
+                     query: Optional[str] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Packs the most valuable passages of the top documents into a context of at most `max_tokens` tokens.
+
+    Passages are valued by the share of query terms they contain (when a query is given), then by
+    the rank of their document and their position within it, i.e. the order Vertex AI Search
+    returned them in. They are added greedily; the first passage that does not fit is truncated
+    at a sentence boundary and packing stops (a passage whose first sentence does not fit is
+    skipped instead). The selected passages are laid out per document,
+    in their original order, each document followed by its `Ref:[source]`.
+
+    Args:
+        match_info (List[Dict[str, Any]]): The `match_info` of a consolidated search result.
+        field (str): "extractive_answers" or "extractive_segments".
+        max_documents (int): Number of top documents to draw passages from.
+        max_tokens (int): The token budget of the context.
+        query (Optional[str]): The user query, used to value passages.
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The context, and its token count along with the number of
+        candidate, packed, truncated and dropped passages and of documents left out entirely.
+    """
+    # Deferred: src.search.utils pulls in the Discovery Engine client, which packing does not need
+    from src.search.utils import extract_filename
+
+    documents = match_info[:max_documents]
+    terms = set(tokenize(query)) if query else set()
+    references = [f" Ref:[{extract_filename(info['link'])}]" for info in documents]
+
+    candidates = []
+    for doc_index, info in enumerate(documents):
+        for position, passage in enumerate(info.get(field) or []):
+            coverage = len(terms.intersection(tokenize(passage))) / len(terms) if terms else 0.0
+            candidates.append((-coverage, doc_index, position, passage))
+    candidates.sort(key=lambda candidate: candidate[:3])
+
+    selected: Dict[int, Dict[int, str]] = {}
+    used = truncated = 0
+    for _, doc_index, position, passage in candidates:
+        # A document's reference and the blank lines separating passages count against the budget
+        overhead = 1 if doc_index in selected else count_tokens(references[doc_index]) + 1
+        remaining = max_tokens - used - overhead
+        tokens = count_tokens(passage)
+        if tokens > remaining:
+            passage = truncate_to_tokens(passage, remaining)
+            if not passage:
+                continue
+            selected.setdefault(doc_index, {})[position] = passage
+            used += overhead + count_tokens(passage)
+            truncated += 1
+            break
+        selected.setdefault(doc_index, {})[position] = passage
+        used += overhead + tokens
+
+    blocks = ['\n\n'.join(passages[position] for position in sorted(passages)) + references[doc_index]
+              for doc_index, passages in sorted(selected.items())]
+    context = '\n\n'.join(blocks)
+    packed = sum(len(passages) for passages in selected.values())
+    # Documents with passages of which none fit lose their reference along with them
+    dropped_documents = len({doc_index for _, doc_index, _, _ in candidates} - set(selected))
+    stats = {
+        "context_tokens": count_tokens(context),
+        "candidates": len(candidates),
+        "packed": packed,
+        "truncated": truncated,
+        "dropped": len(candidates) - packed,
+        "dropped_documents": dropped_documents,
+    }
+    return context, stats
+
+
+class PromptTokenLog:
+    """
+    Keeps the context and prompt token counts of recent requests.
+
+    Attributes:
+        stats (Dict[str, int]): Request, truncation, dropped passage and dropped document counters.
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        """
+        Initializes empty windows.
+
+        Args:
+            window (int): Number of recent requests kept.
+        """
+        self.stats = {"contexts": 0, "prompts": 0, "truncated_passages": 0, "dropped_passages": 0,
+                      "dropped_documents": 0}
+        self._context_tokens = deque(maxlen=window)
+        self._prompt_tokens = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_context(self, stats: Dict[str, int]) -> None:
+        """
+        Records the statistics of an assembled context (see `assemble_context`).
+        """
+        with self._lock:
+            self.stats["contexts"] += 1
+            self.stats["truncated_passages"] += stats["truncated"]
+            self.stats["dropped_passages"] += stats["dropped"]
+            self.stats["dropped_documents"] += stats["dropped_documents"]
+            self._context_tokens.append(stats["context_tokens"])
+
+    def record_prompt(self, tokens: int) -> None:
+        """
+        Records the token count of a prompt sent to the model.
+        """
+        with self._lock:
+            self.stats["prompts"] += 1
+            self._prompt_tokens.append(tokens)
+
+    @staticmethod
+    def _summarize(values: List[int]) -> Dict[str, float]:
+        if not values:
+            return {}
+        array = np.asarray(values, dtype=np.float64)
+        return {
+            "p50": float(np.percentile(array, 50)),
+            "p95": float(np.percentile(array, 95)),
+            "max": float(array.max()),
+            "mean": round(float(array.mean()), 1),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the distribution of context and prompt token counts.
+
+        Returns:
+            Dict[str, Any]: The token statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            context_tokens, prompt_tokens = list(self._context_tokens), list(self._prompt_tokens)
+        stats["context_tokens"] = self._summarize(context_tokens)
+        stats["prompt_tokens"] = self._summarize(prompt_tokens)
+        return stats
+
+
+prompt_token_log = PromptTokenLog()
+
+
+def build_context(results: Dict[str, Any], field: str, n: int, query: Optional[str] = None,
+                  max_tokens: Optional[int] = None) -> str:
+    """
+    Assembles the context of a consolidated search result under the configured token budget and records its size.
+
+    Args:
+        results (Dict[str, Any]): The consolidated search result.
+        field (str): "extractive_answers" or "extractive_segments".
+        n (int): Number of top documents to draw passages from.
+        query (Optional[str]): The user query, used to value passages.
+        max_tokens (Optional[int]): The token budget. Defaults to `context.max_tokens`.
+
+    Returns:
+        str: The context.
+    """
+    if max_tokens is None:
+        max_tokens = config.CONTEXT['max_tokens']
+    context, stats = assemble_context(results.get('match_info', []), field, n, max_tokens, query)
+    prompt_token_log.record_context(stats)
+    return context
@@ -0,0 +1,179 @@
+from src.config.logging import logger
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+import threading
+import re
+
+
+# Each company with the subsidiaries, products and segments its reports are queried by
+COMPANY_ALIASES: Dict[str, List[str]] = {
+    "Alphabet": ["alphabet", "google", "google cloud", "youtube", "waymo", "other bets", "android", "pixel"],
+    "Microsoft": ["microsoft", "linkedin", "xbox", "azure", "github", "bing", "dynamics 365", "microsoft 365",
+                  "office 365", "office commercial", "office consumer", "intelligent cloud", "windows"],
+    "Amazon": ["amazon", "aws", "prime video", "prime membership", "prime members", "whole foods", "twitch",
+               "mgm", "alexa", "kindle"],
+}
+
+# Companies whose fiscal year does not follow the calendar year, with the month their fiscal year starts in
+FISCAL_YEAR_START_MONTH = {"Microsoft": 7}
+
+_ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4}
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_YEAR = r"(20\d\d)"
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+
+# The period grammar: "Q1 2021", "Q1 of 2021", "first quarter of 2021", "third quarter of fiscal
+# year 2021", "March 31, 2022", "end of Mar 2021". A date stands for the quarter containing it.
+_QUARTER = re.compile(rf"\bq([1-4])(?:\s+of)?\s+{_YEAR}\b")
+_ORDINAL_QUARTER = re.compile(rf"\b(first|second|third|fourth)\s+quarter\s+(?:of\s+)?(fiscal\s+(?:year\s+)?|fy\s*)?{_YEAR}\b")
+_DATE = re.compile(rf"\b{_MONTH}\.?(?:\s+\d{{1,2}})?,?\s+{_YEAR}\b")
+
+
+def _compile_aliases(aliases: Dict[str, List[str]]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """
+    Compiles the aliases into one alternation, longest first, so that the regex engine scans a
+    query once and prefers "google cloud" over "google".
+    """
+    canonical = {alias: company for company, names in aliases.items() for alias in names}
+    alternation = "|".join(re.escape(alias) for alias in sorted(canonical, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})(?:'s)?\b"), canonical
+
+
+def fiscal_to_calendar(company: Optional[str], quarter: int, year: int) -> Tuple[int, int]:
+    """
+    Converts a fiscal quarter of a company into the calendar quarter its report is filed under.
+
+    Args:
+        company (Optional[str]): The canonical company name, if known.
+        quarter (int): The fiscal quarter.
+        year (int): The fiscal year.
+
+    Returns:
+        Tuple[int, int]: The calendar quarter and year.
+    """
+    start_month = FISCAL_YEAR_START_MONTH.get(company, 1)
+    # Fiscal year Y starts in `start_month` of calendar year Y - 1 when it does not start in January
+    months = (start_month - 1) + (quarter - 1) * 3 - (12 if start_month > 1 else 0)
+    return months % 12 // 3 + 1, year + months // 12
+
+
+class RuleBasedEntityExtractor:
+    """
+    Extracts the company and the time period of a query with an alias automaton and a period
+    grammar, without calling the LLM.
+
+    A company is resolved when every alias found in the query maps to the same company. A time
+    period is resolved when the query mentions at least one quarter, ordinal quarter or date with
+    a year. When it mentions several, e.g. when comparing the present to the past, the latest is
+    taken, which is the report that discusses both. An entity that cannot be resolved is None,
+    and the caller falls back to the LLM for it.
+
+    Attributes:
+        stats (Dict[str, int]): Per entity, the number of queries resolved and left unresolved, and
+            the number of LLM calls that asked for it.
+    """
+
+    def __init__(self, aliases: Dict[str, List[str]] = COMPANY_ALIASES) -> None:
+        """
+        Initializes the extractor.
+
+        Args:
+            aliases (Dict[str, List[str]]): The aliases of each company.
+        """
+        self._aliases, self._canonical = _compile_aliases(aliases)
+        self.stats = {"company_resolved": 0, "company_unresolved": 0,
+                      "time_period_resolved": 0, "time_period_unresolved": 0,
+                      "company_llm_calls": 0, "time_period_llm_calls": 0}
+        self._lock = threading.Lock()
+
+    def extract_company(self, query: str) -> Optional[str]:
+        """
+        Finds the company of a query.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Optional[str]: The canonical company name, or None if no or several companies are mentioned.
+        """
+        companies = {self._canonical[match.group(0).lower().removesuffix("'s")]
+                     for match in self._aliases.finditer(query.lower().replace("’", "'"))}
+        return companies.pop() if len(companies) == 1 else None
+
+    def extract_time_period(self, query: str, company: Optional[str] = None) -> Optional[str]:
+        """
+        Finds the time period of a query, as a calendar quarter.
+
+        Args:
+            query (str): The user query.
+            company (Optional[str]): The canonical company name, used to convert fiscal quarters.
+
+        Returns:
+            Optional[str]: The time period, e.g. "Q1 2021", or None if the query mentions none.
+        """
+        text = query.lower()
+        periods = [(int(year), int(quarter)) for quarter, year in _QUARTER.findall(text)]
+        for ordinal, fiscal, year in _ORDINAL_QUARTER.findall(text):
+            quarter = _ORDINALS[ordinal]
+            if fiscal:
+                quarter, calendar_year = fiscal_to_calendar(company, quarter, int(year))
+                periods.append((calendar_year, quarter))
+            else:
+                periods.append((int(year), quarter))
+        for month, year in _DATE.findall(text):
+            periods.append((int(year), (_MONTHS[month[:3]] - 1) // 3 + 1))
+        if not periods:
+            return None
+        year, quarter = max(periods)
+        return f"Q{quarter} {year}"
+
+    def extract(self, query: str) -> Dict[str, Optional[str]]:
+        """
+        Extracts the company and the time period of a query.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Dict[str, Optional[str]]: The `company` and `time_period`, each None if unresolved.
+        """
+        company = self.extract_company(query)
+        time_period = self.extract_time_period(query, company)
+        with self._lock:
+            self.stats["company_resolved" if company else "company_unresolved"] += 1
+            self.stats["time_period_resolved" if time_period else "time_period_unresolved"] += 1
+        logger.debug(f"Rule-based entities for '{query}': company={company}, time_period={time_period}")
+        return {"company": company, "time_period": time_period}
+
+    def record_fallback(self, entity: str) -> None:
+        """
+        Counts an LLM call that asks for an entity, either unresolved by the rules, invalid or refreshed.
+
+        Args:
+            entity (str): "company" or "time_period".
+        """
+        with self._lock:
+            self.stats[f"{entity}_llm_calls"] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Returns the counters along with the share of queries each entity was resolved for.
+
+        Returns:
+            Dict[str, float]: The extractor statistics.
+        """
+        with self._lock:
+            stats: Dict[str, float] = dict(self.stats)
+        for entity in ("company", "time_period"):
+            total = stats[f"{entity}_resolved"] + stats[f"{entity}_unresolved"]
+            stats[f"{entity}_coverage"] = round(stats[f"{entity}_resolved"] / total, 4) if total else 0.0
+        return stats
+
+
+entity_rules = RuleBasedEntityExtractor()
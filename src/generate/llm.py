@@ -1,85 +1,321 @@
-from langchain.prompts.chat import HumanMessagePromptTemplate
-from langchain.output_parsers import StructuredOutputParser
-from langchain_google_vertexai import HarmBlockThreshold 
-from langchain.prompts.chat import ChatPromptTemplate
-from langchain.output_parsers import ResponseSchema
-from langchain_google_vertexai import HarmCategory
-from langchain_google_vertexai import ChatVertexAI
-from langchain.prompts import PromptTemplate
+from src.generate.cache import completion_cache
+from src.generate.repair import judgement_repair
+from src.generate.provider import model_provider
+from src.utils.rate_limit import get_rate_limiter
+from src.utils.rate_limit import is_throttle_error
 from src.config.logging import logger
+from concurrent.futures import ThreadPoolExecutor
 from src.config.setup import config
+from typing import TYPE_CHECKING
+from typing import NamedTuple
 from typing import Optional
+from typing import Iterator
+from typing import Tuple
+from typing import List
+from typing import Dict
+from typing import Any
+import functools
+import asyncio
+import weakref
+import time
 
+if TYPE_CHECKING:
+    from langchain.output_parsers import StructuredOutputParser
+    from langchain_google_vertexai import ChatVertexAI
+    from langchain.prompts.chat import ChatPromptTemplate
+    from langchain_core.messages import BaseMessage
+    from langchain.prompts import PromptTemplate
 
-safety_settings = {
-    HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE
+
+# Deterministic decoding: identical prompts give identical completions, which makes them cacheable
+GENERATION_PARAMS = {
+    "temperature": 0.0,
+    "top_k": 1.0,
+    "top_p": 0.0,
+    "max_output_tokens": 4096,
 }
 
+
+@functools.lru_cache(maxsize=None)
+def get_safety_settings() -> Dict[Any, Any]:
+    """
+    Returns the safety settings of the chat model. LangChain's Vertex AI integration is imported on first use.
+    """
+    from langchain_google_vertexai import HarmBlockThreshold
+    from langchain_google_vertexai import HarmCategory
+    return {
+        HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE
+    }
+
+
+class Prompts(NamedTuple):
+    predict_template: "ChatPromptTemplate"
+    compare_parser: "StructuredOutputParser"
+    compare_template: "PromptTemplate"
+
+
+@functools.lru_cache(maxsize=None)
+def get_prompts() -> Prompts:
+    """
+    Compiles the prompt templates and the judge output parser once, on first use.
+
+    Returns:
+        Prompts: The predict template, the compare parser and the compare template.
+    """
+    from langchain.prompts.chat import HumanMessagePromptTemplate
+    from langchain.output_parsers import StructuredOutputParser
+    from langchain.prompts.chat import ChatPromptTemplate
+    from langchain.output_parsers import ResponseSchema
+    from langchain.prompts import PromptTemplate
+
+    predict_template = ChatPromptTemplate.from_messages([HumanMessagePromptTemplate.from_template("{task}\nQuery:\n{query}")])
+    compare_parser = StructuredOutputParser.from_response_schemas([
+        ResponseSchema(name="class", description="Whether the predicted answer is 'correct', 'incorrect' or 'partially correct."),
+        ResponseSchema(name="rationale", description="Explanation for why the answer is incorrect or partially correct, with specific details."),
+    ])
+    compare_template = PromptTemplate(
+        input_variables=["task", "expected_ans", "predicted_ans"],
+        template="""
+                Task: {task}
+
+                Question: {question}
+
+                Expected Answer: {expected_ans}
+
+                Predicted Answer: {predicted_ans}
+
+                Compare the predicted answer with the expected answer. Determine if the predicted answer is factually correct and satisfies the given question.
+
+                Provide your response in the following format:
+
+                {format_instructions}
+                """,
+        partial_variables={"format_instructions": compare_parser.get_format_instructions()},
+    )
+    return Prompts(predict_template, compare_parser, compare_template)
+
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Returns the semaphore bounding concurrent model calls on the running event loop.
+
+    The limit is `llm.max_concurrency` from the configuration.
+
+    Returns:
+        asyncio.Semaphore: The semaphore for the running loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.LLM['max_concurrency'])
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
 class LLM:
     """
     A class representing a Language Model using Vertex AI.
 
+    The chat model is built on first use and shared, through `model_provider`, with every other
+    LLM of the same model name, so constructing an LLM is free.
+
     Attributes:
+        model_name (str): Name of the chat model.
         model (ChatVertexAI): The chat model loaded from Vertex AI.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, model_name: Optional[str] = None) -> None:
+        """
+        Initializes the LLM class. The chat model is loaded on first use.
+
+        Args:
+            model_name (Optional[str]): Name of the chat model. Defaults to `text_gen_model_name`.
+        """
+        self.model_name = model_name or config.TEXT_GEN_MODEL_NAME
+        self._model: Optional["ChatVertexAI"] = None
+
+    @property
+    def model(self) -> Optional["ChatVertexAI"]:
+        """
+        The chat model, loaded on first access.
+        """
+        if self._model is None:
+            self._model = self._initialize_model()
+        return self._model
+
+    @model.setter
+    def model(self, model: Optional["ChatVertexAI"]) -> None:
+        self._model = model
+
+    def _initialize_model(self) -> Optional["ChatVertexAI"]:
         """
-        Initializes the LLM class by loading the chat model.
+        Loads the shared chat model from Vertex AI.
+
+        Returns:
+            ChatVertexAI: An instance of the Vertex AI chat model, or None if it could not be loaded.
         """
-        self.model = self._initialize_model()
+        model = model_provider.get_chat_model(
+            self.model_name,
+            **GENERATION_PARAMS,
+            verbose=True,
+            safety_settings=get_safety_settings())
+        if model is None:
+            logger.error("Failed to load the model.")
+            return None
+        logger.info("Chat model loaded successfully.")
+        return model
+
+    def _cache_key(self, messages: List["BaseMessage"], use_cache: bool) -> Optional[str]:
+        return completion_cache.make_key(self.model_name, GENERATION_PARAMS, messages) if use_cache else None
 
-    def _initialize_model(self) -> Optional[ChatVertexAI]:
+    def _invoke(self, messages: List["BaseMessage"], use_cache: bool = True, refresh: bool = False) -> str:
         """
-        Loads the chat model from Vertex AI.
+        Invokes the chat model under the Gemini rate limiter, going through the completion cache.
+
+        Args:
+            messages (List[BaseMessage]): The rendered prompt.
+            use_cache (bool): Whether to look up and store the completion in the cache.
+            refresh (bool): Skip the lookup but store the new completion, e.g. when the cached one was unusable.
+
+        Returns:
+            str: The completion.
+        """
+        key = self._cache_key(messages, use_cache)
+        if key is not None and not refresh:
+            cached = completion_cache.get(key)
+            if cached is not None:
+                return cached
+        response = get_rate_limiter("gemini").call(lambda: self.model.invoke(messages))
+        completion = response.content
+        if key is not None and completion:
+            completion_cache.put(key, self.model_name, completion)
+        return completion
+
+    async def _ainvoke(self, messages: List["BaseMessage"], use_cache: bool = True, refresh: bool = False) -> str:
+        """
+        Asynchronous counterpart of `_invoke`, bounded by `llm.max_concurrency` concurrent calls per event loop.
+        """
+        key = self._cache_key(messages, use_cache)
+        if key is not None and not refresh:
+            cached = completion_cache.get(key)
+            if cached is not None:
+                return cached
+        async with get_llm_semaphore():
+            response = await get_rate_limiter("gemini").acall(lambda: self.model.ainvoke(messages))
+        completion = response.content
+        if key is not None and completion:
+            completion_cache.put(key, self.model_name, completion)
+        return completion
+
+    def predict(self, task: str, query: str, use_cache: bool = True, refresh: bool = False) -> Optional[str]:
+        """
+        Generates a response for a given task and query using the chat model.
+
+        Args:
+            task (str): The task to be performed by the model.
+            query (str): The query or input text for the model.
+            use_cache (bool): Whether to serve and store the completion through the completion cache.
+            refresh (bool): Bypass the cached completion and replace it with a new one.
 
         Returns:
-            ChatVertexAI: An instance of the Vertex AI chat model.
+            Optional[str]: The model's response or None if an error occurred.
         """
         try:
-            model = ChatVertexAI(
-                model_name=config.TEXT_GEN_MODEL_NAME,
-                temperature=0.0,
-                top_k=1.0,
-                top_p=0.0,
-                max_output_tokens=4096,
-                verbose=True, 
-                safety_settings=safety_settings)
-            logger.info("Chat model loaded successfully.")
-            return model
+            prompt = get_prompts().predict_template.format_prompt(task=task, query=query).to_messages()
+            return self._invoke(prompt, use_cache, refresh)
         except Exception as e:
-            logger.error(f"Failed to load the model: {e}")
+            logger.error(f"Error during model prediction: {e}")
             return None
 
-    def predict(self, task: str, query: str) -> Optional[str]:
+    async def apredict(self, task: str, query: str, use_cache: bool = True, refresh: bool = False) -> Optional[str]:
         """
-        Generates a response for a given task and query using the chat model.
+        Asynchronous counterpart of `predict`.
 
         Args:
             task (str): The task to be performed by the model.
             query (str): The query or input text for the model.
+            use_cache (bool): Whether to serve and store the completion through the completion cache.
+            refresh (bool): Bypass the cached completion and replace it with a new one.
 
         Returns:
             Optional[str]: The model's response or None if an error occurred.
         """
         try:
-            human_template = "{task}\nQuery:\n{query}"
-            human_message = HumanMessagePromptTemplate.from_template(human_template)
-            chat_template = ChatPromptTemplate.from_messages([human_message])
-            prompt = chat_template.format_prompt(task=task, query=query).to_messages()
-            response = self.model.invoke(prompt)
-            completion = response.content
-            return completion
+            prompt = get_prompts().predict_template.format_prompt(task=task, query=query).to_messages()
+            return await self._ainvoke(prompt, use_cache, refresh)
         except Exception as e:
             logger.error(f"Error during model prediction: {e}")
             return None
-        
 
-    def compare(self, task: str, question: str, expected_ans: str, predicted_ans: str) -> dict:
+    def predict_stream(self, task: str, query: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Generates a response for a given task and query, yielding it in chunks as the model produces them.
+
+        A cached completion is yielded as a single chunk; a streamed one is stored in the cache once complete.
+
+        Args:
+            task (str): The task to be performed by the model.
+            query (str): The query or input text for the model.
+            use_cache (bool): Whether to serve and store the completion through the completion cache.
+
+        Yields:
+            str: The successive chunks of the response. Nothing more is yielded after an error.
+        """
+        try:
+            prompt = get_prompts().predict_template.format_prompt(task=task, query=query).to_messages()
+            key = self._cache_key(prompt, use_cache)
+            cached = completion_cache.get(key) if key is not None else None
+            if cached is not None:
+                yield cached
+                return
+
+            limiter = get_rate_limiter("gemini")
+            limiter.acquire()
+            chunks = []
+            try:
+                for chunk in self.model.stream(prompt):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield chunk.content
+            except Exception as e:
+                if is_throttle_error(e):
+                    limiter.record_throttle()
+                raise
+            limiter.record_success()
+            if key is not None and chunks:
+                completion_cache.put(key, self.model_name, "".join(chunks))
+        except Exception as e:
+            logger.error(f"Error during streaming model prediction: {e}")
+
+    def predict_batch(self, items: List[Tuple[str, str]], use_cache: bool = True) -> List[Optional[str]]:
+        """
+        Runs `predict` over many (task, query) pairs concurrently.
+
+        Concurrency is capped by `llm.max_concurrency` and the request rate by the shared Gemini
+        rate limiter. A failing item yields None without affecting the others.
+
+        Args:
+            items (List[Tuple[str, str]]): The (task, query) pairs.
+            use_cache (bool): Whether to serve and store the completions through the completion cache.
+
+        Returns:
+            List[Optional[str]]: The responses, in the same order as `items`.
+        """
+        with ThreadPoolExecutor(max_workers=config.LLM['max_concurrency']) as executor:
+            return list(executor.map(lambda item: self.predict(*item, use_cache=use_cache), items))
+
+    @staticmethod
+    def _compare_prompt(task: str, question: str, expected_ans: str, predicted_ans: str) -> List["BaseMessage"]:
+        return get_prompts().compare_template.format_prompt(task=task, question=question, expected_ans=expected_ans, predicted_ans=predicted_ans).to_messages()
+
+    def compare(self, task: str, question: str, expected_ans: str, predicted_ans: str, use_cache: bool = True) -> dict:
         """
         Compares an expected answer with a predicted answer for a given task, evaluating
         factual correctness and generating an explanation.
@@ -89,6 +325,7 @@ class LLM:
             question (str): Question in focus.
             expected_ans (str): The expected or reference answer.
             predicted_ans (str): The answer generated by the model.
+            use_cache (bool): Whether to serve and store the judgement through the completion cache.
 
         Returns:
             dict: A dictionary with the following fields:
@@ -96,42 +333,73 @@ class LLM:
                 * rationale (str): An explanation for the classification, highlighting 
                                 differences and potential factual inaccuracies.
         """
+        prompt_msg = self._compare_prompt(task, question, expected_ans, predicted_ans)
+        judgement_repair.start()
         attempt_count = 0
-        while attempt_count < 5:
+        while True:
             try:
-                # Initialize response schemas, prompt template, etc.
-                response_schemas = [
-                    ResponseSchema(name="class", description="Whether the predicted answer is 'correct', 'incorrect' or 'partially correct."),
-                    ResponseSchema(name="rationale", description="Explanation for why the answer is incorrect or partially correct, with specific details."),
-                ]
-                output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-                format_instructions = output_parser.get_format_instructions()
-                
-                template = """
-                Task: {task}
+                # A retry follows an unusable completion, which must not be served from the cache again
+                completion = self._invoke(prompt_msg, use_cache, refresh=attempt_count > 0)
+                result_dict = judgement_repair.parse(completion, get_prompts().compare_parser.parse)
+                if result_dict is not None:
+                    return result_dict
+            except Exception as e:
+                logger.error(f"Attempt {attempt_count + 1} failed with error: {e}")
+            delay = judgement_repair.retry_delay(attempt_count)
+            if delay is None:
+                break
+            time.sleep(delay)
+            attempt_count += 1
+        return {"class": "error", "rationale": f"Failed after {attempt_count + 1} attempts due to repeated errors."}
 
-                Question: {question}
+    async def acompare(self, task: str, question: str, expected_ans: str, predicted_ans: str, use_cache: bool = True) -> dict:
+        """
+        Asynchronous counterpart of `compare`.
 
-                Expected Answer: {expected_ans}
+        Args:
+            task (str): The task or context for the answers.
+            question (str): Question in focus.
+            expected_ans (str): The expected or reference answer.
+            predicted_ans (str): The answer generated by the model.
+            use_cache (bool): Whether to serve and store the judgement through the completion cache.
 
-                Predicted Answer: {predicted_ans}
+        Returns:
+            dict: A dictionary with the "class" and "rationale" fields (see `compare`).
+        """
+        prompt_msg = self._compare_prompt(task, question, expected_ans, predicted_ans)
+        judgement_repair.start()
+        attempt_count = 0
+        while True:
+            try:
+                completion = await self._ainvoke(prompt_msg, use_cache, refresh=attempt_count > 0)
+                result_dict = judgement_repair.parse(completion, get_prompts().compare_parser.parse)
+                if result_dict is not None:
+                    return result_dict
+            except Exception as e:
+                logger.error(f"Attempt {attempt_count + 1} failed with error: {e}")
+            delay = judgement_repair.retry_delay(attempt_count)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            attempt_count += 1
+        return {"class": "error", "rationale": f"Failed after {attempt_count + 1} attempts due to repeated errors."}
 
-                Compare the predicted answer with the expected answer. Determine if the predicted answer is factually correct and satisfies the given question.
+    def compare_batch(self, items: List[Tuple[str, str, str, str]], use_cache: bool = True) -> List[Dict[str, str]]:
+        """
+        Runs `compare` over many (task, question, expected answer, predicted answer) tuples concurrently.
 
-                Provide your response in the following format:
+        Concurrency is capped by `llm.max_concurrency` and the request rate by the shared Gemini
+        rate limiter. A failing item yields the "error" class without affecting the others.
 
-                {format_instructions}
-                """
-                prompt = PromptTemplate(
-                    input_variables=["task", "expected_ans", "predicted_ans"],
-                    template=template,
-                    partial_variables={"format_instructions": format_instructions},
-                )
-                prompt_msg = prompt.format_prompt(task=task, question=question, expected_ans=expected_ans, predicted_ans=predicted_ans).to_messages()
-                response = self.model.invoke(prompt_msg)
-                result_dict = output_parser.parse(response.content)
-                return result_dict  # Exit loop on successful execution
-            except Exception as e:
-                logger.error(f"Attempt {attempt_count + 1} failed with error: {e}")
-                attempt_count += 1  # Increment attempt count after failure
-        return {"class": "error", "rationale": "Failed after 5 attempts due to repeated errors."}
+        Args:
+            items (List[Tuple[str, str, str, str]]): The (task, question, expected_ans, predicted_ans) tuples.
+            use_cache (bool): Whether to serve and store the judgements through the completion cache.
+
+        Returns:
+            List[Dict[str, str]]: The judgements, in the same order as `items`.
+        """
+        with ThreadPoolExecutor(max_workers=config.LLM['max_concurrency']) as executor:
+            return list(executor.map(lambda item: self.compare(*item, use_cache=use_cache), items))
+
+
+llm = LLM()
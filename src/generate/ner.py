@@ -1,33 +1,21 @@
+from src.generate.entity_rules import entity_rules
+from src.generate.repair import repair_json
 from src.config.logging import logger
-from src.generate.llm import LLM
+from src.generate.llm import llm
+from src.config.setup import config
+from typing import Optional
+from typing import Sequence
 from typing import Dict
 
 
-llm = LLM()
-
-
-def extract_entities(query: str) -> Dict[str, str]:
-    """
-    Extract key entities from the given query.
-
-    Args:
-    query (str): The input query from which information is to be extracted.
-
-    Returns:
-    Dict[str, str]: A dictionary containing extracted entities like company and time period.
-    """
-    extracted_entities = {}
-    
-    def extract_entity(task: str, query: str) -> str:
-        return llm.predict(task=task, query=query)
-    prompt = """Given the query below, extract the company name from it.
+COMPANY_TASK = """Given the query below, extract the company name from it.
 The company name can be either `Microsoft`, `Alphabet`, or `Amazon`. 
 
 If company name is `LinkedIn`, translate to `Microsoft`. 
 IMPORTANT: The extracted company name must be a single word ONLY without any breaklines or punctuations or extra whitespaces.
 """
-    extracted_entities['company'] = extract_entity(prompt, query)
-    prompt = """Given a query, extract the specific time period from it. A valid time period should be in the form 'Q1 2021' only. 
+
+TIME_PERIOD_TASK = """Given a query, extract the specific time period from it. A valid time period should be in the form 'Q1 2021' only. 
 Examples of invalid formats include: 
 'Q2 2020 to Q2 2021'
 Q4 2021\nQ4 2022
@@ -58,12 +46,97 @@ Translate 'increase from December 31, 2022, to June 30, 2023?' to 'Q2 2023'.
 Translate 'during Q4 2023?' to 'Q4 2023'.
 Translate 'as of Q4 2023?' to 'Q4 2023'.
 Translate 'from 2020 to the end of Q4 2023?' to 'Q4 2023'."""
-    extracted_entities['time_period'] = extract_entity(prompt, query)
+
+ENTITY_TASKS = {"company": COMPANY_TASK, "time_period": TIME_PERIOD_TASK}
+
+ENTITY_FIELDS = ("company", "time_period")
+
+
+def build_extraction_task(fields: Sequence[str], rejected: Optional[Dict[str, str]] = None) -> str:
+    """
+    Builds the task that extracts several entities in one structured-output call.
+
+    Args:
+    fields (Sequence[str]): The entities to extract, among "company" and "time_period".
+    rejected (Optional[Dict[str, str]]): Previously extracted values that failed validation, per entity.
+
+    Returns:
+    str: The task.
+    """
+    keys = ", ".join(f'"{field}"' for field in fields)
+    sections = [f"Extract the following fields from the query and answer with a single JSON object with the keys {keys} only."]
+    sections += [f'Rules for "{field}":\n{ENTITY_TASKS[field]}' for field in fields]
+    for field, value in (rejected or {}).items():
+        sections.append(f'The value "{value}" previously extracted for "{field}" is not valid. Follow the rules for "{field}" strictly.')
+    return "\n\n".join(sections)
+
+
+def parse_extraction(completion: Optional[str], fields: Sequence[str]) -> Dict[str, Optional[str]]:
+    """
+    Reads the entities from the completion of an extraction task.
+
+    Args:
+    completion (Optional[str]): The completion.
+    fields (Sequence[str]): The requested entities.
+
+    Returns:
+    Dict[str, Optional[str]]: Each requested entity, None when missing from the completion.
+    """
+    parsed = repair_json(completion) if completion else None
+    if isinstance(parsed, dict):
+        values = {field: parsed.get(field) for field in fields}
+    elif completion and len(fields) == 1:
+        # A bare value answers a single-field request
+        values = {fields[0]: completion}
+    else:
+        values = {}
+    return {field: str(values[field]).strip() if values.get(field) else None for field in fields}
+
+
+def extract_fields(query: str, fields: Sequence[str], rejected: Optional[Dict[str, str]] = None,
+                   refresh: bool = False) -> Dict[str, Optional[str]]:
+    """
+    Extracts the given entities from a query with one LLM call.
+
+    Args:
+    query (str): The input query from which information is to be extracted.
+    fields (Sequence[str]): The entities to extract.
+    rejected (Optional[Dict[str, str]]): Previously extracted values that failed validation, per entity.
+    refresh (bool): Bypass the completion cache.
+
+    Returns:
+    Dict[str, Optional[str]]: Each requested entity, None when it could not be extracted.
+    """
+    for field in fields:
+        entity_rules.record_fallback(field)
+    completion = llm.predict(task=build_extraction_task(fields, rejected), query=query, refresh=refresh)
+    return parse_extraction(completion, fields)
+
+
+def extract_entities(query: str, refresh: bool = False) -> Dict[str, str]:
+    """
+    Extract key entities from the given query.
+
+    The company and time period are resolved by local rules when enabled, and the entities the
+    rules could not resolve are extracted together in a single LLM call. A refresh skips the
+    rules, since they are deterministic and would return the entities that failed validation again.
+
+    Args:
+    query (str): The input query from which information is to be extracted.
+    refresh (bool): Bypass the rules and the completion cache, e.g. when the extracted entities failed validation.
+
+    Returns:
+    Dict[str, str]: A dictionary containing extracted entities like company and time period.
+    """
+    use_rules = config.NER['rules_enabled'] and not refresh
+    extracted_entities = entity_rules.extract(query) if use_rules else {}
+    missing = [field for field in ENTITY_FIELDS if not extracted_entities.get(field)]
+    if missing:
+        extracted_entities.update(extract_fields(query, missing, refresh=refresh))
     logger.info(f'Query = {query}')
     logger.info(f'Extracted Entities: {extracted_entities}')
     return extracted_entities
 
-
 if __name__ == '__main__':
     query = "How many additional stocks did the Board of Directors of Alphabet authorize to repurchase in Q1 of 2021?"
     entities = extract_entities(query)
@@ -0,0 +1,128 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Callable
+from typing import Optional
+from typing import Hashable
+from typing import TypeVar
+from typing import Dict
+from typing import Any
+import threading
+import time
+
+
+T = TypeVar("T")
+
+
+class ModelProvider:
+    """
+    Builds models lazily, on first use, and shares one instance per key across the process.
+
+    Each key has its own lock, so concurrent first uses of a model build it once while other
+    models stay available. A factory that fails (raises or returns None) is not cached, and the
+    next use tries again.
+
+    Attributes:
+        stats (Dict[str, Any]): Build and reuse counters, and the build time of each model in seconds.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty provider.
+        """
+        self.stats: Dict[str, Any] = {"builds": 0, "reuses": 0, "failures": 0, "build_seconds": {}}
+        self._models: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Returns the model for a key, building it with `factory` on first use.
+
+        Args:
+            key (Hashable): Identifies the model, e.g. (kind, model name, parameters).
+            factory (Callable[[], Optional[T]]): Builds the model.
+
+        Returns:
+            Optional[T]: The shared model, or None if it could not be built.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            with self._lock:
+                self.stats["reuses"] += 1
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                # Built by another thread while this one waited
+                with self._lock:
+                    self.stats["reuses"] += 1
+                return model
+            start = time.perf_counter()
+            try:
+                model = factory()
+            except Exception as e:
+                logger.error(f"Failed to build model {key}: {e}")
+                model = None
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if model is None:
+                    self.stats["failures"] += 1
+                    return None
+                self._models[key] = model
+                self.stats["builds"] += 1
+                self.stats["build_seconds"][str(key)] = round(elapsed, 4)
+            logger.info(f"Built model {key} in {elapsed:.3f}s.")
+            return model
+
+    def get_chat_model(self, model_name: Optional[str] = None, **params: Any) -> Optional[Any]:
+        """
+        Returns the shared Vertex AI chat model for a model name and generation parameters.
+
+        Args:
+            model_name (Optional[str]): The model name. Defaults to `text_gen_model_name`.
+            **params (Any): Arguments of `ChatVertexAI`, e.g. the generation parameters and safety settings.
+
+        Returns:
+            Optional[ChatVertexAI]: The chat model, or None if it could not be built.
+        """
+        model_name = model_name or config.TEXT_GEN_MODEL_NAME
+
+        def build() -> Any:
+            from langchain_google_vertexai import ChatVertexAI
+            return ChatVertexAI(model_name=model_name, **params)
+
+        return self.get(("chat", model_name, repr(sorted(params.items()))), build)
+
+    def get_embedding_model(self, model_name: Optional[str] = None) -> Optional[Any]:
+        """
+        Returns the shared Vertex AI text embedding model.
+
+        Args:
+            model_name (Optional[str]): The model name. Defaults to `text_embed_model_name`.
+
+        Returns:
+            Optional[TextEmbeddingModel]: The embedding model, or None if it could not be built.
+        """
+        model_name = model_name or config.TEXT_EMBED_MODEL_NAME
+
+        def build() -> Any:
+            from vertexai.language_models import TextEmbeddingModel
+            return TextEmbeddingModel.from_pretrained(model_name)
+
+        return self.get(("embedding", model_name), build)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the build and reuse counters.
+
+        Returns:
+            Dict[str, Any]: The provider statistics.
+        """
+        with self._lock:
+            return {**self.stats, "build_seconds": dict(self.stats["build_seconds"])}
+
+
+model_provider = ModelProvider()
@@ -1,7 +1,25 @@
-from src.generate.llm import LLM
+from src.generate.context import prompt_token_log
+from src.generate.context import count_tokens
+from src.generate.llm import llm
+from typing import Iterator
 
 
-llm = LLM()
+def build_answer_prompt(question: str, context: str) -> str:
+    """
+    Builds the task prompt asking the LLM to answer a question from a context.
+
+    Args:
+    question (str): The question to answer.
+    context (str): The context that informs the answer.
+
+    Returns:
+    str: The prompt.
+    """
+    return f"""
+    Based on the following context, provide a clear and concise answer to the question below:
+    Context: {context}
+    Question: {question}
+    """
 
 
 def generate_answer(question: str, context: str) -> str:
@@ -15,13 +33,26 @@ def generate_answer(question: str, context: str) -> str:
     Returns:
     str: The predicted answer.
     """
-    prompt = f"""
-    Based on the following context, provide a clear and concise answer to the question below:
-    Context: {context}
-    Question: {question}
-    """
+    prompt = build_answer_prompt(question, context)
+    prompt_token_log.record_prompt(count_tokens(prompt))
     return llm.predict(task=prompt, query=question)
 
+
+def generate_answer_stream(question: str, context: str) -> Iterator[str]:
+    """
+    Streaming variant of `generate_answer`: yields the answer in chunks as the LLM produces them.
+
+    Args:
+    question (str): The question to answer.
+    context (str): The context that informs the answer.
+
+    Yields:
+    str: The successive chunks of the answer.
+    """
+    prompt = build_answer_prompt(question, context)
+    prompt_token_log.record_prompt(count_tokens(prompt))
+    yield from llm.predict_stream(task=prompt, query=question)
+
 if __name__ == '__main__':
     context = """We're very pleased with the ongoing momentum in Google Cloud, with revenues of $4.0 billion in the quarter reflecting strength and opportunity in both GCP and Workspace.” Q1 2021 financial highlights The following table summarizes our consolidated financial results for the quarters ended March 31, 2020 and 2021 (in millions, except for per share information and percentages; unaudited).
 Segment results The following table presents our revenues and operating income (loss) (in millions; unaudited): Quarter Ended March 31, 2020 2021 Revenues: Google Services $ 38198 $ 51178 Google Cloud 2777 4047 Other Bets 135 198 Hedging gains (losses) 49 (109) Total revenues $ 41159 $ 55314 Quarter Ended March 31, 2020 2021 Operating income (loss): Google Services $ 11548 $ 19546 Google Cloud (1730) (974) Other Bets (1121) (1145) Corporate costs, unallocated (720) (990) Total income from operations $ 7977 $ 16437 We report our segment results as Google Services, Google Cloud, and Other Bets: • Google Services includes products and services such as ads, Android, Chrome, hardware, Google Maps, Google Play, Search, and YouTube.
@@ -0,0 +1,198 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Callable
+from typing import Optional
+from typing import Dict
+from typing import Any
+import threading
+import random
+import json
+import ast
+import re
+
+
+CLASS_LABELS = ("correct", "partially correct", "incorrect")
+
+_FENCE = re.compile(r"```(?:json|python)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_FIELD = re.compile(r"""["']?(class|rationale)["']?\s*[:=]\s*(.+?)\s*(?=,?\s*["']?(?:class|rationale)["']?\s*[:=]|[}]?\s*$)""",
+                    re.DOTALL | re.IGNORECASE)
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Salvages a JSON object from a malformed completion.
+
+    Handles code fences, text around the object, single-quoted (Python literal) objects and
+    trailing commas, then falls back to reading `class: ...` / `rationale: ...` fields directly.
+
+    Args:
+        text (str): The completion.
+
+    Returns:
+        Optional[Dict[str, Any]]: The object, or None if nothing could be salvaged.
+    """
+    if not text:
+        return None
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    candidate = text[start:end + 1] if 0 <= start < end else text
+
+    for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+        try:
+            value = json.loads(attempt)
+        except ValueError:
+            try:
+                value = ast.literal_eval(attempt)
+            except (ValueError, SyntaxError):
+                continue
+        if isinstance(value, dict):
+            return value
+
+    fields = {key.lower(): value.strip().strip(",").strip().strip("\"'") for key, value in _FIELD.findall(candidate.strip("{} \n"))}
+    return fields or None
+
+
+def normalize_label(label: Any) -> Optional[str]:
+    """
+    Maps a class label to "correct", "partially correct" or "incorrect".
+
+    Args:
+        label (Any): The label produced by the model, e.g. "Partially_Correct" or "WRONG.".
+
+    Returns:
+        Optional[str]: The canonical label, or None if it is not recognized.
+    """
+    if not isinstance(label, str):
+        return None
+    words = re.sub(r"[^a-z]+", " ", label.lower()).split()
+    if not words:
+        return None
+    if any(word.startswith("partial") or word == "partly" for word in words):
+        return "partially correct"
+    if any(word in ("incorrect", "wrong", "not", "false", "inaccurate") for word in words):
+        return "incorrect"
+    if "correct" in words or "right" in words or "accurate" in words:
+        return "correct"
+    return None
+
+
+class StructuredOutputRepair:
+    """
+    Parses judge completions locally and decides whether and when to re-ask the model.
+
+    A completion is accepted when its JSON can be salvaged (see `repair_json`) and its class
+    normalized (see `normalize_label`). Only genuine failures are retried, after an exponential
+    backoff with jitter. Retries are paid for from a budget: every judgement adds
+    `retry_budget_ratio` tokens (up to `retry_budget_burst`) and every retry spends one, so
+    retries never exceed that fraction of judgements over time, even during an outage.
+
+    Attributes:
+        max_attempts (int): Maximum number of model calls per judgement.
+        base_delay (float): Backoff before the first retry, in seconds.
+        max_delay (float): Maximum backoff, in seconds.
+        stats (Dict[str, int]): Clean parse, repair, failure, retry and budget exhaustion counters.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retry_budget_ratio: float = 0.2, retry_budget_burst: float = 10) -> None:
+        """
+        Initializes the repair layer with a full retry budget.
+
+        Args:
+            max_attempts (int): Maximum number of model calls per judgement.
+            base_delay (float): Backoff before the first retry, in seconds.
+            max_delay (float): Maximum backoff, in seconds.
+            retry_budget_ratio (float): Retry tokens earned per judgement.
+            retry_budget_burst (float): Maximum number of retry tokens.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_burst = retry_budget_burst
+        self.stats = {"judgements": 0, "clean": 0, "repaired": 0, "failed": 0, "retries": 0, "budget_exhausted": 0}
+        self._budget = retry_budget_burst
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Records a new judgement and adds its share to the retry budget.
+        """
+        with self._lock:
+            self.stats["judgements"] += 1
+            self._budget = min(self.retry_budget_burst, self._budget + self.retry_budget_ratio)
+
+    def parse(self, completion: Optional[str], strict: Callable[[str], Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Parses a judge completion, repairing it if the strict parser rejects it.
+
+        Args:
+            completion (Optional[str]): The completion.
+            strict (Callable[[str], Dict[str, Any]]): The strict parser, e.g. `StructuredOutputParser.parse`.
+
+        Returns:
+            Optional[Dict[str, str]]: The judgement with a canonical "class" and a "rationale", or None on a genuine failure.
+        """
+        try:
+            value = strict(completion)
+            clean = value.get("class") in CLASS_LABELS
+        except Exception:
+            value = repair_json(completion)
+            clean = False
+
+        label = normalize_label(value.get("class")) if isinstance(value, dict) else None
+        with self._lock:
+            if label is None:
+                self.stats["failed"] += 1
+                logger.warning(f"Unrepairable judge output: {completion!r:.200}")
+                return None
+            self.stats["clean" if clean else "repaired"] += 1
+        rationale = value.get("rationale", "")
+        return {"class": label, "rationale": rationale if isinstance(rationale, str) else str(rationale)}
+
+    def retry_delay(self, attempt: int) -> Optional[float]:
+        """
+        Decides whether a failed attempt may be retried.
+
+        Args:
+            attempt (int): Zero-based index of the attempt that failed.
+
+        Returns:
+            Optional[float]: The backoff in seconds before the retry, or None if no retry is allowed.
+        """
+        with self._lock:
+            if attempt + 1 >= self.max_attempts:
+                return None
+            if self._budget < 1.0:
+                self.stats["budget_exhausted"] += 1
+                return None
+            self._budget -= 1.0
+            self.stats["retries"] += 1
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the number of model calls saved by local repair.
+
+        Every repaired completion would have cost at least one more model call with strict parsing.
+
+        Returns:
+            Dict[str, Any]: The repair statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["llm_calls_saved"] = stats["repaired"]
+        return stats
+
+
+judgement_repair = StructuredOutputRepair(
+    max_attempts=config.LLM['repair']['max_attempts'],
+    base_delay=config.LLM['repair']['base_delay_seconds'],
+    max_delay=config.LLM['repair']['max_delay_seconds'],
+    retry_budget_ratio=config.LLM['repair']['retry_budget_ratio'],
+    retry_budget_burst=config.LLM['repair']['retry_budget_burst'],
+)
@@ -0,0 +1,152 @@
+from src.search.doc_search_extractive_segments import get_top_extractive_segments
+from src.search.doc_search_extractive_answers import get_top_extractive_answers
+from src.generate.qa import generate_answer_stream
+from src.benchmark.utils import summarize_latencies
+from src.search.pipeline import query_pipeline
+from src.config.logging import logger
+from collections import deque
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from typing import Dict
+from typing import Any
+import threading
+import queue
+import time
+
+
+CONTEXT_BUILDERS: Dict[str, Callable[[Dict[str, Any], int, Optional[str]], str]] = {
+    "extractive_answers": get_top_extractive_answers,
+    "extractive_segments": get_top_extractive_segments,
+}
+
+
+class StreamMetrics:
+    """
+    Keeps the time to first token and total latency of recent streamed queries.
+
+    Attributes:
+        ttft (deque): Recent times to first answer chunk, in seconds.
+        total (deque): Recent end-to-end latencies, in seconds.
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        """
+        Initializes empty windows.
+
+        Args:
+            window (int): Number of recent requests kept.
+        """
+        self.ttft = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ttft_seconds: Optional[float], total_seconds: float) -> None:
+        """
+        Records one request. Requests that produced no answer chunk have no time to first token.
+        """
+        with self._lock:
+            if ttft_seconds is not None:
+                self.ttft.append(ttft_seconds)
+            self.total.append(total_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the latency percentiles of the recorded requests.
+
+        Returns:
+            Dict[str, Any]: The number of requests and the time to first token and total latency summaries.
+        """
+        with self._lock:
+            ttft, total = list(self.ttft), list(self.total)
+        return {
+            "requests": len(total),
+            "ttft": summarize_latencies(ttft) if ttft else {},
+            "total": summarize_latencies(total) if total else {},
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+def stream_query(query: str, data_store_id: str, profile: str = "extractive_answers",
+                 top_n: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Answers a query end to end, yielding stage events as soon as each stage produces them.
+
+    Events, each with the `elapsed_seconds` since the request started:
+
+    - `{"event": "entities", "company", "time_period"}` once entity extraction is done (both None if validation failed);
+    - `{"event": "documents", "documents": [{"id", "title", "link"}, ...], "search": timings}` once the search is done;
+    - `{"event": "answer_chunk", "text"}` for each chunk of the answer;
+    - `{"event": "done", "answer", "ttft_seconds", "total_seconds"}` at the end.
+
+    Args:
+        query (str): The user query.
+        data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): "extractive_answers" or "extractive_segments", the content the answer is generated from.
+        top_n (int): Number of top results used as context.
+
+    Yields:
+        Dict[str, Any]: The stage events.
+    """
+    start = time.perf_counter()
+    events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+    def on_entities(company: Optional[str], time_period: Optional[str]) -> None:
+        events.put({"event": "entities", "company": company, "time_period": time_period})
+
+    def run_pipeline() -> None:
+        try:
+            results, timings = query_pipeline.run(query, data_store_id, profile, on_entities=on_entities)
+        except Exception as e:
+            logger.error(f"Error executing the query pipeline: {e}")
+            results, timings = {}, {}
+        events.put({"event": "documents", "results": results, "search": timings})
+
+    threading.Thread(target=run_pipeline, name="stream-query", daemon=True).start()
+
+    while True:
+        event = events.get()
+        event["elapsed_seconds"] = round(time.perf_counter() - start, 4)
+        if event["event"] != "documents":
+            yield event
+            continue
+        results = event.pop("results")
+        event["documents"] = [{"id": info['id'], "title": info['title'], "link": info['link']}
+                              for info in results.get('match_info', [])[:top_n]]
+        yield event
+        break
+
+    context = CONTEXT_BUILDERS[profile](results, top_n, query)
+    chunks = []
+    ttft_seconds = None
+    for text in generate_answer_stream(query, context):
+        elapsed = time.perf_counter() - start
+        if ttft_seconds is None:
+            ttft_seconds = elapsed
+        chunks.append(text)
+        yield {"event": "answer_chunk", "text": text, "elapsed_seconds": round(elapsed, 4)}
+
+    total_seconds = time.perf_counter() - start
+    stream_metrics.record(ttft_seconds, total_seconds)
+    done = {
+        "event": "done",
+        "answer": "".join(chunks),
+        "ttft_seconds": None if ttft_seconds is None else round(ttft_seconds, 4),
+        "total_seconds": round(total_seconds, 4),
+        "elapsed_seconds": round(total_seconds, 4),
+    }
+    logger.info(f"Streamed query: time to first token {done['ttft_seconds']}s, total {done['total_seconds']}s.")
+    yield done
+
+
+if __name__ == "__main__":
+    query = """What was LinkedIn's revenue increase in Q1 2021 according to Microsoft's earnings report, and what was the growth rate when adjusted for constant currency?"""
+    data_store_id = "quarterly-reports"
+    for event in stream_query(query, data_store_id):
+        if event["event"] == "answer_chunk":
+            print(event["text"], end="", flush=True)
+        else:
+            logger.info(event)
+    logger.info(f"Streaming latency: {stream_metrics.get_stats()}")
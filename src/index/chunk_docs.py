@@ -0,0 +1,99 @@
+from src.utils.facets import load_metadata
+from src.config.logging import logger
+from typing import Optional
+from pypdf import PdfReader
+from typing import Dict
+from typing import List
+from typing import Any
+import os
+
+
+def extract_pages(pdf_path: str) -> List[str]:
+    """
+    Extracts the text of every page of a PDF.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+
+    Returns:
+        List[str]: One string per page; pages without extractable text are empty strings.
+    """
+    reader = PdfReader(pdf_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def chunk_page(text: str, chunk_words: int = 120, overlap_lines: int = 2) -> List[str]:
+    """
+    Splits a page into passages of roughly `chunk_words` words along line boundaries.
+
+    Consecutive passages share their last/first `overlap_lines` lines, so a fact that straddles
+    a boundary (e.g. a table row and its header) appears whole in at least one passage.
+
+    Args:
+        text (str): The page text.
+        chunk_words (int): Target number of words per passage.
+        overlap_lines (int): Number of lines carried over into the next passage.
+
+    Returns:
+        List[str]: The passages, in page order.
+    """
+    lines = []
+    for line in text.splitlines():
+        words = line.split()
+        # Very long lines (flowed paragraphs) are split so that no single line exceeds a passage
+        for start in range(0, len(words), chunk_words):
+            lines.append(" ".join(words[start:start + chunk_words]))
+
+    chunks = []
+    current: List[str] = []
+    current_words = 0
+    new_lines = 0
+    for line in lines:
+        current.append(line)
+        current_words += len(line.split())
+        new_lines += 1
+        if current_words >= chunk_words:
+            chunks.append("\n".join(current))
+            current = current[-overlap_lines:] if overlap_lines else []
+            current_words = sum(len(carried.split()) for carried in current)
+            new_lines = 0
+    if new_lines and current_words:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def chunk_documents(docs_dir: str = './data/raw_docs', metadata_path: str = './data/metadata/metadata.json',
+                    chunk_words: int = 120, overlap_lines: int = 2) -> List[Dict[str, Any]]:
+    """
+    Extracts and chunks every PDF in `docs_dir` that has an entry in the manifest.
+
+    Args:
+        docs_dir (str): Directory containing the PDFs.
+        metadata_path (str): Path to the JSON lines manifest.
+        chunk_words (int): Target number of words per passage.
+        overlap_lines (int): Number of lines carried over into the next passage.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per document with its metadata, `title` and list of
+                              `chunks` (each with `page_number` and `text`).
+    """
+    metadata = load_metadata(metadata_path)
+    documents = []
+    for filename in sorted(os.listdir(docs_dir)):
+        doc_metadata: Optional[Dict[str, str]] = metadata.get(filename)
+        if doc_metadata is None:
+            logger.warning(f"Skipped {filename}: not in the manifest.")
+            continue
+        try:
+            pages = extract_pages(os.path.join(docs_dir, filename))
+        except Exception as e:
+            logger.error(f"Failed to extract text from {filename}: {e}")
+            continue
+
+        chunks = []
+        for page_number, page_text in enumerate(pages, 1):
+            for text in chunk_page(page_text, chunk_words, overlap_lines):
+                chunks.append({"page_number": page_number, "text": text})
+        documents.append({**doc_metadata, "title": os.path.splitext(filename)[0], "chunks": chunks})
+        logger.info(f"Chunked {filename}: {len(pages)} pages, {len(chunks)} passages.")
+    return documents
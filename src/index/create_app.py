@@ -1,6 +1,7 @@
 from google.cloud.discoveryengine_v1beta import SolutionType
 from google.cloud.discoveryengine_v1beta import SearchAddOn
 from google.cloud.discoveryengine_v1beta import SearchTier
+from src.config.credentials import get_token_provider
 from src.config.logging import logger
 from src.config.setup import config
 from typing import Optional
@@ -26,7 +27,7 @@ def create_doc_search_app(data_store_display_name: str, data_store_id: str) -> O
 
     # Headers for the request
     headers = {
-        "Authorization": f"Bearer {config.ACCESS_TOKEN}",
+        "Authorization": f"Bearer {get_token_provider().get_token()}",
         "Content-Type": "application/json",
         "X-Goog-User-Project": config.PROJECT_ID
     }
@@ -1,6 +1,7 @@
 from google.cloud.discoveryengine_v1beta import IndustryVertical
 from google.cloud.discoveryengine_v1beta import SolutionType
 from google.cloud.discoveryengine_v1beta import DataStore
+from src.config.credentials import get_token_provider
 from src.config.logging import logger
 from src.config.setup import config
 from typing import Dict, Any
@@ -24,7 +25,7 @@ def create_data_store(data_store_display_name: str, data_store_id: str) -> Dict[
     url = f"https://discoveryengine.googleapis.com/v1alpha/projects/{config.PROJECT_ID}/locations/global/collections/default_collection/dataStores?dataStoreId={data_store_id}"
 
     headers = {
-        'Authorization': f'Bearer {config.ACCESS_TOKEN}',
+        'Authorization': f'Bearer {get_token_provider().get_token()}',
         'Content-Type': 'application/json',
         'X-Goog-User-Project': config.PROJECT_ID
     }
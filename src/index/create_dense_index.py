@@ -0,0 +1,146 @@
+from src.index.create_local_index import write_passage_store
+from src.index.create_local_index import write_params
+from src.index.chunk_docs import chunk_documents
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import os
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantizes L2-normalized vectors for storage.
+
+    Args:
+        vectors (np.ndarray): The normalized float32 vectors, one per row.
+        dtype (str): `float16`, or `int8` with a symmetric per-row scale.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: The stored vectors and, for int8, the per-row scales.
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported vector dtype '{dtype}'. Use 'float16' or 'int8'.")
+
+
+def train_ivf(vectors: np.ndarray, num_lists: int, iterations: int = 10, sample_size: int = 65536,
+              seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trains a spherical k-means coarse quantizer and assigns every vector to its nearest centroid.
+
+    Args:
+        vectors (np.ndarray): The normalized float32 vectors, one per row.
+        num_lists (int): Number of IVF lists (centroids).
+        iterations (int): Number of k-means iterations.
+        sample_size (int): Maximum number of vectors used for training.
+        seed (int): Random seed.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The normalized centroids and the list of every vector.
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=num_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for l in range(num_lists):
+            members = sample[assignments == l]
+            if len(members):
+                centroids[l] = members.sum(axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), sample_size):
+        assignments[start:start + sample_size] = np.argmax(vectors[start:start + sample_size] @ centroids.T, axis=1)
+    return centroids.astype(np.float32), assignments
+
+
+def embed_passages(texts: List[str], batch_size: int) -> np.ndarray:
+    """
+    Embeds passages with the configured text embedding model.
+
+    Args:
+        texts (List[str]): The passage texts.
+        batch_size (int): Number of passages per embedding request.
+
+    Returns:
+        np.ndarray: One float32 embedding per passage.
+    """
+    from src.eval.semantic_similarity import embed_text
+
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        embeddings.extend(embed_text(texts[start:start + batch_size], task="RETRIEVAL_DOCUMENT"))
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def build_dense_index(documents: List[Dict[str, Any]], output_dir: str, dtype: str = "int8",
+                      ivf_min_vectors: int = 50000, embed: Optional[Callable[[List[str]], np.ndarray]] = None) -> None:
+    """
+    Embeds the document passages and writes the quantized dense index to `output_dir`.
+
+    An IVF coarse quantizer with about sqrt(N) lists is trained once the corpus reaches
+    `ivf_min_vectors` passages; smaller corpora are scanned exhaustively.
+
+    Args:
+        documents (List[Dict[str, Any]]): Chunked documents, as returned by `chunk_documents`.
+        output_dir (str): Directory to write the index files to.
+        dtype (str): Storage type of the vectors, `int8` or `float16`.
+        ivf_min_vectors (int): Corpus size from which an IVF quantizer is built.
+        embed (Optional[Callable[[List[str]], np.ndarray]]): Embeds passage texts. Defaults to the
+                                                             configured text embedding model.
+    """
+    texts = write_passage_store(documents, output_dir)
+    if embed is None:
+        embed = lambda passages: embed_passages(passages, config.LOCAL_DENSE['embed_batch_size'])
+    vectors = np.asarray(embed(texts), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    stored, scales = quantize(vectors, dtype)
+    np.save(os.path.join(output_dir, "vectors.npy"), stored)
+    if scales is not None:
+        np.save(os.path.join(output_dir, "scales.npy"), scales)
+
+    ivf = len(vectors) >= ivf_min_vectors
+    if ivf:
+        num_lists = max(1, int(np.sqrt(len(vectors))))
+        centroids, assignments = train_ivf(vectors, num_lists)
+        list_rows = np.argsort(assignments, kind="stable").astype(np.int32)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=num_lists))]).astype(np.int64)
+        np.save(os.path.join(output_dir, "centroids.npy"), centroids)
+        np.save(os.path.join(output_dir, "list_rows.npy"), list_rows)
+        np.save(os.path.join(output_dir, "list_offsets.npy"), list_offsets)
+
+    write_params(output_dir, {"dtype": dtype, "ivf": ivf, "num_chunks": len(texts), "dimensions": vectors.shape[1]})
+    logger.info(f"Local dense index written to {output_dir}: {len(texts)} passages, {dtype}"
+                f"{', IVF' if ivf else ''}.")
+
+
+def create_dense_index(data_store_id: str, docs_dir: str = './data/raw_docs',
+                       metadata_path: str = './data/metadata/metadata.json') -> None:
+    """
+    Chunks and embeds the raw documents and builds the local dense index for a data store.
+
+    Args:
+        data_store_id (str): The data store the index stands in for.
+        docs_dir (str): Directory containing the PDFs.
+        metadata_path (str): Path to the JSON lines manifest.
+    """
+    settings = config.LOCAL_DENSE
+    documents = chunk_documents(docs_dir, metadata_path)
+    build_dense_index(documents, os.path.join(settings['index_dir'], data_store_id),
+                      dtype=settings['dtype'], ivf_min_vectors=settings['ivf_min_vectors'])
+
+
+if __name__ == "__main__":
+    create_dense_index("quarterly-reports")
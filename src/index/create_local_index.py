@@ -0,0 +1,124 @@
+from src.utils.text import tokenize
+from src.index.chunk_docs import chunk_documents
+from src.config.logging import logger
+from src.config.setup import config
+from collections import Counter
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import json
+import os
+
+
+def write_passage_store(documents: List[Dict[str, Any]], output_dir: str) -> List[str]:
+    """
+    Writes the document metadata and passage arrays shared by the local search backends
+    (see `src.search.local_bm25.PassageIndex`).
+
+    Args:
+        documents (List[Dict[str, Any]]): Chunked documents, as returned by `chunk_documents`.
+        output_dir (str): Directory to write the index files to.
+
+    Returns:
+        List[str]: The passage texts, in row order.
+    """
+    document_metadata, texts, chunk_doc, chunk_page = [], [], [], []
+    doc_chunk_offsets = [0]
+    for document in documents:
+        # Documents without text would leave an empty passage range, which the search relies on not existing
+        if not document["chunks"]:
+            logger.warning(f"Skipped {document['title']}: no extractable text.")
+            continue
+        doc = len(document_metadata)
+        document_metadata.append({key: document[key] for key in ("id", "title", "uri", "company", "time_period")})
+        for chunk in document["chunks"]:
+            texts.append(chunk["text"])
+            chunk_doc.append(doc)
+            chunk_page.append(chunk["page_number"])
+        doc_chunk_offsets.append(len(texts))
+
+    encoded = [text.encode("utf-8") for text in texts]
+    arrays = {
+        "chunk_doc": np.array(chunk_doc, dtype=np.int32),
+        "chunk_page": np.array(chunk_page, dtype=np.int32),
+        "doc_chunk_offsets": np.array(doc_chunk_offsets, dtype=np.int64),
+        "chunk_text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "chunk_text_offsets": np.concatenate([[0], np.cumsum([len(text) for text in encoded])]).astype(np.int64),
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(output_dir, f"{name}.npy"), array)
+    with open(os.path.join(output_dir, "documents.json"), "w") as file:
+        json.dump(document_metadata, file)
+    return texts
+
+
+def write_params(output_dir: str, params: Dict[str, Any]) -> None:
+    """
+    Writes the build parameters. This must be the last file written: readers use its
+    modification time to detect a rebuilt index.
+    """
+    with open(os.path.join(output_dir, "params.json"), "w") as file:
+        json.dump(params, file)
+
+
+def build_local_index(documents: List[Dict[str, Any]], output_dir: str) -> None:
+    """
+    Builds the BM25 inverted index over document passages and writes it to `output_dir`.
+
+    Args:
+        documents (List[Dict[str, Any]]): Chunked documents, as returned by `chunk_documents`.
+        output_dir (str): Directory to write the index files to.
+    """
+    texts = write_passage_store(documents, output_dir)
+
+    vocabulary: Dict[str, int] = {}
+    postings: List[List[int]] = []
+    frequencies: List[List[int]] = []
+    chunk_lengths = []
+    for chunk_id, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        for token, count in counts.items():
+            term = vocabulary.setdefault(token, len(vocabulary))
+            if term == len(postings):
+                postings.append([])
+                frequencies.append([])
+            postings[term].append(chunk_id)
+            frequencies[term].append(count)
+        chunk_lengths.append(sum(counts.values()))
+
+    num_chunks = len(texts)
+    document_frequencies = np.array([len(term_postings) for term_postings in postings], dtype=np.float64)
+    arrays = {
+        "term_offsets": np.concatenate([[0], np.cumsum(document_frequencies)]).astype(np.int64),
+        "postings_chunk": np.fromiter((chunk for term_postings in postings for chunk in term_postings), dtype=np.int32),
+        "postings_tf": np.fromiter((tf for term_tfs in frequencies for tf in term_tfs), dtype=np.float32),
+        "idf": np.log1p((num_chunks - document_frequencies + 0.5) / (document_frequencies + 0.5)).astype(np.float32),
+        "chunk_lengths": np.array(chunk_lengths, dtype=np.float32),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(output_dir, f"{name}.npy"), array)
+    with open(os.path.join(output_dir, "vocabulary.json"), "w") as file:
+        json.dump(vocabulary, file)
+    write_params(output_dir, {"avg_length": float(np.mean(chunk_lengths)) if chunk_lengths else 1.0,
+                              "num_chunks": num_chunks})
+    logger.info(f"Local BM25 index written to {output_dir}: {num_chunks} passages, {len(vocabulary)} terms.")
+
+
+def create_local_index(data_store_id: str, docs_dir: str = './data/raw_docs',
+                       metadata_path: str = './data/metadata/metadata.json') -> None:
+    """
+    Chunks the raw documents and builds the local BM25 index for a data store.
+
+    Args:
+        data_store_id (str): The data store the index stands in for.
+        docs_dir (str): Directory containing the PDFs.
+        metadata_path (str): Path to the JSON lines manifest.
+    """
+    documents = chunk_documents(docs_dir, metadata_path)
+    build_local_index(documents, os.path.join(config.LOCAL_SEARCH['index_dir'], data_store_id))
+
+
+if __name__ == "__main__":
+    create_local_index("quarterly-reports")
@@ -1,6 +1,7 @@
 
 from google.cloud.exceptions import GoogleCloudError
 from src.config.logging import logger
+from src.utils.facets import facet_catalog
 from src.config.setup import config
 from google.cloud import storage
 from typing import Optional
@@ -86,6 +87,7 @@ def create_manifest():
                 file.write(item + '\n')
 
         logger.info(f'Data written to {output_file_path}')
+        facet_catalog.load()
 
         # Upload metadata.json to GCS
         upload_file_to_gcs(output_file_path, prefix + 'metadata.json')
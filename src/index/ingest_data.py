@@ -1,11 +1,47 @@
+from src.config.credentials import get_token_provider
+from src.search.cache import search_cache
 from src.config.logging import logger
 from src.config.setup import config
+from typing import Optional
+from typing import Dict
+from typing import Any
 import requests
+import time
+
+
+def wait_for_operation(operation_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Polls a Discovery Engine long-running operation until it is done.
+
+    Parameters:
+        operation_name (str): The operation's resource name, as returned by the request that started it.
+
+    Returns:
+        Optional[Dict[str, Any]]: The finished operation, or None if it did not finish within
+        `ingest.operation_timeout_seconds` or could not be polled.
+    """
+    url = f"https://discoveryengine.googleapis.com/v1/{operation_name}"
+    deadline = time.monotonic() + config.INGEST['operation_timeout_seconds']
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(url, headers={"Authorization": f"Bearer {get_token_provider().get_token()}"})
+            response.raise_for_status()
+        except Exception as err:
+            logger.error(f"Error occurred while polling operation {operation_name}: {err}")
+            return None
+        operation = response.json()
+        if operation.get("done"):
+            return operation
+        time.sleep(config.INGEST['operation_poll_seconds'])
+    logger.error(f"Operation {operation_name} did not finish within {config.INGEST['operation_timeout_seconds']}s.")
+    return None
 
 
 def ingest_documents(gcs_input_uri: str, data_store_id: str) -> None:
     """
-    Sends a POST request to GCP to import documents into a specified data store.
+    Sends a POST request to GCP to import documents into a specified data store, then waits for
+    the import operation to finish. The search cache of the data store is invalidated when the
+    import starts and again when it ends.
 
     Parameters:
         gcs_input_uri (str): URI of the input document location in Google Cloud Storage.
@@ -19,7 +55,7 @@ def ingest_documents(gcs_input_uri: str, data_store_id: str) -> None:
     url = f"https://discoveryengine.googleapis.com/v1/projects/{project_id}/locations/global/collections/default_collection/dataStores/{data_store_id}/branches/0/documents:import"
 
     headers = {
-        "Authorization": f"Bearer {config.ACCESS_TOKEN}",
+        "Authorization": f"Bearer {get_token_provider().get_token()}",
         "Content-Type": "application/json"
     }
 
@@ -40,7 +76,15 @@ def ingest_documents(gcs_input_uri: str, data_store_id: str) -> None:
         raise
     else:
         logger.info("Request successful")
-        logger.info(response.json())
+        operation = response.json()
+        logger.info(operation)
+        # Results cached against the previous documents are stale from here on
+        search_cache.invalidate_data_store(data_store_id)
+        # The import runs in the background, and results cached while it runs may miss its documents
+        finished = wait_for_operation(operation['name'])
+        if finished is not None and 'error' in finished:
+            logger.error(f"Document import failed: {finished['error']}")
+        search_cache.invalidate_data_store(data_store_id)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,203 @@
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from src.search.utils import extract_relevant_data
+from src.utils.rate_limit import get_rate_limiter
+from src.search.utils import build_search_request
+from src.search.utils import create_summary_dict
+from src.search.client import client_registry
+from src.search.cache import search_cache
+from src.search.profiles import get_profile
+from src.search.utils import search_with_filter
+from src.search.utils import build_filter_str
+from src.search.utils import LOCAL_BACKENDS
+from src.config.logging import logger
+from src.search.utils import LOCATION
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+from typing import Any
+import asyncio
+import weakref
+
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_search_semaphore() -> asyncio.Semaphore:
+    """
+    Returns the semaphore bounding concurrent searches on the running event loop.
+
+    The limit is `search.max_concurrency` from the configuration.
+
+    Returns:
+        asyncio.Semaphore: The semaphore for the running loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.SEARCH['max_concurrency'])
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def async_search_data_store_with_filters(search_query: str, filter_str: str, data_store_id: str, profile: str = "default",
+                                               timeout: Optional[float] = None) -> Optional[discoveryengine.SearchResponse]:
+    """
+    Asynchronously searches the data store using the Discovery Engine async client.
+
+    The deadline covers the whole call, including the time spent waiting for a concurrency slot
+    and for the rate limiter. When the deadline passes first, the API is not called.
+
+    Args:
+        search_query (str): The search query string.
+        filter_str (str): Filter string for the query.
+        data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): Name of the search profile (see `src.search.profiles`).
+        timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+        Optional[discoveryengine.SearchResponse]: The search response, or None if the search failed or timed out.
+    """
+    timeout = timeout if timeout is not None else config.SEARCH['timeout_seconds']
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    semaphore = get_search_semaphore()
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"Search deadline of {timeout}s exceeded while waiting for a concurrency slot.")
+        return None
+
+    try:
+        client = client_registry.get_async_client(LOCATION)
+        request = build_search_request(search_query, filter_str, data_store_id, profile)
+
+        def remaining() -> float:
+            left = deadline - loop.time()
+            if left <= 0:
+                raise TimeoutError(f"Search deadline of {timeout}s exceeded before the request was sent.")
+            return left
+
+        response = await get_rate_limiter("search").acall(
+            lambda: client.search(request, timeout=remaining()), max_wait=remaining())
+        return response
+
+    except Exception as e:
+        logger.error(f"Error during async data store search: {e}")
+        return None
+
+    finally:
+        semaphore.release()
+
+
+async def async_local_search(query: str, filter_str: str, data_store_id: str, profile: str = "default",
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Runs a search against the configured local backend off the event loop, under the same
+    deadline as the Vertex AI Search path.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    filter_str (str): Filter string for the query. An empty string disables filtering.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                    Returns an empty dictionary if the deadline passes.
+    """
+    timeout = timeout if timeout is not None else config.SEARCH['timeout_seconds']
+    try:
+        # Local backends are synchronous; the worker thread finishes in the background on timeout
+        return await asyncio.wait_for(asyncio.to_thread(search_with_filter, query, filter_str, data_store_id, profile), timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"Local search timed out after {timeout}s.")
+        return {}
+
+
+async def async_search(query: str, data_store_id: str, profile: str = "default", timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Asynchronous counterpart of `search`.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                    Returns an empty dictionary if an error occurs.
+    """
+    if config.SEARCH['backend'] in LOCAL_BACKENDS:
+        return await async_local_search(query, "", data_store_id, profile, timeout)
+
+    cache_key = search_cache.make_key(query, "", data_store_id, get_profile(profile).fingerprint)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        hits = await async_search_data_store_with_filters(query, "", data_store_id, profile, timeout=timeout)
+        matches = extract_relevant_data(hits)
+        summary_dict = create_summary_dict(matches)
+        search_cache.put(cache_key, data_store_id, summary_dict)
+        return summary_dict
+
+    except Exception as e:
+        logger.error(f"Error executing async_search: {e}")
+        return {}
+
+
+async def async_filtered_search(query: str, company: str, time_period: str, data_store_id: str, profile: str = "default",
+                                timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Asynchronous counterpart of `filtered_search`.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    company (str): The company name.
+    time_period (str): The time period.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                    Returns an empty dictionary if an error occurs.
+    """
+    filter_str = build_filter_str(company, time_period)
+    if config.SEARCH['backend'] in LOCAL_BACKENDS:
+        return await async_local_search(query, filter_str, data_store_id, profile, timeout)
+
+    cache_key = search_cache.make_key(query, filter_str, data_store_id, get_profile(profile).fingerprint)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        hits = await async_search_data_store_with_filters(query, filter_str, data_store_id, profile, timeout=timeout)
+        matches = extract_relevant_data(hits)
+        summary_dict = create_summary_dict(matches)
+        search_cache.put(cache_key, data_store_id, summary_dict)
+        return summary_dict
+
+    except Exception as e:
+        logger.error(f"Error executing async_filtered_search: {e}")
+        return {}
+
+
+if __name__ == "__main__":
+    queries = [
+        "What was LinkedIn's revenue increase in Q1 2021 according to Microsoft's earnings report?",
+        "What was Google Cloud's operating loss in Q1 2021?",
+        "What was AWS segment operating income in Q4 2022?",
+    ]
+    data_store_id = "quarterly-reports"
+
+    async def main():
+        return await asyncio.gather(*(async_search(query, data_store_id) for query in queries))
+
+    for query, results in zip(queries, asyncio.run(main())):
+        logger.info(f"{query} -> {results.get('summarized_answer')}")
@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import Any
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query for cache lookups by lowercasing it and collapsing whitespace.
+
+    Args:
+        query (str): The raw query.
+
+    Returns:
+        str: The normalized query.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    A two-tier TTL cache for consolidated search results.
+
+    The first tier is an in-memory LRU, the second an optional sqlite file shared by every
+    process that points at it, bounded the same way (expired entries first, then by last use).
+    Entries are keyed on the normalized query, the filter string, the data store and a
+    fingerprint of the content search spec. Each data store carries a
+    generation number that is bumped on re-ingestion; it is part of every key, so results
+    cached before a re-ingestion are never served afterwards.
+
+    Attributes:
+        enabled (bool): Whether lookups and stores are performed at all.
+        max_entries (int): Maximum number of entries in the in-memory tier.
+        max_disk_entries (int): Maximum number of entries in the sqlite tier.
+        ttl_seconds (float): Time to live of an entry.
+        stats (Dict[str, int]): Hit, miss, eviction and expiration counters.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None,
+                 max_disk_entries: int = 0, enabled: bool = True) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of entries in the in-memory tier.
+            ttl_seconds (float): Time to live of an entry.
+            db_path (Optional[str]): Path of the sqlite file. The disk tier is disabled when empty.
+            max_disk_entries (int): Maximum number of entries in the sqlite tier.
+            enabled (bool): Whether lookups and stores are performed at all.
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._memory: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if enabled and db_path else None
+
+    @staticmethod
+    def _open_db(db_path: str) -> Optional[sqlite3.Connection]:
+        """
+        Opens (and creates if needed) the sqlite tier.
+
+        Args:
+            db_path (str): Path of the sqlite file.
+
+        Returns:
+            Optional[sqlite3.Connection]: The connection, or None if the file could not be opened.
+        """
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, data_store_id TEXT, expires_at REAL, value TEXT, last_used REAL)")
+            columns = [row[1] for row in db.execute("PRAGMA table_info(entries)")]
+            if "last_used" not in columns:
+                # Files written before LRU eviction; their entries count as least recently used
+                db.execute("ALTER TABLE entries ADD COLUMN last_used REAL DEFAULT 0")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            db.execute("CREATE TABLE IF NOT EXISTS generations (data_store_id TEXT PRIMARY KEY, generation INTEGER)")
+            return db
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open search cache at {db_path}, continuing in memory only: {e}")
+            return None
+
+    def _generation(self, data_store_id: str) -> int:
+        if self._db is None:
+            return self._generations.get(data_store_id, 0)
+        row = self._db.execute("SELECT generation FROM generations WHERE data_store_id = ?", (data_store_id,)).fetchone()
+        return row[0] if row else 0
+
+    def make_key(self, query: str, filter_str: str, data_store_id: str, spec_fingerprint: str) -> str:
+        """
+        Builds the cache key for a search.
+
+        Args:
+            query (str): The search query.
+            filter_str (str): The filter string.
+            data_store_id (str): Vertex AI Search Data Store ID.
+            spec_fingerprint (str): Fingerprint of the content search spec.
+
+        Returns:
+            str: The cache key.
+        """
+        with self._lock:
+            generation = self._generation(data_store_id)
+        raw = "\x1f".join([normalize_query(query), filter_str, data_store_id, spec_fingerprint, str(generation)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a cached result.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Dict[str, Any]]: A fresh copy of the cached result, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self.stats["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT data_store_id, expires_at, value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    data_store_id, expires_at, value = row
+                    if expires_at > now:
+                        self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+                        self._store_in_memory(key, expires_at, data_store_id, value)
+                        self.stats["disk_hits"] += 1
+                        return json.loads(value)
+                    # Another process may have removed the entry since it was read
+                    self.stats["expirations"] += self._db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, data_store_id: str, result: Dict[str, Any]) -> None:
+        """
+        Stores a result in both tiers.
+
+        Args:
+            key (str): The cache key.
+            data_store_id (str): Vertex AI Search Data Store ID the result came from.
+            result (Dict[str, Any]): The consolidated search result.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        value = json.dumps(result)
+        with self._lock:
+            self._store_in_memory(key, expires_at, data_store_id, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO entries (key, data_store_id, expires_at, value, last_used) VALUES (?, ?, ?, ?, ?)",
+                                 (key, data_store_id, expires_at, value, now))
+                self._evict_from_disk(now)
+
+    def _store_in_memory(self, key: str, expires_at: float, data_store_id: str, value: str) -> None:
+        self._memory[key] = (expires_at, data_store_id, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _count_disk_entries(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _evict_from_disk(self, now: float) -> None:
+        """
+        Brings the sqlite tier back under `max_disk_entries`: expired entries go first, then the
+        least recently used ones. The entries are counted in sqlite rather than in this process,
+        since every process sharing the file stores into it.
+        """
+        if self._count_disk_entries() <= self.max_disk_entries:
+            return
+        self.stats["expirations"] += self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+        excess = self._count_disk_entries() - self.max_disk_entries
+        if excess > 0:
+            self.stats["evictions"] += self._db.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)", (excess,)).rowcount
+
+    def invalidate_data_store(self, data_store_id: str) -> None:
+        """
+        Drops every cached result of a data store, e.g. after its documents were re-ingested.
+
+        Args:
+            data_store_id (str): Vertex AI Search Data Store ID.
+        """
+        with self._lock:
+            generation = self._generation(data_store_id) + 1
+            self._generations[data_store_id] = generation
+            stale = [key for key, (_, store, _) in self._memory.items() if store == data_store_id]
+            for key in stale:
+                del self._memory[key]
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO generations VALUES (?, ?)", (data_store_id, generation))
+                self._db.execute("DELETE FROM entries WHERE data_store_id = ?", (data_store_id,))
+            self.stats["invalidations"] += 1
+        logger.info(f"Search cache invalidated for data store '{data_store_id}' (generation {generation}).")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters along with the current size and hit rate.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._count_disk_entries() if self._db is not None else 0
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+search_cache = SearchCache(
+    enabled=config.SEARCH_CACHE['enabled'],
+    max_entries=config.SEARCH_CACHE['max_entries'],
+    ttl_seconds=config.SEARCH_CACHE['ttl_seconds'],
+    db_path=config.SEARCH_CACHE['db_path'],
+    max_disk_entries=config.SEARCH_CACHE['max_disk_entries'],
+)
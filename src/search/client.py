@@ -0,0 +1,232 @@
+from google.cloud.discoveryengine_v1beta.services.search_service.transports import SearchServiceGrpcAsyncIOTransport
+from google.cloud.discoveryengine_v1beta.services.search_service.transports import SearchServiceGrpcTransport
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Callable
+from typing import Optional
+from typing import Iterable
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import asyncio
+import weakref
+import grpc
+
+
+COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "deflate": grpc.Compression.Deflate,
+    "gzip": grpc.Compression.Gzip,
+}
+
+
+def get_api_endpoint(location: str) -> str:
+    """
+    Resolves the Discovery Engine API endpoint for a given location.
+
+    Args:
+        location (str): The Vertex AI Search location, e.g. "global" or "us".
+
+    Returns:
+        str: The API endpoint including the port.
+    """
+    if location == "global":
+        return "discoveryengine.googleapis.com:443"
+    return f"{location}-discoveryengine.googleapis.com:443"
+
+
+def build_channel_options(settings: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Translates the `search_client` section of the configuration into gRPC channel arguments.
+
+    Args:
+        settings (Dict[str, Any]): The `search_client` configuration section.
+
+    Returns:
+        List[Tuple[str, Any]]: gRPC channel arguments.
+    """
+    return [
+        ("grpc.keepalive_time_ms", settings['keepalive_time_ms']),
+        ("grpc.keepalive_timeout_ms", settings['keepalive_timeout_ms']),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.max_send_message_length", settings['max_send_message_length']),
+        ("grpc.max_receive_message_length", settings['max_receive_message_length']),
+    ]
+
+
+class SearchClientRegistry:
+    """
+    A process-wide registry of long-lived Discovery Engine search clients.
+
+    Building a `SearchServiceClient` opens a new gRPC channel, which costs a TLS handshake
+    and a credential fetch. The registry builds one client per API endpoint, keeps its
+    channel open, and hands the same (thread-safe) client to every caller. Async clients
+    are bound to the event loop they were created on, so they are kept per endpoint and loop.
+
+    Attributes:
+        settings (Dict[str, Any]): Channel settings (keepalive, message sizes, compression).
+    """
+
+    def __init__(self, settings: Dict[str, Any], channel_factory: Optional[Callable[[str], grpc.Channel]] = None,
+                 async_channel_factory: Optional[Callable[[str], grpc.aio.Channel]] = None) -> None:
+        """
+        Initializes the registry.
+
+        Args:
+            settings (Dict[str, Any]): The `search_client` configuration section.
+            channel_factory (Optional[Callable[[str], grpc.Channel]]): Builds a channel for an endpoint.
+                Defaults to an authenticated, TLS-secured channel using the configured options.
+            async_channel_factory (Optional[Callable[[str], grpc.aio.Channel]]): Builds an asyncio channel
+                for an endpoint. Defaults to the asyncio equivalent of `channel_factory`.
+        """
+        self.settings = settings
+        self._channel_factory = channel_factory or self._create_channel
+        self._async_channel_factory = async_channel_factory or self._create_async_channel
+        self._clients: Dict[str, discoveryengine.SearchServiceClient] = {}
+        self._async_clients: Dict[str, weakref.WeakKeyDictionary] = {}
+        self._lock = threading.Lock()
+
+    def _create_channel(self, endpoint: str) -> grpc.Channel:
+        """
+        Creates an authenticated gRPC channel to the given endpoint.
+
+        Args:
+            endpoint (str): The API endpoint including the port.
+
+        Returns:
+            grpc.Channel: The gRPC channel.
+        """
+        compression = COMPRESSION_ALGORITHMS[self.settings['compression'].lower()]
+        return SearchServiceGrpcTransport.create_channel(
+            endpoint,
+            options=build_channel_options(self.settings),
+            compression=compression,
+        )
+
+    def _create_async_channel(self, endpoint: str) -> grpc.aio.Channel:
+        """
+        Creates an authenticated asyncio gRPC channel to the given endpoint.
+
+        Args:
+            endpoint (str): The API endpoint including the port.
+
+        Returns:
+            grpc.aio.Channel: The asyncio gRPC channel.
+        """
+        compression = COMPRESSION_ALGORITHMS[self.settings['compression'].lower()]
+        return SearchServiceGrpcAsyncIOTransport.create_channel(
+            endpoint,
+            options=build_channel_options(self.settings),
+            compression=compression,
+        )
+
+    def get_client(self, location: str) -> discoveryengine.SearchServiceClient:
+        """
+        Returns the shared search client for a location, creating it on first use.
+
+        Args:
+            location (str): The Vertex AI Search location.
+
+        Returns:
+            discoveryengine.SearchServiceClient: The shared search client.
+        """
+        endpoint = get_api_endpoint(location)
+        client = self._clients.get(endpoint)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(endpoint)
+            if client is None:
+                channel = self._channel_factory(endpoint)
+                transport = SearchServiceGrpcTransport(host=endpoint, channel=channel)
+                client = discoveryengine.SearchServiceClient(transport=transport)
+                self._clients[endpoint] = client
+                logger.info(f"Created search client for endpoint {endpoint}.")
+        return client
+
+    def get_async_client(self, location: str) -> discoveryengine.SearchServiceAsyncClient:
+        """
+        Returns the shared async search client for a location on the running event loop.
+
+        Args:
+            location (str): The Vertex AI Search location.
+
+        Returns:
+            discoveryengine.SearchServiceAsyncClient: The shared async search client.
+        """
+        endpoint = get_api_endpoint(location)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(endpoint, weakref.WeakKeyDictionary())
+            client = clients.get(loop)
+            if client is None:
+                channel = self._async_channel_factory(endpoint)
+                transport = SearchServiceGrpcAsyncIOTransport(host=endpoint, channel=channel)
+                client = discoveryengine.SearchServiceAsyncClient(transport=transport)
+                clients[loop] = client
+                logger.info(f"Created async search client for endpoint {endpoint}.")
+        return client
+
+    def warm_up(self, locations: Iterable[str], wait: bool = True) -> None:
+        """
+        Creates the clients for the given locations and connects their channels ahead of the first query.
+
+        Args:
+            locations (Iterable[str]): The Vertex AI Search locations to warm up.
+            wait (bool): Whether to block until the channels are connected. When False the
+                connection is started in the background.
+        """
+        timeout = self.settings['prewarm_timeout_seconds']
+        for location in locations:
+            try:
+                client = self.get_client(location)
+                ready = grpc.channel_ready_future(client.transport.grpc_channel)
+                if wait:
+                    ready.result(timeout=timeout)
+                    logger.info(f"Search channel for location '{location}' is ready.")
+            except grpc.FutureTimeoutError:
+                logger.warning(f"Search channel for location '{location}' not ready after {timeout}s.")
+            except Exception as e:
+                logger.error(f"Failed to warm up search client for location '{location}': {e}")
+
+    def close(self) -> None:
+        """
+        Closes all channels held by the registry.
+
+        An async client's channel is closed on the event loop it belongs to: directly when that
+        loop is idle, by waiting up to `close_timeout_seconds` when it runs in another thread, and
+        in the background when `close` is called from that loop itself. Channels of closed loops
+        are already unusable and are only dropped.
+        """
+        with self._lock:
+            for client in self._clients.values():
+                client.transport.close()
+            self._clients.clear()
+            async_clients = [(loop, client) for clients in self._async_clients.values() for loop, client in clients.items()]
+            self._async_clients.clear()
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        for loop, client in async_clients:
+            if loop.is_closed():
+                continue
+            try:
+                if loop is current_loop:
+                    loop.create_task(client.transport.close())
+                elif loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.transport.close(), loop).result(
+                        timeout=self.settings['close_timeout_seconds'])
+                else:
+                    loop.run_until_complete(client.transport.close())
+            except Exception as e:
+                logger.warning(f"Failed to close async search channel: {e}")
+
+
+client_registry = SearchClientRegistry(config.SEARCH_CLIENT)
@@ -11,7 +11,7 @@ def get_summarized_answer(query: str, data_store_id: str) -> str:
     :return: A string containing the summarized answer.
     """
     try:
-        results = search(query, data_store_id)
+        results = search(query, data_store_id, profile="summary")
         summarized_answer = results.get('summarized_answer', 'No answer found.')
     except Exception as e:
         logger.error(f"Failed to retrieve summarized answer: {e}")
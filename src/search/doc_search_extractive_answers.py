@@ -1,34 +1,32 @@
-from src.utils.validate import extract_and_validate_entities
-from src.search.utils import extract_filename
-from src.search.utils import filtered_search
+from src.generate.context import build_context
+from src.search.pipeline import pipelined_filtered_search
 from src.generate.qa import generate_answer
 from src.config.logging import logger 
+from typing import Optional
 from typing import Dict 
 from typing import Any
     
 
-def get_top_extractive_answers(results: Dict[str, Any], n: int) -> str:
+def get_top_extractive_answers(results: Dict[str, Any], n: int, query: Optional[str] = None,
+                              max_tokens: Optional[int] = None) -> str:
     """
-    Retrieves the top N extractive answers from the search results.
+    Retrieves the extractive answers of the top N search results, packed into a token-budgeted context.
 
     Parameters:
     results (Dict[str, Any]): The dictionary containing the search results.
     n (int): The number of top results to retrieve.
+    query (Optional[str]): The user query, used to pick the most relevant answers when they exceed the budget.
+    max_tokens (Optional[int]): The token budget of the context. Defaults to `context.max_tokens`.
 
     Returns:
-    List[str]: A list of the top N extractive answers.
+    str: The extractive answers, each result followed by its reference.
     """
-    extractive_answers = []
     try:
-        # Retrieve up to N extractive answers if they exist
-        for info in results.get('match_info', [])[:n]:
-            source = extract_filename(info['link'])
-            extractive_answers.append('\n\n'.join(info.get('extractive_answers', 'No answer found')) + f' Ref:[{source}]')
+        return build_context(results, "extractive_answers", n, query, max_tokens)
     except Exception as e:
         # Handle any errors that might occur
         logger.error(f"Error retrieving extractive answers: {e}")
-
-    return '\n\n'.join(extractive_answers)
+        return ""
 
 
 if __name__ == "__main__":
@@ -36,9 +34,8 @@ if __name__ == "__main__":
     data_store_id = "quarterly-reports"
     # company = "amazon"
     # time_period = "Q4 2022"
-    company, time_period = extract_and_validate_entities(query)
-    results = filtered_search(query, company, time_period, data_store_id)
-    extractive_answers = get_top_extractive_answers(results, 1)
+    results, timings = pipelined_filtered_search(query, data_store_id, profile="extractive_answers")
+    extractive_answers = get_top_extractive_answers(results, 1, query)
     logger.info(f'Extractive answers: {extractive_answers}')
     ans = generate_answer(query, extractive_answers)
     logger.info(f'Ans: {ans}')
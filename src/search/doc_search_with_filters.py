@@ -1,5 +1,5 @@
+from src.search.semantic_cache import semantic_filtered_search
 from src.utils.validate import extract_and_validate_entities
-from src.search.utils import filtered_search
 from src.config.logging import logger
 
 
@@ -14,7 +14,7 @@ def get_filtered_summarized_answer(query: str, company: str, time_period: str, d
     :return: A dictionary containing the 'summarized_answer' and 'match_info'.
     """
     try:
-        results = filtered_search(query, company, time_period, data_store_id)
+        results = semantic_filtered_search(query, company, time_period, data_store_id, profile="summary")
         if 'summarized_answer' in results and 'match_info' in results:
             return {
                 'summarized_answer': results['summarized_answer'],
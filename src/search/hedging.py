@@ -0,0 +1,163 @@
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError
+from concurrent.futures import Future
+from src.config.setup import config
+from collections import deque
+from typing import Callable
+from typing import TypeVar
+from typing import Dict
+from typing import Set
+from typing import Any
+import concurrent.futures
+import numpy as np
+import threading
+import time
+
+
+T = TypeVar("T")
+
+
+class RequestHedger:
+    """
+    Sends a duplicate ("hedged") request when the first one is slower than usual and returns
+    whichever answers first.
+
+    The hedge delay is the `delay_percentile` of recently observed attempt latencies (never below
+    `min_delay_ms`, and exactly `min_delay_ms` until `min_samples` latencies have been seen). Hedges
+    are paid for from a budget: every request adds `max_hedge_rate` tokens (up to `max_hedge_burst`)
+    and every hedge spends one, so hedges never exceed that fraction of requests over time, even
+    when the backend as a whole slows down.
+
+    The losing attempt is not cancelled; it finishes in the background, bounded by the deadline.
+
+    Attributes:
+        delay_percentile (float): Percentile of recent latencies used as the hedge delay.
+        min_delay (float): Minimum hedge delay in seconds.
+        min_samples (int): Number of latencies needed before the percentile is used.
+        max_hedge_rate (float): Maximum fraction of requests that may be hedged.
+        max_hedge_burst (float): Maximum number of hedges that can be sent back to back.
+        stats (Dict[str, int]): Request, hedge, hedge win and budget exhaustion counters.
+    """
+
+    def __init__(self, delay_percentile: float = 90, min_delay_ms: float = 50, min_samples: int = 20,
+                 max_hedge_rate: float = 0.1, max_hedge_burst: float = 10, max_workers: int = 64,
+                 window: int = 1000) -> None:
+        """
+        Initializes the hedger with an empty latency window and a full hedge budget.
+
+        Args:
+            delay_percentile (float): Percentile of recent latencies used as the hedge delay.
+            min_delay_ms (float): Minimum hedge delay in milliseconds.
+            min_samples (int): Number of latencies needed before the percentile is used.
+            max_hedge_rate (float): Maximum fraction of requests that may be hedged.
+            max_hedge_burst (float): Maximum number of hedges that can be sent back to back.
+            max_workers (int): Number of threads running attempts.
+            window (int): Number of recent latencies kept.
+        """
+        self.delay_percentile = delay_percentile
+        self.min_delay = min_delay_ms / 1000.0
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.max_hedge_burst = max_hedge_burst
+        self.stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "budget_exhausted": 0}
+        self._budget = max_hedge_burst
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedged-search")
+
+    def hedge_delay(self) -> float:
+        """
+        Returns the current hedge delay in seconds.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.min_delay
+            latencies = np.asarray(self._latencies, dtype=np.float64)
+        return max(self.min_delay, float(np.percentile(latencies, self.delay_percentile)))
+
+    def _try_spend(self) -> bool:
+        with self._lock:
+            if self._budget >= 1.0:
+                self._budget -= 1.0
+                self.stats["hedges"] += 1
+                return True
+            self.stats["budget_exhausted"] += 1
+            return False
+
+    def _submit(self, attempt: Callable[[], T]) -> "Future[T]":
+        def timed() -> T:
+            start = time.monotonic()
+            result = attempt()
+            with self._lock:
+                self._latencies.append(time.monotonic() - start)
+            return result
+        return self._executor.submit(timed)
+
+    def call(self, attempt: Callable[[], T], timeout: float) -> T:
+        """
+        Runs `attempt`, hedging it once if it has not finished within the hedge delay.
+
+        `attempt` must be safe to run twice concurrently and should bound itself by the deadline
+        (e.g. by passing the remaining time as the gRPC timeout).
+
+        Args:
+            attempt (Callable[[], T]): Performs one request.
+            timeout (float): Deadline in seconds for the whole call.
+
+        Returns:
+            T: The result of the first attempt to succeed.
+
+        Raises:
+            TimeoutError: If no attempt finished before the deadline.
+            Exception: The error of the last attempt to fail, if all attempts failed.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self.stats["requests"] += 1
+            self._budget = min(self.max_hedge_burst, self._budget + self.max_hedge_rate)
+
+        primary = self._submit(attempt)
+        pending: Set[Future] = {primary}
+        done, pending = concurrent.futures.wait(pending, timeout=min(self.hedge_delay(), timeout))
+        if not done and self._try_spend():
+            pending.add(self._submit(attempt))
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Deadline of {timeout}s exceeded.")
+            done, pending = concurrent.futures.wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the observed hedge rate and the current hedge delay.
+
+        Returns:
+            Dict[str, Any]: The hedging statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hedge_rate"] = round(stats["hedges"] / stats["requests"], 4) if stats["requests"] else 0.0
+        stats["hedge_delay_ms"] = round(self.hedge_delay() * 1000.0, 3)
+        return stats
+
+
+search_hedger = RequestHedger(
+    delay_percentile=config.SEARCH['hedging']['delay_percentile'],
+    min_delay_ms=config.SEARCH['hedging']['min_delay_ms'],
+    min_samples=config.SEARCH['hedging']['min_samples'],
+    max_hedge_rate=config.SEARCH['hedging']['max_hedge_rate'],
+    max_hedge_burst=config.SEARCH['hedging']['max_hedge_burst'],
+    max_workers=2 * config.SEARCH['max_concurrency'],
+)
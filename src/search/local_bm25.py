@@ -0,0 +1,320 @@
+from src.search.records import MatchRecord
+from src.utils.text import tokenize
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Callable
+from typing import Optional
+from typing import Union
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import threading
+import json
+import re
+import os
+
+
+FILTER_CLAUSE_PATTERN = re.compile(r'^\s*(\w+)\s*:\s*ANY\((.*)\)\s*$')
+FILTER_VALUE_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"')
+UNIT_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\n")
+
+
+def parse_filter(filter_str: str) -> Dict[str, List[str]]:
+    """
+    Parses the subset of the Vertex AI Search filter syntax produced by `build_filter_str`,
+    i.e. `field: ANY("value", ...)` clauses joined by `AND`.
+
+    Args:
+        filter_str (str): The filter expression. An empty string means no filter.
+
+    Returns:
+        Dict[str, List[str]]: The accepted values per field.
+
+    Raises:
+        ValueError: If the expression uses unsupported syntax.
+    """
+    clauses = {}
+    if not filter_str.strip():
+        return clauses
+    for clause in re.split(r"\s+AND\s+", filter_str.strip()):
+        match = FILTER_CLAUSE_PATTERN.match(clause)
+        if match is None:
+            raise ValueError(f"Unsupported filter clause: {clause!r}")
+        values = FILTER_VALUE_PATTERN.findall(match.group(2))
+        if not values:
+            raise ValueError(f"Filter clause has no quoted values: {clause!r}")
+        clauses.setdefault(match.group(1), []).extend(value.replace('\\"', '"') for value in values)
+    return clauses
+
+
+def select_answers(passages: List[str], weights: Dict[str, float], max_answers: int) -> List[str]:
+    """
+    Picks the sentences (or table rows) of the passages that cover the most query term weight.
+
+    Args:
+        passages (List[str]): Passage texts, best first.
+        weights (Dict[str, float]): Weight of each query term.
+        max_answers (int): Maximum number of answers.
+
+    Returns:
+        List[str]: The answers, best first.
+    """
+    candidates: List[Tuple[float, int, str]] = []
+    for passage in passages:
+        for unit in UNIT_SPLIT_PATTERN.split(passage):
+            unit = unit.strip()
+            if not unit:
+                continue
+            weight = sum(weights.get(token, 0.0) for token in set(tokenize(unit)))
+            if weight > 0:
+                candidates.append((weight, -len(candidates), unit))
+    candidates.sort(reverse=True)
+    answers = []
+    for _, _, unit in candidates:
+        if unit not in answers:
+            answers.append(unit)
+        if len(answers) == max_answers:
+            break
+    return answers
+
+
+class PassageIndex:
+    """
+    The passage store shared by the local search backends.
+
+    Passages are grouped by document: the passages of document `d` are rows
+    `doc_chunk_offsets[d]:doc_chunk_offsets[d + 1]`, and passage texts are one UTF-8 blob
+    sliced by `chunk_text_offsets`. All arrays are opened with `mmap_mode='r'`, so loading is
+    cheap and the pages are shared between processes.
+
+    Attributes:
+        index_dir (str): Directory holding the index files.
+        documents (List[Dict[str, str]]): Per-document metadata (`id`, `title`, `uri`, `company`, `time_period`).
+        params (Dict[str, Any]): Build parameters written by the index builder.
+    """
+
+    # Arrays memory-mapped on load, in addition to the passage store below
+    ARRAYS: Tuple[str, ...] = ()
+    PASSAGE_ARRAYS = ("chunk_doc", "chunk_page", "doc_chunk_offsets", "chunk_text", "chunk_text_offsets")
+
+    def __init__(self, index_dir: str) -> None:
+        """
+        Opens the passage store and the backend arrays in `index_dir`.
+
+        Args:
+            index_dir (str): Directory holding the index files.
+        """
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "documents.json")) as file:
+            self.documents: List[Dict[str, str]] = json.load(file)
+        with open(os.path.join(index_dir, "params.json")) as file:
+            self.params: Dict[str, Any] = json.load(file)
+        for name in self.PASSAGE_ARRAYS + self.ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r"))
+
+    def passage_text(self, chunk: int) -> str:
+        return bytes(self.chunk_text[self.chunk_text_offsets[chunk]:self.chunk_text_offsets[chunk + 1]]).decode("utf-8")
+
+    def document_mask(self, filter_str: str) -> Optional[np.ndarray]:
+        """
+        Evaluates a filter expression against the document metadata.
+
+        Args:
+            filter_str (str): Filter expression (see `parse_filter`).
+
+        Returns:
+            Optional[np.ndarray]: Boolean mask of the accepted documents, or None when there is no filter.
+        """
+        filters = parse_filter(filter_str)
+        if not filters:
+            return None
+        mask = np.ones(len(self.documents), dtype=bool)
+        for field, values in filters.items():
+            accepted = set(values)
+            mask &= np.fromiter((document.get(field) in accepted for document in self.documents), dtype=bool,
+                                count=len(self.documents))
+        return mask
+
+    def build_records(self, scores: np.ndarray, weights: Dict[str, float], page_size: int, max_answers: int,
+                      max_segments: int, min_score: float) -> List[MatchRecord]:
+        """
+        Ranks documents by their best passage and builds a match record for each.
+
+        Args:
+            scores (np.ndarray): One score per passage.
+            weights (Dict[str, float]): Query term weights used to pick extractive answers.
+            page_size (int): Number of documents to return.
+            max_answers (int): Extractive answers per document.
+            max_segments (int): Extractive segments (best passages) per document.
+            min_score (float): Passages must score strictly above this to count as matches.
+
+        Returns:
+            List[MatchRecord]: The matching documents, best first.
+        """
+        # Every indexed document has at least one passage, so each reduceat segment is non-empty
+        document_scores = np.maximum.reduceat(scores, np.asarray(self.doc_chunk_offsets[:-1]))
+        ranked = [int(doc) for doc in np.argsort(-document_scores, kind="stable")[:page_size]
+                  if document_scores[doc] > min_score]
+
+        records = []
+        for doc in ranked:
+            start, end = int(self.doc_chunk_offsets[doc]), int(self.doc_chunk_offsets[doc + 1])
+            best = start + np.argsort(-scores[start:end], kind="stable")[:max_segments]
+            passages = [self.passage_text(int(chunk)) for chunk in best if scores[chunk] > min_score]
+            document = self.documents[doc]
+            records.append(MatchRecord(
+                id=document["id"],
+                title=document["title"],
+                link=document["uri"],
+                company=document["company"],
+                time_period=document["time_period"],
+                extractive_answers=select_answers(passages, weights, max_answers),
+                extractive_segments=passages,
+            ))
+        return records
+
+
+class LocalBM25Index(PassageIndex):
+    """
+    A persisted, memory-mapped inverted index over document passages, scored with Okapi BM25.
+
+    Postings are stored in CSR layout: the postings of term `t` are
+    `postings_chunk[term_offsets[t]:term_offsets[t + 1]]` with matching term frequencies in
+    `postings_tf`.
+
+    Attributes:
+        vocabulary (Dict[str, int]): Term to term id.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    ARRAYS = ("term_offsets", "postings_chunk", "postings_tf", "idf", "chunk_lengths")
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Opens an index written by `src.index.create_local_index`.
+
+        Args:
+            index_dir (str): Directory holding the index files.
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        super().__init__(index_dir)
+        self.k1 = k1
+        self.b = b
+        with open(os.path.join(index_dir, "vocabulary.json")) as file:
+            self.vocabulary: Dict[str, int] = json.load(file)
+        # The per-passage BM25 length norm only depends on k1/b, so it is computed once
+        avg_length = self.params["avg_length"]
+        self._length_norm = (k1 * (1.0 - b + b * np.asarray(self.chunk_lengths) / avg_length)).astype(np.float32)
+
+    def score(self, terms: List[int], document_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Computes the BM25 score of every passage for a set of query terms.
+
+        Args:
+            terms (List[int]): Distinct query term ids.
+            document_mask (Optional[np.ndarray]): Boolean mask of the documents allowed by the filter.
+
+        Returns:
+            np.ndarray: One score per passage; passages of filtered-out documents score 0.
+        """
+        scores = np.zeros(len(self.chunk_lengths), dtype=np.float32)
+        for term in terms:
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            chunks = self.postings_chunk[start:end]
+            tf = self.postings_tf[start:end]
+            # Each passage appears at most once in a term's postings, so fancy-index accumulation is safe
+            scores[chunks] += self.idf[term] * tf * (self.k1 + 1.0) / (tf + self._length_norm[chunks])
+        if document_mask is not None:
+            scores[~document_mask[self.chunk_doc]] = 0.0
+        return scores
+
+    def search(self, query: str, filter_str: str = "", page_size: int = 5, max_answers: int = 3,
+               max_segments: int = 3) -> List[MatchRecord]:
+        """
+        Ranks documents by their best BM25 passage and builds a match record for each.
+
+        Args:
+            query (str): The search query.
+            filter_str (str): Filter expression (see `parse_filter`).
+            page_size (int): Number of documents to return.
+            max_answers (int): Extractive answers per document.
+            max_segments (int): Extractive segments (best passages) per document.
+
+        Returns:
+            List[MatchRecord]: The matching documents, best first.
+        """
+        weights = {token: float(self.idf[self.vocabulary[token]]) for token in tokenize(query) if token in self.vocabulary}
+        if not weights:
+            return []
+        scores = self.score([self.vocabulary[token] for token in weights], self.document_mask(filter_str))
+        return self.build_records(scores, weights, page_size, max_answers, max_segments, min_score=0.0)
+
+
+_indexes: Dict[str, Tuple[float, PassageIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_cached_index(index_dir: str, factory: Callable[[str], PassageIndex]) -> PassageIndex:
+    """
+    Returns the opened index in `index_dir`, reopening it when it has been rebuilt on disk.
+
+    Args:
+        index_dir (str): Directory holding the index files.
+        factory (Callable[[str], PassageIndex]): Opens the index given its directory.
+
+    Returns:
+        PassageIndex: The index.
+    """
+    # params.json is written last by the builders, so its mtime identifies a complete index
+    version = os.stat(os.path.join(index_dir, "params.json")).st_mtime
+    with _indexes_lock:
+        cached = _indexes.get(index_dir)
+        if cached is None or cached[0] != version:
+            cached = (version, factory(index_dir))
+            _indexes[index_dir] = cached
+            logger.info(f"Opened {type(cached[1]).__name__} in {index_dir} ({len(cached[1].documents)} documents).")
+        return cached[1]
+
+
+def get_local_index(data_store_id: str) -> LocalBM25Index:
+    """
+    Returns the opened BM25 index for a data store.
+
+    Args:
+        data_store_id (str): The data store the index was built for.
+
+    Returns:
+        LocalBM25Index: The index.
+    """
+    settings = config.LOCAL_SEARCH
+    index_dir = os.path.join(settings['index_dir'], data_store_id)
+    return get_cached_index(index_dir, lambda path: LocalBM25Index(path, k1=settings['k1'], b=settings['b']))
+
+
+def local_search_data_store(search_query: str, filter_str: str, data_store_id: str,
+                            page_size: int = 5) -> List[Union[str, MatchRecord]]:
+    """
+    Searches the local BM25 index and returns results in the shape of `extract_relevant_data`.
+
+    There is no server-side summarization, so the summary is always empty.
+
+    Args:
+        search_query (str): The search query string.
+        filter_str (str): Filter string for the query. An empty string disables filtering.
+        data_store_id (str): The data store the index was built for.
+        page_size (int): Number of documents to return.
+
+    Returns:
+        List[Union[str, MatchRecord]]: An empty summary followed by one match record per result.
+                                       Empty if the search failed.
+    """
+    try:
+        index = get_local_index(data_store_id)
+        return ["", *index.search(search_query, filter_str, page_size)]
+    except Exception as e:
+        logger.error(f"Error during local BM25 search: {e}")
+        return []
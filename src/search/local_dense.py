@@ -0,0 +1,179 @@
+from src.search.local_bm25 import get_cached_index
+from src.search.local_bm25 import PassageIndex
+from src.search.records import MatchRecord
+from src.utils.text import tokenize
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Union
+from typing import List
+import numpy as np
+import os
+
+
+class LocalDenseIndex(PassageIndex):
+    """
+    A memory-mapped matrix of quantized, L2-normalized passage embeddings.
+
+    `vectors` is stored as float16, or as int8 with one float32 scale per row
+    (`vector ≈ vectors[row] * scales[row]`). Queries are answered with blocked NumPy dot
+    products, so only one block is ever dequantized at a time.
+
+    Indexes built over a large corpus also carry an IVF coarse quantizer: passages are grouped
+    into lists by their nearest centroid (`list_rows[list_offsets[l]:list_offsets[l + 1]]`) and a
+    query only scans the `nprobe` lists whose centroids are closest to it.
+
+    Metadata filters are applied before scoring: only passages of accepted documents are scanned,
+    exhaustively when the filter leaves fewer passages than the probed IVF lists would hold.
+
+    Attributes:
+        nprobe (int): Number of IVF lists scanned per query.
+        block_rows (int): Number of rows dequantized and scored at a time.
+    """
+
+    ARRAYS = ("vectors",)
+
+    def __init__(self, index_dir: str, nprobe: int = 16, block_rows: int = 65536) -> None:
+        """
+        Opens an index written by `src.index.create_dense_index`.
+
+        Args:
+            index_dir (str): Directory holding the index files.
+            nprobe (int): Number of IVF lists scanned per query.
+            block_rows (int): Number of rows dequantized and scored at a time.
+        """
+        super().__init__(index_dir)
+        self.nprobe = nprobe
+        self.block_rows = block_rows
+        self.scales = self._load("scales") if self.params["dtype"] == "int8" else None
+        if self.params["ivf"]:
+            self.centroids = np.asarray(self._load("centroids"))
+            self.list_offsets = self._load("list_offsets")
+            self.list_rows = self._load("list_rows")
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode="r")
+
+    def score_rows(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Computes the cosine similarity between the query and a set of passages.
+
+        Args:
+            query (np.ndarray): The L2-normalized query embedding.
+            rows (Optional[np.ndarray]): Sorted passage rows to score, or None for all passages.
+
+        Returns:
+            np.ndarray: One similarity per scored row.
+        """
+        num_rows = len(self.vectors) if rows is None else len(rows)
+        similarities = np.empty(num_rows, dtype=np.float32)
+        for start in range(0, num_rows, self.block_rows):
+            end = min(start + self.block_rows, num_rows)
+            block_rows = slice(start, end) if rows is None else rows[start:end]
+            block = np.asarray(self.vectors[block_rows], dtype=np.float32)
+            block_similarities = block @ query
+            if self.scales is not None:
+                block_similarities *= self.scales[block_rows]
+            similarities[start:end] = block_similarities
+        return similarities
+
+    def candidate_rows(self, query: np.ndarray, document_mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Selects the passages to scan: the probed IVF lists (if any), restricted to accepted documents.
+
+        Args:
+            query (np.ndarray): The L2-normalized query embedding.
+            document_mask (Optional[np.ndarray]): Boolean mask of the documents allowed by the filter.
+
+        Returns:
+            Optional[np.ndarray]: Sorted passage rows, or None to scan every passage.
+        """
+        filtered_rows = None
+        if document_mask is not None:
+            filtered_rows = np.flatnonzero(document_mask[self.chunk_doc])
+        if not self.params["ivf"]:
+            return filtered_rows
+
+        # A selective filter leaves fewer passages than the probed lists would hold: scan them exactly
+        expected_scan = len(self.vectors) * min(self.nprobe, len(self.centroids)) / len(self.centroids)
+        if filtered_rows is not None and len(filtered_rows) <= expected_scan:
+            return filtered_rows
+        lists = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        rows = np.sort(np.concatenate([self.list_rows[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists]))
+        if document_mask is not None:
+            rows = rows[document_mask[self.chunk_doc[rows]]]
+        return rows
+
+    def search_vector(self, embedding: List[float], query: str, filter_str: str = "", page_size: int = 5,
+                      max_answers: int = 3, max_segments: int = 3) -> List[MatchRecord]:
+        """
+        Ranks documents by their most similar passage and builds a match record for each.
+
+        Args:
+            embedding (List[float]): The query embedding.
+            query (str): The search query, used to pick extractive answers within the best passages.
+            filter_str (str): Filter expression (see `src.search.local_bm25.parse_filter`).
+            page_size (int): Number of documents to return.
+            max_answers (int): Extractive answers per document.
+            max_segments (int): Extractive segments (best passages) per document.
+
+        Returns:
+            List[MatchRecord]: The matching documents, best first.
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+
+        rows = self.candidate_rows(vector, self.document_mask(filter_str))
+        if rows is None:
+            scores = self.score_rows(vector)
+        else:
+            scores = np.full(len(self.vectors), -np.inf, dtype=np.float32)
+            scores[rows] = self.score_rows(vector, rows)
+        weights = {token: 1.0 for token in tokenize(query)}
+        return self.build_records(scores, weights, page_size, max_answers, max_segments, min_score=-np.inf)
+
+
+def get_dense_index(data_store_id: str) -> LocalDenseIndex:
+    """
+    Returns the opened dense index for a data store.
+
+    Args:
+        data_store_id (str): The data store the index was built for.
+
+    Returns:
+        LocalDenseIndex: The index.
+    """
+    settings = config.LOCAL_DENSE
+    index_dir = os.path.join(settings['index_dir'], data_store_id)
+    return get_cached_index(index_dir, lambda path: LocalDenseIndex(path, nprobe=settings['nprobe']))
+
+
+def dense_search_data_store(search_query: str, filter_str: str, data_store_id: str,
+                            page_size: int = 5) -> List[Union[str, MatchRecord]]:
+    """
+    Searches the local dense index and returns results in the shape of `extract_relevant_data`.
+
+    The query is embedded with the configured text embedding model; there is no server-side
+    summarization, so the summary is always empty.
+
+    Args:
+        search_query (str): The search query string.
+        filter_str (str): Filter string for the query. An empty string disables filtering.
+        data_store_id (str): The data store the index was built for.
+        page_size (int): Number of documents to return.
+
+    Returns:
+        List[Union[str, MatchRecord]]: An empty summary followed by one match record per result.
+                                       Empty if the search failed.
+    """
+    # Imported here so that selecting another backend does not load the embedding model
+    from src.eval.semantic_similarity import embed_text
+
+    try:
+        index = get_dense_index(data_store_id)
+        embedding = embed_text([search_query], task="RETRIEVAL_QUERY")[0]
+        return ["", *index.search_vector(embedding, search_query, filter_str, page_size)]
+    except Exception as e:
+        logger.error(f"Error during local dense search: {e}")
+        return []
@@ -0,0 +1,181 @@
+from src.utils.validate import extract_and_validate_entities
+from src.search.routing import routed_filtered_search
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from src.config.logging import logger
+from src.config.setup import config
+from src.search.utils import search
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import Any
+import concurrent.futures
+import threading
+import time
+
+
+class QueryPipeline:
+    """
+    Overlaps entity extraction with search for queries that need a company/time period filter.
+
+    An unfiltered search is launched speculatively as soon as the query arrives, while the
+    entities are extracted and validated. Once they are known:
+
+    - if validation failed, the speculative result is used (the sequential flow would have failed);
+    - if the speculative result has already arrived and its top `match_top_k` hits belong to the
+      extracted company and time period, it is used, restricted to those hits;
+    - otherwise the filtered search is issued, and the speculative result is still used if it
+      arrives first and matches.
+
+    Attributes:
+        match_top_k (int): Number of top speculative hits that must match the entities for reuse.
+        stats (Dict[str, int]): Counters per outcome ("speculative_fallback", "speculative_match", "filtered").
+    """
+
+    def __init__(self, match_top_k: int = 1, max_workers: int = 8) -> None:
+        """
+        Initializes the pipeline.
+
+        Args:
+            match_top_k (int): Number of top speculative hits that must match the entities for reuse.
+            max_workers (int): Number of threads running searches.
+        """
+        self.match_top_k = match_top_k
+        self.stats = {"queries": 0, "speculative_fallback": 0, "speculative_match": 0, "filtered": 0}
+        self._savings = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query-pipeline")
+
+    def _timed(self, fn: Callable[[], Dict[str, Any]]) -> "Future[Tuple[Dict[str, Any], float]]":
+        def run() -> Tuple[Dict[str, Any], float]:
+            start = time.perf_counter()
+            return fn(), time.perf_counter() - start
+        return self._executor.submit(run)
+
+    def _matching(self, results: Dict[str, Any], company: str, time_period: str) -> Optional[Dict[str, Any]]:
+        """
+        Restricts a speculative result to the hits of the company and time period, if its top hits all match.
+        """
+        match_info = results.get('match_info', [])
+        top = match_info[:self.match_top_k]
+        if not top or any(info['company'] != company or info['time_period'] != time_period for info in top):
+            return None
+        matching = [info for info in match_info if info['company'] == company and info['time_period'] == time_period]
+        if len(matching) < len(match_info) and results.get('summarized_answer'):
+            # The summary may draw on the hits of other documents
+            return None
+        return {"summarized_answer": results.get('summarized_answer', ""),
+                "match_info": [{**info, "rank": rank} for rank, info in enumerate(matching, start=1)]}
+
+    def run(self, query: str, data_store_id: str, profile: str = "extractive_answers", timeout: Optional[float] = None,
+            filtered: Callable[..., Dict[str, Any]] = routed_filtered_search,
+            on_entities: Optional[Callable[[Optional[str], Optional[str]], None]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Extracts the entities of a query and searches the data store with the matching filter.
+
+        Args:
+            query (str): The query used for searching the data store.
+            data_store_id (str): Vertex AI Search Data Store ID.
+            profile (str): Name of the search profile (see `src.search.profiles`).
+            timeout (Optional[float]): Deadline in seconds for each search. Defaults to `search.timeout_seconds`.
+            filtered (Callable[..., Dict[str, Any]]): The filtered search, with the signature of `filtered_search`.
+            on_entities (Optional[Callable[[Optional[str], Optional[str]], None]]): Called with the company and
+                time period as soon as they are validated (both None if validation failed), before the search completes.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: The consolidated search results, and the timings of the
+            query: outcome, entity extraction, search and total seconds, the estimated latency of the
+            sequential flow and the savings over it.
+        """
+        start = time.perf_counter()
+        speculative = self._timed(lambda: search(query, data_store_id, profile, timeout))
+
+        try:
+            company, time_period = extract_and_validate_entities(query)
+        except ValueError as e:
+            logger.warning(f"Entity validation failed, using the unfiltered search: {e}")
+            company = time_period = None
+        ner_seconds = time.perf_counter() - start
+        if on_entities is not None:
+            on_entities(company, time_period)
+
+        if company is None:
+            outcome = "speculative_fallback"
+            results, search_seconds = speculative.result()
+        else:
+            results = None
+            if speculative.done():
+                speculative_results, search_seconds = speculative.result()
+                results = self._matching(speculative_results, company, time_period)
+            if results is not None:
+                outcome = "speculative_match"
+            else:
+                outcome = "filtered"
+                pending = {self._timed(lambda: filtered(query, company, time_period, data_store_id, profile, timeout))}
+                if not speculative.done():
+                    pending.add(speculative)
+                while results is None:
+                    done, pending = concurrent.futures.wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future_results, search_seconds = future.result()
+                        if future is not speculative:
+                            results = future_results
+                            break
+                        results = self._matching(future_results, company, time_period)
+                        if results is not None:
+                            outcome = "speculative_match"
+                            break
+
+        total_seconds = time.perf_counter() - start
+        # Without the pipeline, the search would have started once the entities were known
+        sequential_seconds = ner_seconds + search_seconds
+        timings = {
+            "outcome": outcome,
+            "ner_seconds": round(ner_seconds, 4),
+            "search_seconds": round(search_seconds, 4),
+            "total_seconds": round(total_seconds, 4),
+            "sequential_seconds": round(sequential_seconds, 4),
+            "savings_seconds": round(sequential_seconds - total_seconds, 4),
+        }
+        with self._lock:
+            self.stats["queries"] += 1
+            self.stats[outcome] += 1
+            self._savings += sequential_seconds - total_seconds
+        logger.info(f"Query pipeline: {timings}")
+        return results, timings
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the outcome counters along with the average latency savings per query.
+
+        Returns:
+            Dict[str, Any]: The pipeline statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            savings = self._savings
+        stats["mean_savings_seconds"] = round(savings / stats["queries"], 4) if stats["queries"] else 0.0
+        return stats
+
+
+query_pipeline = QueryPipeline(match_top_k=config.SEARCH['pipeline']['match_top_k'],
+                               max_workers=config.SEARCH['pipeline']['max_workers'])
+
+
+def pipelined_filtered_search(query: str, data_store_id: str, profile: str = "extractive_answers",
+                              timeout: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Extracts the entities of a query and runs the routed filtered search, overlapped with a speculative unfiltered search.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds for each search. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Tuple[Dict[str, Any], Dict[str, Any]]: The consolidated search results and the timings of the query.
+    """
+    return query_pipeline.run(query, data_store_id, profile, timeout)
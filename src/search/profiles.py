@@ -0,0 +1,133 @@
+from google.cloud import discoveryengine_v1beta as discoveryengine
+from typing import Optional
+from typing import Dict
+import hashlib
+
+
+ContentSearchSpec = discoveryengine.SearchRequest.ContentSearchSpec
+
+
+class SearchProfile:
+    """
+    A named, precompiled search request template that asks only for what a caller consumes.
+
+    The template holds everything except the serving config, query, filter and page token, and is
+    built once at import. `fingerprint` identifies the template and is part of every search cache key.
+
+    Attributes:
+        name (str): The profile name.
+        template (discoveryengine.SearchRequest): The request template.
+        fingerprint (str): SHA-1 of the serialized template.
+    """
+
+    __slots__ = ("name", "template", "fingerprint")
+
+    def __init__(self, name: str, content_search_spec: ContentSearchSpec, page_size: int = 5) -> None:
+        """
+        Initializes the profile and precompiles its request template.
+
+        Args:
+            name (str): The profile name.
+            content_search_spec (ContentSearchSpec): What the API should generate for each response.
+            page_size (int): Number of results per page.
+        """
+        self.name = name
+        self.template = discoveryengine.SearchRequest(
+            page_size=page_size,
+            content_search_spec=content_search_spec,
+            query_expansion_spec=discoveryengine.SearchRequest.QueryExpansionSpec(
+                condition=discoveryengine.SearchRequest.QueryExpansionSpec.Condition.AUTO,
+            ),
+            spell_correction_spec=discoveryengine.SearchRequest.SpellCorrectionSpec(
+                mode=discoveryengine.SearchRequest.SpellCorrectionSpec.Mode.AUTO
+            ),
+        )
+        self.fingerprint = hashlib.sha1(discoveryengine.SearchRequest.serialize(self.template)).hexdigest()
+
+    def build_request(self, serving_config: str, query: str, filter_str: str,
+                      page_size: Optional[int] = None, page_token: str = "") -> discoveryengine.SearchRequest:
+        """
+        Builds a search request from the template.
+
+        Args:
+            serving_config (str): The serving config resource name.
+            query (str): The search query string.
+            filter_str (str): Filter string for the query.
+            page_size (Optional[int]): Overrides the profile's page size.
+            page_token (str): Token of the page to fetch.
+
+        Returns:
+            discoveryengine.SearchRequest: The search request.
+        """
+        template = discoveryengine.SearchRequest.pb(self.template)
+        pb = type(template)()
+        pb.CopyFrom(template)
+        pb.serving_config = serving_config
+        pb.query = query
+        pb.filter = filter_str
+        if page_size is not None:
+            pb.page_size = page_size
+        if page_token:
+            pb.page_token = page_token
+        return discoveryengine.SearchRequest.wrap(pb)
+
+
+def _extractive_spec(answers: int, segments: int) -> ContentSearchSpec.ExtractiveContentSpec:
+    return ContentSearchSpec.ExtractiveContentSpec(
+        max_extractive_answer_count=answers,
+        max_extractive_segment_count=segments,
+    )
+
+
+_SUMMARY_SPEC = ContentSearchSpec.SummarySpec(
+    summary_result_count=5,
+    include_citations=True,
+    ignore_adversarial_query=False,
+    ignore_non_summary_seeking_query=False,
+)
+
+# snippets are NOT important in the context of this use case
+_NO_SNIPPET_SPEC = ContentSearchSpec.SnippetSpec(return_snippet=False)
+
+PROFILES: Dict[str, SearchProfile] = {
+    # Summary plus extractive answers and segments: the original, everything-on request
+    "default": SearchProfile("default", ContentSearchSpec(
+        snippet_spec=_NO_SNIPPET_SPEC,
+        extractive_content_spec=_extractive_spec(3, 3),
+        summary_spec=_SUMMARY_SPEC,
+    )),
+    "summary": SearchProfile("summary", ContentSearchSpec(
+        snippet_spec=_NO_SNIPPET_SPEC,
+        summary_spec=_SUMMARY_SPEC,
+    )),
+    "extractive_answers": SearchProfile("extractive_answers", ContentSearchSpec(
+        snippet_spec=_NO_SNIPPET_SPEC,
+        extractive_content_spec=_extractive_spec(3, 0),
+    )),
+    "extractive_segments": SearchProfile("extractive_segments", ContentSearchSpec(
+        snippet_spec=_NO_SNIPPET_SPEC,
+        extractive_content_spec=_extractive_spec(0, 3),
+    )),
+    "retrieval_only": SearchProfile("retrieval_only", ContentSearchSpec(
+        snippet_spec=_NO_SNIPPET_SPEC,
+    )),
+}
+
+
+def get_profile(name: str) -> SearchProfile:
+    """
+    Looks up a search profile by name.
+
+    Args:
+        name (str): One of `default`, `summary`, `extractive_answers`, `extractive_segments`, `retrieval_only`.
+
+    Returns:
+        SearchProfile: The profile.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown search profile '{name}'. Available profiles: {', '.join(PROFILES)}")
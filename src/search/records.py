@@ -0,0 +1,121 @@
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+
+
+class MatchRecord:
+    """
+    A compact, slotted record of one search result.
+
+    Records support read access by key (`record["title"]`, `record.get("link")`) so they can be
+    used wherever the per-result dicts were used before.
+
+    Attributes:
+        id (str): Document ID.
+        title (str): Document title.
+        link (str): Document URI.
+        company (str): Company metadata.
+        time_period (str): Time period metadata.
+        extractive_answers (List[str]): Extractive answer contents.
+        extractive_segments (List[str]): Extractive segment contents.
+    """
+
+    __slots__ = ("id", "title", "link", "company", "time_period", "extractive_answers", "extractive_segments")
+
+    def __init__(self, id: str = "", title: str = "", link: str = "", company: str = "", time_period: str = "",
+                 extractive_answers: Optional[List[str]] = None, extractive_segments: Optional[List[str]] = None) -> None:
+        """
+        Initializes the record; missing fields default to empty values.
+        """
+        self.id = id
+        self.title = title
+        self.link = link
+        self.company = company
+        self.time_period = time_period
+        self.extractive_answers = extractive_answers if extractive_answers is not None else []
+        self.extractive_segments = extractive_segments if extractive_segments is not None else []
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __repr__(self) -> str:
+        return f"MatchRecord(id={self.id!r}, company={self.company!r}, time_period={self.time_period!r}, link={self.link!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the record to a plain dictionary.
+
+        Returns:
+            Dict[str, Any]: The record fields.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def get_string(fields: Any, key: str) -> str:
+    """
+    Reads a string field from a protobuf Struct's fields map without converting the Struct.
+
+    Args:
+        fields (Any): The `fields` map of a `google.protobuf.Struct`.
+        key (str): The field name.
+
+    Returns:
+        str: The string value, or an empty string if the field is missing.
+    """
+    value = fields.get(key)
+    return value.string_value if value is not None else ""
+
+
+def get_contents(fields: Any, key: str) -> List[str]:
+    """
+    Reads the `content` of every struct in a list field, e.g. `extractive_answers`.
+
+    Args:
+        fields (Any): The `fields` map of a `google.protobuf.Struct`.
+        key (str): The name of the list field.
+
+    Returns:
+        List[str]: The contents, in order.
+    """
+    value = fields.get(key)
+    if value is None:
+        return []
+    contents = []
+    for item in value.list_value.values:
+        content = item.struct_value.fields.get("content")
+        if content is not None:
+            contents.append(content.string_value)
+    return contents
+
+
+def document_to_record(document: Any) -> MatchRecord:
+    """
+    Builds a match record straight from a raw `Document` protobuf, reading only the fields we use.
+
+    Args:
+        document (Any): The raw (`_pb`) Discovery Engine document message.
+
+    Returns:
+        MatchRecord: The match record.
+    """
+    struct_fields = document.struct_data.fields
+    derived_fields = document.derived_struct_data.fields
+    return MatchRecord(
+        id=document.id,
+        title=get_string(derived_fields, "title"),
+        link=get_string(derived_fields, "link"),
+        company=get_string(struct_fields, "company"),
+        time_period=get_string(struct_fields, "time_period"),
+        extractive_answers=get_contents(derived_fields, "extractive_answers"),
+        extractive_segments=get_contents(derived_fields, "extractive_segments"),
+    )
@@ -0,0 +1,245 @@
+from src.search.local_bm25 import local_search_data_store
+from src.search.utils import create_summary_dict
+from src.search.utils import build_filter_str
+from src.search.utils import filtered_search
+from src.utils.facets import facet_catalog
+from src.utils.text import tokenize
+from src.config.logging import logger
+from src.config.setup import config
+from collections import OrderedDict
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+import threading
+
+
+# Profiles whose callers only read extractive content; the summary profiles always take the full search
+FAST_PATH_PROFILES = frozenset({"extractive_answers", "extractive_segments", "retrieval_only"})
+
+
+class DocumentPassageCache:
+    """
+    Remembers, per document, the extractive answers and segments returned by earlier searches.
+
+    A later query routed to the same document is served from these passages when they cover
+    enough of its terms, so no search is needed.
+
+    Attributes:
+        max_passages (int): Maximum number of answers and of segments kept per document.
+    """
+
+    def __init__(self, max_passages: int) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_passages (int): Maximum number of answers and of segments kept per document.
+        """
+        self.max_passages = max_passages
+        self._documents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, data_store_id: str, info: Dict[str, Any]) -> None:
+        """
+        Adds the passages of one `match_info` entry.
+
+        Args:
+            data_store_id (str): Vertex AI Search Data Store ID.
+            info (Dict[str, Any]): A `match_info` entry from `create_summary_dict`.
+        """
+        with self._lock:
+            entry = self._documents.setdefault((data_store_id, info['id']), {
+                "info": {key: info[key] for key in ("id", "title", "link", "company", "time_period")},
+                "extractive_answers": OrderedDict(),
+                "extractive_segments": OrderedDict(),
+            })
+            for field in ("extractive_answers", "extractive_segments"):
+                passages = entry[field]
+                for passage in info.get(field, []):
+                    passages[passage] = None
+                    passages.move_to_end(passage)
+                while len(passages) > self.max_passages:
+                    passages.popitem(last=False)
+
+    @staticmethod
+    def _select(passages: List[str], terms: Set[str], limit: int) -> Tuple[List[str], Set[str]]:
+        scored = []
+        for position, passage in enumerate(passages):
+            matched = terms.intersection(tokenize(passage))
+            if matched:
+                scored.append((-len(matched), position, passage, matched))
+        scored.sort()
+        selected = scored[:limit]
+        covered = set().union(*(matched for _, _, _, matched in selected)) if selected else set()
+        return [passage for _, _, passage, _ in selected], covered
+
+    def lookup(self, data_store_id: str, document_id: str, terms: Set[str], min_coverage: float,
+               max_answers: int = 3, max_segments: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Builds a `match_info` entry from the cached passages that best match the query terms.
+
+        Args:
+            data_store_id (str): Vertex AI Search Data Store ID.
+            document_id (str): The document the query was routed to.
+            terms (Set[str]): The query terms (see `src.utils.text.tokenize`).
+            min_coverage (float): Fraction of the query terms the selected passages must contain.
+            max_answers (int): Maximum number of extractive answers.
+            max_segments (int): Maximum number of extractive segments.
+
+        Returns:
+            Optional[Dict[str, Any]]: The entry, or None when the cache does not cover the query.
+        """
+        if not terms:
+            return None
+        with self._lock:
+            entry = self._documents.get((data_store_id, document_id))
+            if entry is None:
+                return None
+            answers = list(entry["extractive_answers"])
+            segments = list(entry["extractive_segments"])
+            info = dict(entry["info"])
+
+        selected_answers, answer_terms = self._select(answers, terms, max_answers)
+        selected_segments, segment_terms = self._select(segments, terms, max_segments)
+        if len(answer_terms | segment_terms) < min_coverage * len(terms):
+            return None
+        return {"rank": 1, **info, "extractive_answers": selected_answers, "extractive_segments": selected_segments}
+
+
+class SearchRouter:
+    """
+    Routes filtered searches whose company/time period filter selects a single document.
+
+    Such queries are served from the per-document passage cache when it covers them, then, when
+    `routing.document_lookup` is `local_bm25`, from a one-result lookup in the local BM25 index.
+    Everything else, including lookups that find nothing, takes the regular `filtered_search`,
+    which honours `search.backend` and the search cache. Only passage cache hits and local
+    lookups count as the fast path.
+
+    Attributes:
+        document_cache (DocumentPassageCache): Passages seen per document.
+        stats (Dict[str, int]): Query, single-document, cache hit, document lookup, lookup fallback
+            and full search counters.
+    """
+
+    def __init__(self, document_cache: DocumentPassageCache) -> None:
+        """
+        Initializes the router.
+
+        Args:
+            document_cache (DocumentPassageCache): Passages seen per document.
+        """
+        self.document_cache = document_cache
+        self.stats = {"queries": 0, "single_document": 0, "cache_hits": 0, "document_lookups": 0,
+                      "lookup_fallbacks": 0, "full_searches": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, *counters: str) -> None:
+        with self._lock:
+            for counter in counters:
+                self.stats[counter] += 1
+
+    def _remember(self, data_store_id: str, results: Dict[str, Any]) -> None:
+        for info in results.get('match_info', []):
+            self.document_cache.add(data_store_id, info)
+
+    def document_lookup(self, query: str, filter_str: str, data_store_id: str) -> Dict[str, Any]:
+        """
+        Fetches only the best result for a filter that selects a single document, from the local BM25 index.
+
+        Returns:
+            Dict[str, Any]: The consolidated result, or an empty dictionary if an error occurs.
+        """
+        try:
+            return create_summary_dict(local_search_data_store(query, filter_str, data_store_id, page_size=1))
+        except Exception as e:
+            logger.error(f"Error executing document lookup: {e}")
+            return {}
+
+    def filtered_search(self, query: str, company: str, time_period: str, data_store_id: str,
+                        profile: str = "extractive_answers", timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Drop-in replacement for `filtered_search` that takes the fast path for single-document filters.
+
+        Parameters:
+        query (str): The query used for searching the data store.
+        company (str): The company name.
+        time_period (str): The time period.
+        data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): Name of the search profile (see `src.search.profiles`).
+        timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+        Returns:
+        Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                        Returns an empty dictionary if an error occurs.
+        """
+        self._count("queries")
+        document = None
+        if config.ROUTING['enabled'] and profile in FAST_PATH_PROFILES:
+            document = facet_catalog.resolve_single_document(company, time_period)
+
+        if document is None:
+            self._count("full_searches")
+            results = filtered_search(query, company, time_period, data_store_id, profile, timeout)
+            self._remember(data_store_id, results)
+            return results
+
+        self._count("single_document")
+        # The facet values themselves say nothing about which passage answers the query
+        terms = set(tokenize(query)) - set(tokenize(f"{company} {time_period}"))
+        cached = self.document_cache.lookup(data_store_id, document['id'], terms, config.ROUTING['min_coverage'])
+        if cached is not None:
+            self._count("cache_hits")
+            return {"summarized_answer": "", "match_info": [cached]}
+
+        if config.ROUTING['document_lookup'] == "local_bm25":
+            results = self.document_lookup(query, build_filter_str(company, time_period), data_store_id)
+            if results.get('match_info'):
+                self._count("document_lookups")
+                self._remember(data_store_id, results)
+                return results
+            self._count("lookup_fallbacks")
+            logger.warning(f"Document lookup found nothing in {document['id']}, falling back to the filtered search.")
+
+        self._count("full_searches")
+        results = filtered_search(query, company, time_period, data_store_id, profile, timeout)
+        self._remember(data_store_id, results)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the share of queries that took the fast path.
+
+        Returns:
+            Dict[str, Any]: The routing statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        fast_path = stats["cache_hits"] + stats["document_lookups"]
+        stats["fast_path_rate"] = round(fast_path / stats["queries"], 4) if stats["queries"] else 0.0
+        return stats
+
+
+search_router = SearchRouter(DocumentPassageCache(max_passages=config.ROUTING['max_passages_per_document']))
+
+
+def routed_filtered_search(query: str, company: str, time_period: str, data_store_id: str,
+                           profile: str = "extractive_answers", timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Drop-in replacement for `filtered_search` that routes single-document filters through `search_router`.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    company (str): The company name.
+    time_period (str): The time period.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+    """
+    return search_router.filtered_search(query, company, time_period, data_store_id, profile, timeout)
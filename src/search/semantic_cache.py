@@ -0,0 +1,210 @@
+from src.search.utils import build_filter_str
+from src.eval.semantic_similarity import embed_text
+from src.search.utils import filtered_search
+from src.config.logging import logger
+from src.config.setup import config
+from collections import deque
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import numpy as np
+import threading
+import json
+import time
+
+
+class SemanticCache:
+    """
+    A bounded cache that serves search results for paraphrased queries.
+
+    Query embeddings are kept L2-normalized in a preallocated matrix, so the nearest cached
+    query within a partition (data store + filter) is one vectorized dot product away. A
+    cached result is served when its cosine similarity to the incoming query reaches the
+    threshold. When the matrix is full the least recently used entry is overwritten.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit.
+        max_entries (int): Number of rows in the embedding matrix.
+        ttl_seconds (float): Time to live of an entry.
+        stats (Dict[str, int]): Hit, miss, eviction and expiration counters.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float) -> None:
+        """
+        Initializes an empty cache. The embedding matrix is allocated on the first insert,
+        once the embedding dimension is known.
+
+        Args:
+            threshold (float): Minimum cosine similarity for a hit.
+            max_entries (int): Number of rows in the embedding matrix.
+            ttl_seconds (float): Time to live of an entry.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._vectors: Optional[np.ndarray] = None
+        self._partitions = np.full(max_entries, -1, dtype=np.int32)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._results: List[Optional[str]] = [None] * max_entries
+        self._partition_ids: Dict[str, int] = {}
+        self._lookup_latencies = deque(maxlen=10000)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float], partition: str) -> Optional[Dict[str, Any]]:
+        """
+        Finds the cached result of the most similar query in a partition.
+
+        Args:
+            embedding (List[float]): The query embedding.
+            partition (str): The partition key (data store and filter).
+
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the cached result, or None on a miss.
+        """
+        start = time.perf_counter()
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            try:
+                partition_id = self._partition_ids.get(partition)
+                if self._vectors is None or partition_id is None:
+                    self.stats["misses"] += 1
+                    return None
+
+                candidates = np.flatnonzero(self._partitions == partition_id)
+                expired = candidates[self._expires_at[candidates] <= now]
+                if expired.size:
+                    self._partitions[expired] = -1
+                    self.stats["expirations"] += int(expired.size)
+                    candidates = candidates[self._expires_at[candidates] > now]
+                if candidates.size == 0:
+                    self.stats["misses"] += 1
+                    return None
+
+                similarities = self._vectors[candidates] @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] < self.threshold:
+                    self.stats["misses"] += 1
+                    return None
+
+                row = candidates[best]
+                self._last_used[row] = now
+                self.stats["hits"] += 1
+                return json.loads(self._results[row])
+            finally:
+                self._lookup_latencies.append(time.perf_counter() - start)
+
+    def add(self, embedding: List[float], partition: str, result: Dict[str, Any]) -> None:
+        """
+        Caches a result under a query embedding, evicting the least recently used entry if full.
+
+        Args:
+            embedding (List[float]): The query embedding.
+            partition (str): The partition key (data store and filter).
+            result (Dict[str, Any]): The consolidated search result.
+        """
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            free = np.flatnonzero(self._partitions == -1)
+            if free.size:
+                row = int(free[0])
+            else:
+                row = int(np.argmin(self._last_used))
+                self.stats["evictions"] += 1
+
+            partition_id = self._partition_ids.setdefault(partition, len(self._partition_ids))
+            self._vectors[row] = vector
+            self._partitions[row] = partition_id
+            self._last_used[row] = now
+            self._expires_at[row] = now + self.ttl_seconds
+            self._results[row] = json.dumps(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters along with the hit rate and lookup latency.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = int(np.count_nonzero(self._partitions != -1))
+            latencies = np.asarray(self._lookup_latencies, dtype=np.float64) * 1000.0
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["lookup_p50_ms"] = round(float(np.percentile(latencies, 50)), 4) if latencies.size else 0.0
+        stats["lookup_p95_ms"] = round(float(np.percentile(latencies, 95)), 4) if latencies.size else 0.0
+        return stats
+
+
+semantic_cache = SemanticCache(
+    threshold=config.SEMANTIC_CACHE['threshold'],
+    max_entries=config.SEMANTIC_CACHE['max_entries'],
+    ttl_seconds=config.SEMANTIC_CACHE['ttl_seconds'],
+)
+
+
+def semantic_filtered_search(query: str, company: str, time_period: str, data_store_id: str,
+                             profile: str = "default", timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Drop-in replacement for `filtered_search` that serves paraphrases of earlier queries from the semantic cache.
+
+    Only queries with the same data store, search profile and company/time period filter are compared. The cache is
+    bypassed when `semantic_cache.enabled` is false or the query cannot be embedded.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    company (str): The company name.
+    time_period (str): The time period.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Search deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                    Returns an empty dictionary if an error occurs.
+    """
+    if not config.SEMANTIC_CACHE['enabled']:
+        return filtered_search(query, company, time_period, data_store_id, profile, timeout)
+
+    partition = f"{data_store_id}\x1f{profile}\x1f{build_filter_str(company, time_period)}"
+    try:
+        embedding = embed_text([query])[0]
+    except Exception as e:
+        logger.error(f"Semantic cache bypassed, failed to embed query: {e}")
+        return filtered_search(query, company, time_period, data_store_id, profile, timeout)
+
+    cached = semantic_cache.lookup(embedding, partition)
+    if cached is not None:
+        return cached
+
+    results = filtered_search(query, company, time_period, data_store_id, profile, timeout)
+    if results:
+        semantic_cache.add(embedding, partition, results)
+    return results
+
+
+if __name__ == "__main__":
+    data_store_id = "quarterly-reports"
+    queries = [
+        "Google Cloud operating loss Q1 2021",
+        "What was GCP's operating income in the first quarter of 2021?",
+        "What was the operating loss of Google Cloud in Q1 2021?",
+    ]
+    for query in queries:
+        results = semantic_filtered_search(query, "alphabet", "Q1 2021", data_store_id)
+        logger.info(f"{query} -> {results.get('summarized_answer')}")
+    logger.info(f"Semantic cache stats: {semantic_cache.get_stats()}")
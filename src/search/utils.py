@@ -1,152 +1,76 @@
 from google.cloud import discoveryengine_v1beta as discoveryengine
-from google.api_core.client_options import ClientOptions
-from google.protobuf import json_format
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.rate_limit import get_rate_limiter
+from src.search.local_bm25 import local_search_data_store
+from src.search.local_dense import dense_search_data_store
+from src.search.records import document_to_record
+from src.search.records import MatchRecord
+from src.search.client import client_registry
+from src.search.hedging import search_hedger
+from src.search.cache import search_cache
+from src.search.profiles import get_profile
 from src.config.logging import logger 
 from src.config.setup import config
 from typing import Optional
+from typing import Iterator
+from typing import Union
 from typing import Dict
 from typing import List
 from typing import Any
+import time
 import os 
 
 
 LOCATION = "global" 
 
+# In-process alternatives to Vertex AI Search, selected with `search.backend`
+LOCAL_BACKENDS = {
+    "local_bm25": local_search_data_store,
+    "local_dense": dense_search_data_store,
+}
 
-def search_data_store(search_query: str, data_store_id: str) -> Optional[discoveryengine.SearchResponse]:
+def search_data_store(search_query: str, data_store_id: str, profile: str = "default",
+                      timeout: Optional[float] = None) -> Optional[discoveryengine.SearchResponse]:
     """
     Searches the data store using Google Cloud's Discovery Engine API.
 
     Args:
         search_query (str): The search query string.
         data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): Name of the search profile (see `src.search.profiles`).
+        timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
 
     Returns:
         Optional[discoveryengine.SearchResponse]: The search response from the Discovery Engine API.
     """
-    try:
-        client_options = (
-            ClientOptions(api_endpoint=f"{LOCATION}-discoveryengine.googleapis.com")
-            if LOCATION != "global"
-            else None
-        )
-
-        client = discoveryengine.SearchServiceClient(client_options=client_options)
-
-        serving_config = client.serving_config_path(
-            project=config.PROJECT_ID,
-            location=LOCATION,
-            data_store=data_store_id,
-            serving_config="default_config",
-        )
-
-        content_search_spec = discoveryengine.SearchRequest.ContentSearchSpec(
-            snippet_spec=discoveryengine.SearchRequest.ContentSearchSpec.SnippetSpec(
-                return_snippet=False  # snippets are NOT important in the context of this use case
-            ),
-            extractive_content_spec=discoveryengine.SearchRequest.ContentSearchSpec.ExtractiveContentSpec(
-                max_extractive_answer_count=3,
-                max_extractive_segment_count=3,
-            ),
-            summary_spec=discoveryengine.SearchRequest.ContentSearchSpec.SummarySpec(
-                summary_result_count=5,
-                include_citations=True,
-                ignore_adversarial_query=False,
-                ignore_non_summary_seeking_query=False,
-            ),
-        )
-
-        request = discoveryengine.SearchRequest(
-            serving_config=serving_config,
-            query=search_query,
-            page_size=5,
-            content_search_spec=content_search_spec,
-            query_expansion_spec=discoveryengine.SearchRequest.QueryExpansionSpec(
-                condition=discoveryengine.SearchRequest.QueryExpansionSpec.Condition.AUTO,
-            ),
-            spell_correction_spec=discoveryengine.SearchRequest.SpellCorrectionSpec(
-                mode=discoveryengine.SearchRequest.SpellCorrectionSpec.Mode.AUTO
-            ),
-        )
-
-        response = client.search(request)
-        return response
+    return search_data_store_with_filters(search_query, "", data_store_id, profile, timeout)
 
-    except Exception as e:
-        logger.error(f"Error during data store search: {e}")
-        return None
 
-
-def extract_relevant_data(response: Optional[discoveryengine.SearchResponse]) -> List[Dict[str, Any]]:
+def extract_relevant_data(response: Optional[discoveryengine.SearchResponse]) -> List[Union[str, MatchRecord]]:
     """
-    Extracts title, snippet, and link from the search response.
+    Extracts the summary and one match record per result from the search response.
+
+    Fields are read directly from the result's `struct_data`/`derived_struct_data` protobuf
+    Structs instead of converting each document to a dict first.
 
     Args:
         response (Optional[discoveryengine.SearchResponse]): The search response object from the Discovery Engine API.
 
     Returns:
-        List[Dict[str, Any]]: A list of dictionaries containing the extracted information.
+        List[Union[str, MatchRecord]]: The summary text (possibly empty) followed by one match record per result.
+                                       Empty if there is no response.
     """
-    extracted_data = []
-
     if response is None:
         logger.error("No response received to extract data.")
-        return extracted_data
-    
-    summary = response.summary.summary_text
-    if summary:
-        extracted_data.append(summary)
-        
-    for result in response.results:
-        data = {
-            "id": "",
-            "title": "",
-            "link": "",
-            "company": "",
-            "time_period": "",
-            "extractive_answers": [],
-            "extractive_segments": []
-        }
-
-        # Convert protocol buffer message to JSON
-        result_json = json_format.MessageToDict(result.document._pb)
-
-        # Extracting fields from JSON
-        struct_data = result_json.get('structData', {})
-        derived_struct_data = result_json.get('derivedStructData', {})
-
-        id = result_json['id']
-        data['id'] = id
-
-        title = derived_struct_data['title']
-        data['title'] = title
+        return []
 
-        company = struct_data['company']
-        data['company'] = company
-
-        time_period = struct_data['time_period']
-        data['time_period'] = time_period
-
-        # Collect extractive answers 
-        extractive_answers = derived_struct_data.get("extractive_answers", [])
-        answers = [answer["content"] for answer in extractive_answers]
-        data['extractive_answers'] = answers
-
-        # Collect extractive segments
-        extractive_segments = derived_struct_data.get("extractive_segments", [])
-        segments = [segment["content"] for segment in extractive_segments]
-        data["extractive_segments"] = segments
-
-        # Extracting link
-        link = derived_struct_data.get("link")
-        if link:
-            data["link"] = link
-
-        extracted_data.append(data)
+    extracted_data = [response.summary.summary_text]
+    for result in response.results:
+        extracted_data.append(document_to_record(result.document._pb))
     return extracted_data
 
 
-def search(query: str, data_store_id: str) -> Dict[str, Any]:
+def search(query: str, data_store_id: str, profile: str = "default", timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Searches a data store based on a given search query, 
     then consolidates the results in a dictionary.
@@ -154,96 +78,109 @@ def search(query: str, data_store_id: str) -> Dict[str, Any]:
     Parameters:
     query (str): The query used for searching the data store.
     data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
 
     Returns:
         Dict[str, Any]: A dictionary containing the consolidated results of the search.
                         Returns an empty dictionary if an error occurs.
     """
-    try:
-        # Perform the search with the provided query and filter
-        hits = search_data_store(query, data_store_id)
+    return search_with_filter(query, "", data_store_id, profile, timeout)
+    
 
-        # Extract relevant data from the search results
-        matches = extract_relevant_data(hits)
+def build_search_request(search_query: str, filter_str: str, data_store_id: str, profile: str = "default",
+                         page_size: Optional[int] = None, page_token: str = "") -> discoveryengine.SearchRequest:
+    """
+    Builds the Discovery Engine search request used by the sync and async search paths.
 
-        # Create a summary dictionary from the matches
-        summary_dict = create_summary_dict(matches)
+    Args:
+        search_query (str): The search query string.
+        filter_str (str): Filter string for the query. An empty string disables filtering.
+        data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): Name of the search profile (see `src.search.profiles`).
+        page_size (Optional[int]): Overrides the profile's page size.
+        page_token (str): Token of the page to fetch, from a previous response's `next_page_token`.
 
-        return summary_dict
+    Returns:
+        discoveryengine.SearchRequest: The search request.
+    """
+    serving_config = discoveryengine.SearchServiceClient.serving_config_path(
+        project=config.PROJECT_ID,
+        location=LOCATION,
+        data_store=data_store_id,
+        serving_config="default_config",
+    )
+
+    return get_profile(profile).build_request(serving_config, search_query, filter_str, page_size, page_token)
 
-    except Exception as e:
-        # Log the error and return an empty dictionary or an error message
-        logger.error(f"Error executing search_data_store: {e}")
-        return {}
-    
 
-def search_data_store_with_filters(search_query: str, filter_str: str, data_store_id: str) -> Optional[discoveryengine.SearchResponse]:
+def search_data_store_with_filters(search_query: str, filter_str: str, data_store_id: str, profile: str = "default",
+                                   timeout: Optional[float] = None, page_size: Optional[int] = None) -> Optional[discoveryengine.SearchResponse]:
     """
     Search the data store using Google Cloud's Discovery Engine API.
 
+    The deadline covers the whole call, including the wait for the rate limiter: when no token
+    is available before the deadline, the API is not called and None is returned. When
+    `search.hedging.enabled` is true, a slow request is hedged (see `src.search.hedging`).
+
     Args:
         search_query (str): The search query string.
         filter_str (str): Filter string for the query.
         data_store_id (str): Vertex AI Search Data Store ID.
+        profile (str): Name of the search profile (see `src.search.profiles`).
+        timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+        page_size (Optional[int]): Overrides the profile's page size.
 
     Returns:
-        Optional[discoveryengine.SearchResponse]: The search response from the Discovery Engine API.
+        Optional[discoveryengine.SearchResponse]: The search response, or None if the search failed or timed out.
     """
+    timeout = timeout if timeout is not None else config.SEARCH['timeout_seconds']
+    deadline = time.monotonic() + timeout
     try:
-        client_options = (
-            ClientOptions(api_endpoint=f"{LOCATION}-discoveryengine.googleapis.com")
-            if LOCATION != "global"
-            else None
-        )
-
-        client = discoveryengine.SearchServiceClient(client_options=client_options)
-
-        serving_config = client.serving_config_path(
-            project=config.PROJECT_ID,
-            location=LOCATION,
-            data_store=data_store_id,
-            serving_config="default_config",
-        )
-
-        content_search_spec = discoveryengine.SearchRequest.ContentSearchSpec(
-            snippet_spec=discoveryengine.SearchRequest.ContentSearchSpec.SnippetSpec(
-                return_snippet=False  # snippets are NOT important in the context of this use case
-            ),
-            extractive_content_spec=discoveryengine.SearchRequest.ContentSearchSpec.ExtractiveContentSpec(
-                max_extractive_answer_count=3,
-                max_extractive_segment_count=3,
-            ),
-            summary_spec=discoveryengine.SearchRequest.ContentSearchSpec.SummarySpec(
-                summary_result_count=5,
-                include_citations=True,
-                ignore_adversarial_query=False,
-                ignore_non_summary_seeking_query=False,
-            ),
-        )
-
-        request = discoveryengine.SearchRequest(
-            serving_config=serving_config,
-            query=search_query,
-            filter=filter_str,
-            page_size=5,
-            content_search_spec=content_search_spec,
-            query_expansion_spec=discoveryengine.SearchRequest.QueryExpansionSpec(
-                condition=discoveryengine.SearchRequest.QueryExpansionSpec.Condition.AUTO,
-            ),
-            spell_correction_spec=discoveryengine.SearchRequest.SpellCorrectionSpec(
-                mode=discoveryengine.SearchRequest.SpellCorrectionSpec.Mode.AUTO
-            ),
-        )
-
-        response = client.search(request)
-        return response
+        client = client_registry.get_client(LOCATION)
+        request = build_search_request(search_query, filter_str, data_store_id, profile, page_size)
+
+        def remaining() -> float:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError(f"Search deadline of {timeout}s exceeded before the request was sent.")
+            return left
+
+        def attempt() -> discoveryengine.SearchResponse:
+            return get_rate_limiter("search").call(
+                lambda: client.search(request, timeout=remaining()), max_wait=remaining())
+
+        if config.SEARCH['hedging']['enabled']:
+            return search_hedger.call(attempt, timeout)
+        return attempt()
 
     except Exception as e:
         logger.error(f"Error during data store search: {e}")
         return None
 
 
-def filtered_search(query: str, company: str, time_period: str, data_store_id: str) -> Dict[str, Any]:
+def build_filter_str(company: Optional[str], time_period: Optional[str]) -> str:
+    """
+    Builds the metadata filter expression for a company and time period.
+
+    Args:
+        company (Optional[str]): The company name.
+        time_period (Optional[str]): The time period.
+
+    Returns:
+        str: The filter expression, or an empty string when neither is given.
+    """
+    if company and time_period:
+        return f"company: ANY(\"{company}\") AND time_period: ANY(\"{time_period}\")"
+    elif company and not time_period:
+        return f"company: ANY(\"{company}\")"
+    elif not company and time_period:
+        return f"time_period: ANY(\"{time_period}\")"
+    return ""
+
+
+def filtered_search(query: str, company: str, time_period: str, data_store_id: str, profile: str = "default",
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Searches a data store based on a given search query and filter, 
     then consolidates the results in a dictionary.
@@ -253,23 +190,53 @@ def filtered_search(query: str, company: str, time_period: str, data_store_id: s
     company (str): The company name.
     time_period (str): The time period.
     data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
 
     Returns:
     Dict[str, Any]: A dictionary containing the consolidated results of the search.
                     Returns an empty dictionary if an error occurs.
     """
-    if company and time_period:
-        filter_str = f"company: ANY(\"{company}\") AND time_period: ANY(\"{time_period}\")"
-    elif company and not time_period:
-        filter_str = f"company: ANY(\"{company}\")"
-    elif not company and time_period:
-        filter_str = f"time_period: ANY(\"{time_period}\")"
-    else:
-        filter_str = ""
+    filter_str = build_filter_str(company, time_period)
+    return search_with_filter(query, filter_str, data_store_id, profile, timeout)
+
+
+def search_with_filter(query: str, filter_str: str, data_store_id: str, profile: str = "default",
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Searches a data store with a prebuilt filter expression, serving from the search cache when possible,
+    then consolidates the results in a dictionary.
+
+    When `search.backend` names one of the `LOCAL_BACKENDS` the query is answered from that local
+    index (see `src.search.local_bm25`, `src.search.local_dense`) instead of Vertex AI Search, without caching.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    filter_str (str): Filter string for the query. An empty string disables filtering.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    Dict[str, Any]: A dictionary containing the consolidated results of the search.
+                    Returns an empty dictionary if an error occurs.
+    """
+    local_backend = LOCAL_BACKENDS.get(config.SEARCH['backend'])
+    if local_backend is not None:
+        try:
+            return create_summary_dict(local_backend(query, filter_str, data_store_id))
+        except Exception as e:
+            logger.error(f"Error executing local search: {e}")
+            return {}
+
+    cache_key = search_cache.make_key(query, filter_str, data_store_id, get_profile(profile).fingerprint)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         # Perform the search with the provided query and filter
-        hits = search_data_store_with_filters(query, filter_str, data_store_id)
+        hits = search_data_store_with_filters(query, filter_str, data_store_id, profile, timeout)
 
         # Extract relevant data from the search results
         matches = extract_relevant_data(hits)
@@ -277,20 +244,124 @@ def filtered_search(query: str, company: str, time_period: str, data_store_id: s
         # Create a summary dictionary from the matches
         summary_dict = create_summary_dict(matches)
 
+        search_cache.put(cache_key, data_store_id, summary_dict)
         return summary_dict
 
     except Exception as e:
         # Log the error and return an empty dictionary or an error message
         logger.error(f"Error executing search_data_store: {e}")
         return {}
+
+
+def search_many(queries: List[str], filters: Optional[List[str]], data_store_id: str,
+                profile: str = "default", timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Runs many searches concurrently under the shared search rate limiter.
+
+    Concurrency is capped by `search.max_concurrency`; the request rate is capped by the
+    `rate_limits.search` token bucket, so throughput follows the configured quota rather
+    than a fixed pause between queries.
+
+    Parameters:
+    queries (List[str]): The queries used for searching the data store.
+    filters (Optional[List[str]]): One filter string per query (see `build_filter_str`), or None for unfiltered searches.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+    timeout (Optional[float]): Per-query deadline in seconds. Defaults to `search.timeout_seconds`.
+
+    Returns:
+    List[Dict[str, Any]]: The consolidated results, in the same order as `queries`.
+    """
+    if filters is None:
+        filters = [""] * len(queries)
+    if len(filters) != len(queries):
+        raise ValueError("queries and filters must have the same length.")
+
+    with ThreadPoolExecutor(max_workers=config.SEARCH['max_concurrency']) as executor:
+        return list(executor.map(lambda query, filter_str: search_with_filter(query, filter_str, data_store_id, profile, timeout), queries, filters))
+
+
+def fetch_search_page(request: discoveryengine.SearchRequest) -> discoveryengine.SearchResponse:
+    """
+    Fetches exactly one page of results for a search request.
+
+    The pager returned by `SearchServiceClient.search` would follow `next_page_token` on its own;
+    this returns only the response for the requested page so callers control pagination.
+
+    Args:
+        request (discoveryengine.SearchRequest): The search request, with `page_token` set for pages after the first.
+
+    Returns:
+        discoveryengine.SearchResponse: The response for the requested page.
+    """
+    client = client_registry.get_client(LOCATION)
+    pager = get_rate_limiter("search").call(lambda: client.search(request, timeout=config.SEARCH['timeout_seconds']))
+    return next(iter(pager.pages))
+
+
+def iter_search_results(query: str, filter_str: str, data_store_id: str, page_size: int = 25,
+                        max_results: int = 100, prefetch: bool = True,
+                        profile: str = "retrieval_only") -> Iterator[MatchRecord]:
+    """
+    Lazily yields match records for deep retrieval, one page at a time.
+
+    Pages are fetched by following `next_page_token` only as the caller consumes results, so at most
+    the current page (and, with `prefetch`, the next one) is held in memory. With `prefetch` enabled,
+    the request for the next page is issued in the background as soon as a page arrives.
+
+    Results are not cached. On a search error the error is logged and iteration stops.
+
+    Parameters:
+    query (str): The query used for searching the data store.
+    filter_str (str): Filter string for the query. An empty string disables filtering.
+    data_store_id (str): Vertex AI Search Data Store ID.
+    page_size (int): Number of results requested per page. The API caps this at 100.
+    max_results (int): Maximum number of records to yield.
+    prefetch (bool): Whether to fetch the next page while the caller consumes the current one.
+    profile (str): Name of the search profile (see `src.search.profiles`).
+
+    Yields:
+    MatchRecord: One record per result, in rank order.
+    """
+    # page_size must stay the same across pages for the page tokens to remain valid
+    def request_page(page_token: str) -> discoveryengine.SearchResponse:
+        request = build_search_request(query, filter_str, data_store_id, profile, page_size, page_token)
+        return fetch_search_page(request)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        remaining = max_results
+        pending = executor.submit(request_page, "") if executor else None
+        page_token = ""
+        while remaining > 0:
+            try:
+                response = pending.result() if pending else request_page(page_token)
+            except Exception as e:
+                logger.error(f"Error during paginated data store search: {e}")
+                return
+
+            page_token = response.next_page_token
+            pending = None
+            if executor and page_token and remaining > len(response.results):
+                pending = executor.submit(request_page, page_token)
+
+            results = discoveryengine.SearchResponse.pb(response).results
+            for result in results[:remaining]:
+                yield document_to_record(result.document)
+            remaining -= min(len(results), remaining)
+            if not page_token or not results:
+                return
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
     
     
-def create_summary_dict(matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+def create_summary_dict(matches: List[Union[str, MatchRecord]]) -> Dict[str, Any]:
     """
     Creates a dictionary with the relevant data extracted from the matches.
 
     Args:
-        matches (List[Dict[str, Any]]): List of match data extracted.
+        matches (List[Union[str, MatchRecord]]): The summary followed by the extracted match records.
 
     Returns:
         Dict[str, Any]: A dictionary containing the summary and details of each match.
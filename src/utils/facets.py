@@ -0,0 +1,285 @@
+from src.config.logging import logger
+from src.config.setup import config
+from collections import Counter
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Set
+import threading
+import difflib
+import json
+import time
+import os
+import re
+
+
+METADATA_PATH = './data/metadata/metadata.json'
+
+_TIME_PERIOD = re.compile(r"^\s*q\s*([1-4])[\s\-_/]*(\d{4})\s*$", re.IGNORECASE)
+
+
+def load_metadata(metadata_path: str = METADATA_PATH) -> Dict[str, Dict[str, str]]:
+    """
+    Loads the document manifest written by `create_manifest`, keyed by PDF filename.
+
+    Args:
+        metadata_path (str): Path to the JSON lines manifest.
+
+    Returns:
+        Dict[str, Dict[str, str]]: For each filename, its `id`, `uri`, `company` and `time_period`.
+    """
+    metadata = {}
+    with open(metadata_path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            json_data = json.loads(entry['jsonData'])
+            uri = entry['content']['uri']
+            metadata[uri.split('/')[-1]] = {
+                "id": entry['id'],
+                "uri": uri,
+                "company": json_data['company'],
+                "time_period": json_data['time_period'],
+            }
+    return metadata
+
+
+def normalize_time_period(time_period: str) -> Optional[str]:
+    """
+    Normalizes the spelling of a time period, e.g. "q1-2021" or "Q12021" to "Q1 2021".
+
+    Args:
+        time_period (str): The time period.
+
+    Returns:
+        Optional[str]: The normalized time period, or None if it is not a quarter and a year.
+    """
+    match = _TIME_PERIOD.match(time_period)
+    return f"Q{match.group(1)} {match.group(2)}" if match else None
+
+
+class FacetCatalog:
+    """
+    An in-memory map from company/time period facets to the documents of the manifest.
+
+    The manifest is read on first use and read again when its modification time or size changes
+    (checked at most every `check_interval` seconds), e.g. after `create_manifest` regenerated it.
+    A refresh applies only the documents that were added, removed or changed. Facet values are
+    validated in O(1) against the catalog, and misspelled companies are corrected to the nearest
+    known one.
+
+    Attributes:
+        metadata_path (str): Path to the JSON lines manifest.
+        check_interval (float): Minimum number of seconds between two checks of the manifest.
+        fuzzy_cutoff (float): Minimum similarity (0-1) for a company to be corrected to a known one.
+        documents (List[Dict[str, str]]): The manifest entries.
+        stats (Dict[str, int]): Refresh and correction counters, and the number of documents added,
+            removed and changed by refreshes.
+    """
+
+    def __init__(self, metadata_path: str = METADATA_PATH, check_interval_seconds: float = 5.0,
+                 fuzzy_cutoff: float = 0.8) -> None:
+        """
+        Initializes the catalog. The manifest is read on first use.
+
+        Args:
+            metadata_path (str): Path to the JSON lines manifest.
+            check_interval_seconds (float): Minimum number of seconds between two checks of the manifest.
+            fuzzy_cutoff (float): Minimum similarity (0-1) for a company to be corrected to a known one.
+        """
+        self.metadata_path = metadata_path
+        self.check_interval = check_interval_seconds
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.documents: List[Dict[str, str]] = []
+        self.stats = {"refreshes": 0, "added": 0, "removed": 0, "changed": 0, "corrections": 0}
+        self._by_id: Dict[str, Dict[str, str]] = {}
+        self._by_facets: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        self._companies: Counter = Counter()
+        self._time_periods: Counter = Counter()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        """
+        (Re)reads the manifest and applies the documents that were added, removed or changed since
+        the last read. If the manifest cannot be read, the current catalog is kept.
+        """
+        signature = self._stat(self.metadata_path)
+        try:
+            documents = {document['id']: document for document in load_metadata(self.metadata_path).values()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to read manifest {self.metadata_path}, keeping the current facet catalog: {e}")
+            return
+
+        with self._lock:
+            removed = [doc_id for doc_id in self._by_id if doc_id not in documents]
+            changed = [doc_id for doc_id, document in documents.items()
+                       if doc_id in self._by_id and self._by_id[doc_id] != document]
+            added = [doc_id for doc_id in documents if doc_id not in self._by_id]
+            for doc_id in removed + changed:
+                self._unindex(self._by_id.pop(doc_id))
+            for doc_id in changed + added:
+                self._by_id[doc_id] = documents[doc_id]
+                self._index(documents[doc_id])
+            self.documents = list(self._by_id.values())
+            self._signature = signature
+            self.stats["refreshes"] += 1
+            self.stats["added"] += len(added)
+            self.stats["removed"] += len(removed)
+            self.stats["changed"] += len(changed)
+        logger.info(f"Facet catalog refreshed: {len(added)} added, {len(removed)} removed, {len(changed)} changed; "
+                    f"{len(self.documents)} documents, {len(self._by_facets)} company/time period pairs.")
+
+    def _index(self, document: Dict[str, str]) -> None:
+        self._by_facets.setdefault((document['company'], document['time_period']), []).append(document)
+        self._companies[document['company']] += 1
+        self._time_periods[document['time_period']] += 1
+
+    def _unindex(self, document: Dict[str, str]) -> None:
+        key = (document['company'], document['time_period'])
+        self._by_facets[key] = [entry for entry in self._by_facets[key] if entry['id'] != document['id']]
+        if not self._by_facets[key]:
+            del self._by_facets[key]
+        for counter, value in ((self._companies, document['company']), (self._time_periods, document['time_period'])):
+            counter[value] -= 1
+            if counter[value] <= 0:
+                del counter[value]
+
+    def _ensure_loaded(self) -> None:
+        """
+        Reads the manifest on first use, and again when it changed on disk.
+        """
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < self.check_interval:
+            return
+        with self._load_lock:
+            if not self._checked_at or self._stat(self.metadata_path) != self._signature:
+                self.load()
+            self._checked_at = now
+
+    def companies(self) -> Set[str]:
+        """
+        Returns the companies of the manifest.
+
+        Returns:
+            Set[str]: The company facet values.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return set(self._companies)
+
+    def time_periods(self) -> Set[str]:
+        """
+        Returns the time periods of the manifest.
+
+        Returns:
+            Set[str]: The time period facet values.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return set(self._time_periods)
+
+    def match_company(self, company: str) -> Optional[str]:
+        """
+        Maps a company name to the company facet value it denotes, correcting misspellings.
+
+        Args:
+            company (str): The company name.
+
+        Returns:
+            Optional[str]: The company facet value, or None if no known company is close enough.
+        """
+        self._ensure_loaded()
+        company = company.strip().lower()
+        with self._lock:
+            if company in self._companies:
+                return company
+            candidates = list(self._companies)
+        matches = difflib.get_close_matches(company, candidates, n=1, cutoff=self.fuzzy_cutoff)
+        if not matches:
+            return None
+        with self._lock:
+            self.stats["corrections"] += 1
+        logger.info(f"Corrected company '{company}' to '{matches[0]}'.")
+        return matches[0]
+
+    def match_time_period(self, time_period: str) -> Optional[str]:
+        """
+        Maps a time period to the time period facet value it denotes, normalizing its spelling.
+
+        Unlike companies, time periods are not corrected to the nearest known one: "Q1 2024" is one
+        character away from "Q1 2023" but denotes another report.
+
+        Args:
+            time_period (str): The time period.
+
+        Returns:
+            Optional[str]: The time period facet value, or None if the manifest has no report for it.
+        """
+        self._ensure_loaded()
+        normalized = normalize_time_period(time_period)
+        with self._lock:
+            return normalized if normalized in self._time_periods else None
+
+    def find_documents(self, company: Optional[str], time_period: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Lists the documents a company/time period filter selects.
+
+        Args:
+            company (Optional[str]): The company name, or None for any company.
+            time_period (Optional[str]): The time period, or None for any time period.
+
+        Returns:
+            List[Dict[str, str]]: The matching manifest entries.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if company and time_period:
+                return list(self._by_facets.get((company, time_period), []))
+            return [document for document in self.documents
+                    if (not company or document['company'] == company)
+                    and (not time_period or document['time_period'] == time_period)]
+
+    def resolve_single_document(self, company: Optional[str], time_period: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Returns the document a filter selects when it selects exactly one.
+
+        Args:
+            company (Optional[str]): The company name.
+            time_period (Optional[str]): The time period.
+
+        Returns:
+            Optional[Dict[str, str]]: The manifest entry, or None if the filter selects zero or several documents.
+        """
+        documents = self.find_documents(company, time_period)
+        return documents[0] if len(documents) == 1 else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns the counters along with the size of the catalog.
+
+        Returns:
+            Dict[str, int]: The catalog statistics.
+        """
+        with self._lock:
+            return {**self.stats, "documents": len(self._by_id), "companies": len(self._companies),
+                    "time_periods": len(self._time_periods)}
+
+
+facet_catalog = FacetCatalog(
+    metadata_path=config.FACETS['metadata_path'],
+    check_interval_seconds=config.FACETS['check_interval_seconds'],
+    fuzzy_cutoff=config.FACETS['fuzzy_cutoff'],
+)
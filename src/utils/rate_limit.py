@@ -0,0 +1,277 @@
+from google.api_core import exceptions as core_exceptions
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+from typing import Dict
+from typing import Any
+import threading
+import asyncio
+import grpc
+import time
+
+
+T = TypeVar("T")
+
+THROTTLE_MARKERS = ("429", "RESOURCE_EXHAUSTED", "Quota exceeded", "Too Many Requests")
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """
+    Tells whether an error means the API rejected the call for exceeding its quota.
+
+    Besides the typed `google.api_core` and gRPC errors, this recognizes the status text, since
+    some clients (e.g. LangChain) re-raise quota errors as generic exceptions.
+
+    Args:
+        error (BaseException): The error raised by the API call.
+
+    Returns:
+        bool: True for 429 / RESOURCE_EXHAUSTED errors.
+    """
+    if isinstance(error, (core_exceptions.TooManyRequests, core_exceptions.ResourceExhausted)):
+        return True
+    if isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+        return True
+    message = str(error)
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket whose rate adapts to the API's quota (AIMD).
+
+    Tokens refill continuously at `rate` per second up to `capacity`; every call consumes one
+    token and waits until one is available. This allows bursts of up to `capacity` calls while
+    holding the sustained rate at `rate` calls per second.
+
+    The rate is additive-increase/multiplicative-decrease: every successful call raises it by
+    `additive_increase / rate` (about `additive_increase` QPS per second of traffic at the limit),
+    up to `max_rate`; a throttling error multiplies it by `multiplicative_decrease`, down to
+    `min_rate`, and empties the bucket. Decreases are applied at most once per `cooldown` seconds,
+    because the calls already in flight when the quota is hit all fail together.
+
+    The same bucket serves threads (`acquire`, `call`) and coroutines (`acquire_async`, `acall`),
+    so every caller in the process shares one view of the remaining quota.
+
+    Attributes:
+        rate (float): Current refill rate in tokens per second (the sustained QPS).
+        capacity (float): Maximum number of tokens (the burst size).
+        min_rate (float): Lower bound of the rate.
+        max_rate (float): Upper bound of the rate.
+        stats (Dict[str, int]): Success, throttle and decrease counters.
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: Optional[float] = None, max_rate: Optional[float] = None,
+                 additive_increase: float = 0.0, multiplicative_decrease: float = 1.0, cooldown: float = 0.0) -> None:
+        """
+        Initializes a full bucket. With the default AIMD settings the rate is fixed.
+
+        Args:
+            rate (float): Initial refill rate in tokens per second.
+            capacity (float): Maximum number of tokens.
+            min_rate (Optional[float]): Lower bound of the rate. Defaults to `rate`.
+            max_rate (Optional[float]): Upper bound of the rate. Defaults to `rate`.
+            additive_increase (float): Rate increase, in QPS, per second of successful traffic.
+            multiplicative_decrease (float): Factor applied to the rate on a throttling error.
+            cooldown (float): Minimum number of seconds between two decreases.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate if min_rate is not None else rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.cooldown = cooldown
+        self.stats = {"successes": 0, "throttled": 0, "decreases": 0}
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens if they are available.
+
+        Args:
+            tokens (float): Number of tokens to take.
+
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise the number of seconds until they will be available.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """
+        Blocks until the tokens are available and takes them.
+
+        Args:
+            tokens (float): Number of tokens to take.
+            max_wait (Optional[float]): Maximum number of seconds to wait. Defaults to no limit.
+
+        Returns:
+            bool: True if the tokens were taken, False if they would not be available within `max_wait`.
+        """
+        end = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """
+        Waits without blocking the event loop until the tokens are available and takes them.
+
+        Args:
+            tokens (float): Number of tokens to take.
+            max_wait (Optional[float]): Maximum number of seconds to wait. Defaults to no limit.
+
+        Returns:
+            bool: True if the tokens were taken, False if they would not be available within `max_wait`.
+        """
+        end = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            await asyncio.sleep(wait)
+
+    def record_success(self) -> None:
+        """
+        Records a successful call and increases the rate additively.
+        """
+        with self._lock:
+            self.stats["successes"] += 1
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.additive_increase / self.rate)
+
+    def record_throttle(self) -> None:
+        """
+        Records a throttling error and decreases the rate multiplicatively, at most once per cooldown.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.stats["throttled"] += 1
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self._tokens = 0.0
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * self.multiplicative_decrease)
+            self.stats["decreases"] += 1
+        logger.warning(f"Quota exceeded, rate lowered from {previous:.2f} to {self.rate:.2f} QPS.")
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        if error is None:
+            self.record_success()
+        elif is_throttle_error(error):
+            self.record_throttle()
+
+    def call(self, fn: Callable[[], T], max_wait: Optional[float] = None) -> T:
+        """
+        Runs one API call under the limiter: waits for a token, then adapts the rate to the outcome.
+
+        Args:
+            fn (Callable[[], T]): Performs the API call.
+            max_wait (Optional[float]): Maximum number of seconds to wait for a token. Defaults to no limit.
+
+        Returns:
+            T: The result of `fn`. Errors are re-raised after being recorded.
+
+        Raises:
+            TimeoutError: If no token is available within `max_wait`; `fn` is not called.
+        """
+        if not self.acquire(max_wait=max_wait):
+            raise TimeoutError(f"No rate limit token available within {max_wait:.3f}s.")
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], max_wait: Optional[float] = None) -> T:
+        """
+        Asynchronous counterpart of `call`.
+
+        Args:
+            fn (Callable[[], Awaitable[T]]): Returns the awaitable performing the API call.
+            max_wait (Optional[float]): Maximum number of seconds to wait for a token. Defaults to no limit.
+
+        Returns:
+            T: The result of the call. Errors are re-raised after being recorded.
+
+        Raises:
+            TimeoutError: If no token is available within `max_wait`; `fn` is not called.
+        """
+        if not await self.acquire_async(max_wait=max_wait):
+            raise TimeoutError(f"No rate limit token available within {max_wait:.3f}s.")
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the current rate.
+
+        Returns:
+            Dict[str, Any]: The limiter statistics.
+        """
+        with self._lock:
+            return {**self.stats, "rate": round(self.rate, 3)}
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api: str) -> TokenBucket:
+    """
+    Returns the process-wide rate limiter for an API, sized from the `rate_limits` section of the configuration.
+
+    Args:
+        api (str): The API name: "search", "gemini" or "embedding".
+
+    Returns:
+        TokenBucket: The shared rate limiter.
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(api)
+        if limiter is None:
+            settings = config.RATE_LIMITS[api]
+            aimd = config.RATE_LIMITS['aimd']
+            limiter = TokenBucket(
+                rate=settings['qps'],
+                capacity=settings['burst'],
+                min_rate=settings['min_qps'],
+                max_rate=settings['max_qps'],
+                additive_increase=aimd['additive_increase'],
+                multiplicative_decrease=aimd['multiplicative_decrease'],
+                cooldown=aimd['cooldown_seconds'],
+            )
+            _rate_limiters[api] = limiter
+            logger.info(f"Rate limiter for '{api}': {settings['qps']} QPS (range {settings['min_qps']}-{settings['max_qps']}), "
+                        f"burst {settings['burst']}.")
+        return limiter
@@ -0,0 +1,25 @@
+from typing import List
+import re
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have how in is it its of on or "
+    "our that the their this to was were what when which who why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cases text and splits it into index terms, dropping stopwords.
+
+    Numbers keep their thousands separators and decimals (e.g. "1,730", "13.5") so figures
+    from the reports can be matched exactly.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms, in order.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
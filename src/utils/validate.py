@@ -1,26 +1,33 @@
-from src.generate.ner import extract_entities
+from src.generate.entity_rules import entity_rules
+from src.generate.ner import ENTITY_FIELDS
+from src.generate.ner import extract_fields
+from src.utils.facets import facet_catalog
 from src.config.logging import logger
+from collections import OrderedDict
+from src.config.setup import config
 from typing import Optional
 from typing import Tuple
+from typing import Dict
+from typing import Any
+import threading
 import re
 
 
 def validate_company(company: str) -> Optional[str]:
     """
-    Validates the given company name against a predefined list of valid companies.
+    Validates the given company name against the companies of the facet catalog, correcting misspellings.
 
     Args:
     company (str): The company name to validate.
 
     Returns:
-    Optional[str]: The validated company name in lowercase if valid, otherwise None.
+    Optional[str]: The company facet value (lowercase) if valid, otherwise None.
     """
-    valid_companies = ['alphabet', 'microsoft', 'amazon']
     try:
-        company = company.strip().lower()
-        if company in valid_companies:
-            logger.info(f"Company '{company}' is valid.")
-            return company
+        matched = facet_catalog.match_company(company)
+        if matched:
+            logger.info(f"Company '{matched}' is valid.")
+            return matched
         logger.warning(f"Company '{company}' is not valid.")
     except Exception as e:
         logger.error(f"Error validating company name: {e}")
@@ -29,32 +36,167 @@ def validate_company(company: str) -> Optional[str]:
 
 def validate_time_period(time_period: str) -> Optional[str]:
     """
-    Validates the given time period to match the expected format "Q[1-4] 20[20-23]".
+    Validates the given time period against the time periods of the facet catalog, e.g. "Q1 2021".
 
     Args:
     time_period (str): The time period to validate.
 
     Returns:
-    Optional[str]: The time period if it matches the format, otherwise None.
+    Optional[str]: The time period facet value if valid, otherwise None.
     """
-    pattern = r'Q[1-4] 20[2][0-3]'
     try:
-        if re.fullmatch(pattern, time_period.strip()):
-            logger.info(f"Time period '{time_period}' is valid.")
-            return time_period
+        matched = facet_catalog.match_time_period(time_period)
+        if matched:
+            logger.info(f"Time period '{matched}' is valid.")
+            return matched
         logger.warning(f"Time period '{time_period}' is not valid.")
     except Exception as e:
         logger.error(f"Error validating time period: {e}")
     return None
 
 
+VALIDATORS = {"company": validate_company, "time_period": validate_time_period}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query for memoization: case, typographic quotes, whitespace and trailing punctuation.
+
+    Parameters:
+        query (str): The query.
+
+    Returns:
+        str: The normalized query.
+    """
+    query = query.lower().replace("’", "'").replace("“", '"').replace("”", '"')
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.! ")
+
+
+class EntityResolver:
+    """
+    Extracts and validates the company and time period of queries, with one joint LLM call for
+    whatever the local rules leave unresolved and field-level retries.
+
+    When a field fails validation, only that field is asked for again, with the rejected value in
+    the prompt, so a bad time period costs one more call instead of a full re-extraction. Validated
+    entities are memoized per normalized query, and the number of LLM calls each query needed is kept.
+
+    Attributes:
+        max_entries (int): Maximum number of memoized queries.
+        stats (Dict[str, int]): Query, memo hit, LLM call, field retry and failure counters.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        """
+        Initializes the resolver.
+
+        Parameters:
+            max_entries (int): Maximum number of memoized queries (and of per-query call counts kept).
+        """
+        self.max_entries = max_entries
+        self.stats = {"queries": 0, "memo_hits": 0, "llm_calls": 0, "field_retries": 0, "failures": 0}
+        self._memo: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+        self._call_counts: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _validate(field: str, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        value = value.strip().lower() if field == "company" else value.strip()
+        return VALIDATORS[field](value)
+
+    def resolve(self, query: str, max_retries: int = 5) -> Tuple[str, str]:
+        """
+        Extracts and validates the entities of a query.
+
+        Parameters:
+            query (str): The query from which to extract entities.
+            max_retries (int): The total budget of LLM extraction calls for the query, shared by all fields
+                (each call asks for every field still failing validation).
+
+        Returns:
+            Tuple[str, str]: The validated company name and time period.
+
+        Raises:
+            ValueError: If entities cannot be validated after the specified number of attempts.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self.stats["queries"] += 1
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.stats["memo_hits"] += 1
+                return self._memo[key]
+
+        extracted = entity_rules.extract(query) if config.NER['rules_enabled'] else {}
+        validated = {field: self._validate(field, extracted.get(field)) for field in ENTITY_FIELDS}
+        rejected = {field: extracted[field] for field in ENTITY_FIELDS if extracted.get(field) and not validated[field]}
+        calls = 0
+        failed = [field for field in ENTITY_FIELDS if not validated[field]]
+        while failed and calls < max_retries:
+            if calls:
+                logger.warning(f"Retry {calls}/{max_retries - 1}: {failed} failed validation, asking again for those only.")
+            # A retry prompt can repeat an earlier one, so retries skip the completion cache
+            extracted = extract_fields(query, failed, rejected={field: rejected[field] for field in failed if field in rejected},
+                                       refresh=calls > 0)
+            calls += 1
+            for field in failed:
+                validated[field] = self._validate(field, extracted.get(field))
+                if not validated[field] and extracted.get(field):
+                    rejected[field] = extracted[field]
+            failed = [field for field in failed if not validated[field]]
+
+        with self._lock:
+            self.stats["llm_calls"] += calls
+            self.stats["field_retries"] += max(0, calls - 1)
+            self._call_counts[key] = calls
+            self._call_counts.move_to_end(key)
+            if len(self._call_counts) > self.max_entries:
+                self._call_counts.popitem(last=False)
+            if failed:
+                self.stats["failures"] += 1
+                raise ValueError("Failed to validate entities after several attempts.")
+            entities = (validated["company"], validated["time_period"])
+            self._memo[key] = entities
+            if len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return entities
+
+    def get_call_counts(self) -> Dict[str, int]:
+        """
+        Returns the number of LLM calls each (normalized) query needed when it was last resolved.
+
+        Returns:
+            Dict[str, int]: The LLM calls per query.
+        """
+        with self._lock:
+            return dict(self._call_counts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters along with the mean number of LLM calls per resolved query.
+
+        Returns:
+            Dict[str, Any]: The resolver statistics.
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.stats)
+        stats["llm_calls_per_query"] = round(stats["llm_calls"] / stats["queries"], 4) if stats["queries"] else 0.0
+        return stats
+
+
+entity_resolver = EntityResolver(max_entries=config.NER['memo_max_entries'])
+
+
 def extract_and_validate_entities(query: str, max_retries: int = 5) -> Tuple[str, str]:
     """
     Extracts entities from a query and validates them with a maximum number of retries.
 
     Parameters:
         query (str): The query from which to extract entities.
-        max_retries (int): The maximum number of times to attempt validation.
+        max_retries (int): The total budget of LLM extraction calls for the query, shared by all fields
+            (each call asks for every field still failing validation).
 
     Returns:
         Tuple[str, str]: A tuple containing the validated company name and time period.
@@ -62,21 +204,4 @@ def extract_and_validate_entities(query: str, max_retries: int = 5) -> Tuple[str
     Raises:
         ValueError: If entities cannot be validated after the specified number of attempts.
     """
-    retry_count = 0
-    while retry_count < max_retries:
-        entities = extract_entities(query)
-        company = entities.get('company')
-        time_period = entities.get('time_period')
-
-        if company:
-            company = company.strip().lower()
-        if time_period:
-            time_period = time_period.strip()
-
-        if validate_company(company) and validate_time_period(time_period):
-            return company, time_period
-
-        retry_count += 1
-        print(f"Retry {retry_count}/{max_retries}: Validation failed, retrying...")
-
-    raise ValueError("Failed to validate entities after several attempts.")
+    return entity_resolver.resolve(query, max_retries)